@@ -0,0 +1,127 @@
+# src/data/bronze.py
+"""Bronze bars stored as one parquet fragment per symbol and year.
+
+    <base>/symbol=SYM/year=YYYY/part.parquet
+    <base>/symbol=SYM/_watermark.json    {"last_ts", "rows", "years": {"YYYY": rows}}
+
+An update reads the watermark to decide where to fetch from, merges the new bars into the
+fragments they overlap (normally only the current year) and rewrites just those, so its cost
+grows with the new data rather than the symbol's history. Tables in the old single-file layout
+(`symbol=SYM/bars.parquet`) are still readable and are split into year fragments on first write.
+"""
+from __future__ import annotations
+import json, pathlib
+from typing import Dict, List, Optional, Tuple
+import pandas as pd
+
+from .manifest import _write_json, first_change
+from .metrics import file_size, inc
+from .storage import write_parquet
+
+PART_FILE = "part.parquet"
+WATERMARK_FILE = "_watermark.json"
+LEGACY_FILE = "bars.parquet"
+
+def symbol_dir(base: pathlib.Path, sym: str) -> pathlib.Path:
+    return pathlib.Path(base) / f"symbol={sym}"
+
+def fragment_path(base: pathlib.Path, sym: str, year: int) -> pathlib.Path:
+    return symbol_dir(base, sym) / f"year={year}" / PART_FILE
+
+def symbols(base: pathlib.Path) -> List[str]:
+    return [d.name.split("=", 1)[1] for d in sorted(pathlib.Path(base).glob("symbol=*"))]
+
+def years(base: pathlib.Path, sym: str) -> List[int]:
+    return sorted(int(d.name.split("=", 1)[1]) for d in symbol_dir(base, sym).glob("year=*") if (d / PART_FILE).exists())
+
+def watermark(base: pathlib.Path, sym: str) -> Optional[Dict]:
+    path = symbol_dir(base, sym) / WATERMARK_FILE
+    if not path.exists():
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def _read(path: pathlib.Path) -> pd.DataFrame:
+    inc("bronze.bytes_read", file_size(path))
+    return pd.read_parquet(path)
+
+def read_bars(base: pathlib.Path, sym: str, since: Optional[pd.Timestamp] = None) -> Optional[pd.DataFrame]:
+    """A symbol's bars, sorted by time; None if it has none. With `since`, only the year fragments
+    from `since`'s year on are read (whole years, so rows before `since` may be included)."""
+    legacy = symbol_dir(base, sym) / LEGACY_FILE
+    ys = years(base, sym)
+    if not ys:
+        return _read(legacy) if legacy.exists() else None
+    if since is not None:
+        ys = [y for y in ys if y >= pd.Timestamp(since).year]
+    if not ys:
+        return None
+    frames = [_read(fragment_path(base, sym, y)) for y in ys]
+    return frames[0] if len(frames) == 1 else pd.concat(frames)
+
+def _write_fragment(base: pathlib.Path, sym: str, year: int, df: pd.DataFrame) -> None:
+    path = fragment_path(base, sym, year)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    write_parquet(df, tmp, float32=False)  # raw prices and volumes round-trip exactly
+    tmp.replace(path)
+    inc("bronze.bytes_written", file_size(path))
+    inc("bronze.rows_written", len(df))
+
+def _save_watermark(base: pathlib.Path, sym: str, counts: Dict[int, int], last_ts: pd.Timestamp) -> Dict:
+    wm = {"last_ts": pd.Timestamp(last_ts).isoformat(), "rows": int(sum(counts.values())),
+          "years": {str(y): int(n) for y, n in sorted(counts.items())}}
+    _write_json(symbol_dir(base, sym) / WATERMARK_FILE, wm)
+    return wm
+
+def migrate(base: pathlib.Path, sym: str) -> Optional[Dict]:
+    """Split a legacy `bars.parquet` into year fragments. Returns the new watermark (None if there
+    was nothing to migrate)."""
+    legacy = symbol_dir(base, sym) / LEGACY_FILE
+    if not legacy.exists():
+        return None
+    df = _read(legacy).sort_index()
+    counts = {}
+    for y, part in df.groupby(df.index.year, sort=True):
+        _write_fragment(base, sym, int(y), part)
+        counts[int(y)] = len(part)
+    wm = _save_watermark(base, sym, counts, df.index.max()) if len(df) else None
+    legacy.unlink()
+    return wm
+
+def merge_bars(base: pathlib.Path, sym: str, new: pd.DataFrame) -> Tuple[Optional[pd.Timestamp], Dict[int, pd.DataFrame], Optional[Dict]]:
+    """Merge `new` bars into a symbol's fragments; new values win on duplicate timestamps.
+
+    Only the year fragments `new` overlaps are read, and only those that actually change are
+    rewritten. Returns (first changed timestamp or None, {year: rewritten fragment}, watermark).
+    """
+    wm = watermark(base, sym) or migrate(base, sym)
+    new = new.sort_index(kind="stable")
+    new = new[~new.index.duplicated(keep="last")]
+    counts = {int(y): n for y, n in (wm or {}).get("years", {}).items()}
+    changed_from, written = None, {}
+    for y, part in new.groupby(new.index.year, sort=True):
+        y = int(y)
+        path = fragment_path(base, sym, y)
+        old = _read(path).sort_index() if path.exists() else None
+        if old is None:
+            merged, changed = part, part.index[0]
+        else:
+            # sorted merge: only the rows of `old` inside [first, last] of `part` can collide
+            lo = old.index.searchsorted(part.index[0], side="left")
+            hi = old.index.searchsorted(part.index[-1], side="right")
+            mid = old.iloc[lo:hi]
+            changed = first_change(mid, part)
+            if changed is None:
+                continue
+            if len(mid):
+                part = pd.concat([mid[~mid.index.isin(part.index)], part]).sort_index()
+            merged = pd.concat([old.iloc[:lo], part, old.iloc[hi:]])
+        _write_fragment(base, sym, y, merged)
+        written[y] = merged
+        counts[y] = len(merged)
+        changed_from = changed if changed_from is None else min(changed_from, changed)
+    if written:
+        last_ts = max(pd.Timestamp(wm["last_ts"]), new.index[-1]) if wm else new.index[-1]
+        wm = _save_watermark(base, sym, counts, last_ts)
+    return changed_from, written, wm
@@ -1,21 +1,251 @@
 # src/data/cache.py
+"""Range-aware bar cache: one sorted, de-duplicated table per (symbol, interval) plus the list of
+[start, end) time ranges already fetched for it. Any sub-range of the covered ranges is served by
+slicing; for anything else the caller gets the missing gaps to fetch and merges them back in.
+
+Entries are tracked in a small SQLite index (path, size, coverage, last access, hit count), so a
+miss never touches the filesystem, and the total size is kept under a byte budget
+(CACHE_MAX_BYTES, default 10GB) by evicting least-recently (or least-frequently) used entries.
+
+    python -m src.data.cache stats
+    python -m src.data.cache prune --max-bytes 5GB --policy lfu
+"""
 from __future__ import annotations
-import os, hashlib, pandas as pd, pyarrow.parquet as pq, pyarrow as pa
+import os, json, time, sqlite3, threading, argparse
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import pandas as pd
+
+from .metrics import inc, timer
+from .storage import write_parquet
+
+_CACHE_DIR = os.path.join("data", "_cache")  # created on first use
+
+_INDEX_FILE = "index.sqlite"
+DEFAULT_MAX_BYTES = 10 * 1024**3
+POLICIES = {
+    "lru": "last_access ASC",
+    "lfu": "hits ASC, last_access ASC",
+}
+
+FULL, PARTIAL, MISS = "full", "partial", "miss"
+STATS: Counter = Counter()  # lookups by status since import
+_LOCK = threading.Lock()
+_local = threading.local()
+
+Range = Tuple[int, int]  # [start_ns, end_ns) in UTC
+
+class CacheLookup(NamedTuple):
+    df: Optional[pd.DataFrame]  # cached rows inside the requested range (None on a miss)
+    gaps: List[Tuple[str, str]]  # [start, end) ranges still to fetch, as ISO strings
+    status: str  # FULL, PARTIAL or MISS
+
+def _ts(x) -> pd.Timestamp:
+    t = pd.Timestamp(x)
+    return t.tz_localize("UTC") if t.tzinfo is None else t.tz_convert("UTC")
+
+def _iso(ns: int) -> str:
+    t = pd.Timestamp(ns, tz="UTC")
+    return t.date().isoformat() if t == t.normalize() else t.isoformat()
+
+def parse_bytes(s: str | int | None) -> int:
+    """'500MB', '20GB', '1.5TB' or a plain integer -> bytes."""
+    if s is None or s == "":
+        return DEFAULT_MAX_BYTES
+    if isinstance(s, int):
+        return s
+    t = str(s).strip().upper().rstrip("B")
+    for suffix, mult in (("K", 1024), ("M", 1024**2), ("G", 1024**3), ("T", 1024**4)):
+        if t.endswith(suffix):
+            return int(float(t[:-1]) * mult)
+    return int(float(t))
 
-_CACHE_DIR = os.path.join("data", "_cache")
-os.makedirs(_CACHE_DIR, exist_ok=True)
+def max_bytes() -> int:
+    return parse_bytes(os.getenv("CACHE_MAX_BYTES"))
 
-def _key(symbol: str, interval: str, start: str, end: str) -> str:
-    raw = f"{symbol}|{interval}|{start}|{end}".encode()
-    return hashlib.sha1(raw).hexdigest() + ".parquet"
+def _db() -> sqlite3.Connection:
+    """Per-thread connection to the index of the current cache directory."""
+    path = os.path.abspath(os.path.join(_CACHE_DIR, _INDEX_FILE))
+    conns: Dict[str, sqlite3.Connection] = getattr(_local, "conns", None) or {}
+    _local.conns = conns
+    con = conns.get(path)
+    if con is None:
+        os.makedirs(_CACHE_DIR, exist_ok=True)
+        con = sqlite3.connect(path, timeout=30, isolation_level=None)
+        con.execute("PRAGMA journal_mode=WAL")
+        con.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, symbol TEXT, interval TEXT, path TEXT,"
+            " bytes INTEGER, rows INTEGER, coverage TEXT,"
+            " created REAL, last_access REAL, hits INTEGER DEFAULT 0)"
+        )
+        conns[path] = con
+    return con
+
+def _key(symbol: str, interval: str, rth_only: bool) -> Tuple[str, str]:
+    """(index key, table path) for a (symbol, interval, rth) entry."""
+    folder = f"interval={interval}{'-rth' if rth_only else ''}"
+    name = symbol.replace("/", "_") + ".parquet"
+    return f"{folder}/{name}", os.path.join(_CACHE_DIR, folder, name)
+
+def merge_ranges(ranges: List[Range]) -> List[Range]:
+    out: List[Range] = []
+    for s, e in sorted(ranges):
+        if out and s <= out[-1][1]:
+            out[-1] = (out[-1][0], max(out[-1][1], e))
+        else:
+            out.append((s, e))
+    return out
+
+def missing_ranges(coverage: List[Range], start: int, end: int) -> List[Range]:
+    """Parts of [start, end) not covered by the (merged, sorted) coverage ranges."""
+    gaps, cur = [], start
+    for s, e in coverage:
+        if e <= cur:
+            continue
+        if s >= end:
+            break
+        if s > cur:
+            gaps.append((cur, s))
+        cur = max(cur, e)
+    if cur < end:
+        gaps.append((cur, end))
+    return gaps
+
+def _slice(df: pd.DataFrame, start: int, end: int) -> pd.DataFrame:
+    ns = df.index.as_unit("ns").asi8
+    return df.iloc[ns.searchsorted(start):ns.searchsorted(end)]
+
+def lookup(symbol: str, interval: str, start: str, end: str, rth_only: bool = False) -> CacheLookup:
+    """Serve [start, end) from the cache and report which sub-ranges are missing."""
+    s, e = _ts(start).value, _ts(end).value
+    key, table_path = _key(symbol, interval, rth_only)
+    con = _db()
+    row = con.execute("SELECT coverage, bytes, rows FROM entries WHERE key = ?", (key,)).fetchone()
+    coverage = [tuple(r) for r in json.loads(row[0])] if row else []
+    gaps = missing_ranges(coverage, s, e)
+    if len(gaps) == 1 and gaps[0] == (s, e):
+        STATS[MISS] += 1
+        inc("cache.lookups", status=MISS)
+        return CacheLookup(None, [(_iso(a), _iso(b)) for a, b in gaps], MISS)
+    try:
+        if not row or row[2] == 0:  # only ranges the providers had no bars for: there is no table
+            df = None
+        else:
+            with timer("cache.read"):
+                df = _slice(pd.read_parquet(table_path), s, e)
+    except FileNotFoundError:  # removed behind the index's back
+        con.execute("DELETE FROM entries WHERE key = ?", (key,))
+        STATS[MISS] += 1
+        inc("cache.lookups", status=MISS)
+        return CacheLookup(None, [(_iso(s), _iso(e))], MISS)
+    con.execute("UPDATE entries SET last_access = ?, hits = hits + 1 WHERE key = ?", (time.time(), key))
+    status = PARTIAL if gaps else FULL
+    STATS[status] += 1
+    inc("cache.lookups", status=status)
+    inc("cache.bytes_read", (row and row[1]) or 0)
+    return CacheLookup(df, [(_iso(a), _iso(b)) for a, b in gaps], status)
+
+def store(symbol: str, interval: str, start: str, end: str, df: Optional[pd.DataFrame], rth_only: bool = False) -> None:
+    """Merge freshly fetched rows for [start, end) into the (symbol, interval) table and mark the
+    range as covered, also when it holds no bars. Coverage never extends past the current UTC day,
+    so today's bars are refetched. The table is replaced atomically before the index is updated."""
+    s = _ts(start).value
+    e = min(_ts(end).value, pd.Timestamp.now(tz="UTC").normalize().value)
+    key, table_path = _key(symbol, interval, rth_only)
+    con = _db()
+    with _LOCK:
+        row = con.execute("SELECT coverage, rows FROM entries WHERE key = ?", (key,)).fetchone()
+        coverage = [tuple(r) for r in json.loads(row[0])] if row else []
+        n_rows = row[1] if row else 0
+        if df is not None and len(df) > 0:
+            os.makedirs(os.path.dirname(table_path), exist_ok=True)
+            if row and os.path.exists(table_path):
+                old = pd.read_parquet(table_path)
+                df = pd.concat([old, df]).sort_index()
+                df = df[~df.index.duplicated(keep="last")]
+            else:
+                df = df.sort_index()
+            tmp = os.path.splitext(table_path)[0] + ".tmp"
+            with timer("cache.write"):
+                write_parquet(df, tmp, float32=False)
+            os.replace(tmp, table_path)
+            n_rows = len(df)
+            inc("cache.bytes_written", os.path.getsize(table_path))
+        elif e <= s:
+            return
+        if e > s:
+            coverage = merge_ranges(coverage + [(s, e)])
+        if n_rows and not os.path.exists(table_path):
+            return
+        size = os.path.getsize(table_path) if n_rows else 0
+        now = time.time()
+        con.execute(
+            "INSERT INTO entries (key, symbol, interval, path, bytes, rows, coverage, created, last_access, hits)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0)"
+            " ON CONFLICT(key) DO UPDATE SET bytes = excluded.bytes, rows = excluded.rows,"
+            " coverage = excluded.coverage, last_access = excluded.last_access",
+            (key, symbol, interval, table_path, size, n_rows,
+             json.dumps([list(r) for r in coverage]), now, now),
+        )
+        evict(max_bytes(), keep=key)
+
+def evict(limit: int, policy: str = "lru", keep: Optional[str] = None) -> Dict:
+    """Delete entries (least recently / frequently used first) until the cache is within `limit` bytes."""
+    con = _db()
+    total = con.execute("SELECT COALESCE(SUM(bytes), 0) FROM entries").fetchone()[0]
+    removed = freed = 0
+    if total > limit:
+        order = POLICIES[policy]
+        for key, size in con.execute(f"SELECT key, bytes FROM entries ORDER BY {order}").fetchall():
+            if total <= limit:
+                break
+            if key == keep:
+                continue
+            try:
+                os.remove(os.path.join(_CACHE_DIR, key))
+            except FileNotFoundError:
+                pass
+            con.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            freed += size
+            removed += 1
+    if removed:
+        inc("cache.evictions", removed)
+        inc("cache.bytes_evicted", freed)
+    return {"removed": removed, "freed_bytes": freed, "total_bytes": total}
+
+def stats() -> Dict:
+    con = _db()
+    n, total, rows, hits = con.execute(
+        "SELECT COUNT(*), COALESCE(SUM(bytes), 0), COALESCE(SUM(rows), 0), COALESCE(SUM(hits), 0) FROM entries"
+    ).fetchone()
+    by_interval = {iv: {"entries": c, "bytes": b} for iv, c, b in con.execute(
+        "SELECT interval, COUNT(*), SUM(bytes) FROM entries GROUP BY interval ORDER BY interval")}
+    return {"dir": _CACHE_DIR, "entries": n, "bytes": total, "rows": rows, "hits": hits,
+            "max_bytes": max_bytes(), "by_interval": by_interval, "lookups": dict(STATS)}
 
 def load_cached(symbol: str, interval: str, start: str, end: str) -> pd.DataFrame | None:
-    path = os.path.join(_CACHE_DIR, _key(symbol, interval, start, end))
-    if not os.path.exists(path):
-        return None
-    return pd.read_parquet(path)
+    """Cached bars for [start, end) if the whole range is covered, else None."""
+    res = lookup(symbol, interval, start, end)
+    return res.df if res.status == FULL else None
 
 def save_cache(symbol: str, interval: str, start: str, end: str, df: pd.DataFrame) -> None:
-    path = os.path.join(_CACHE_DIR, _key(symbol, interval, start, end))
-    table = pa.Table.from_pandas(df)
-    pq.write_table(table, path)
+    store(symbol, interval, start, end, df)
+
+def main():
+    ap = argparse.ArgumentParser(description="Inspect or prune the local bar cache.")
+    ap.add_argument("command", choices=["stats", "prune"])
+    ap.add_argument("--max-bytes", default=None, help="Budget for prune, e.g. 5GB (default: CACHE_MAX_BYTES or 10GB)")
+    ap.add_argument("--policy", default="lru", choices=sorted(POLICIES))
+    args = ap.parse_args()
+
+    if args.command == "stats":
+        print(json.dumps(stats(), indent=2))
+    else:
+        limit = parse_bytes(args.max_bytes) if args.max_bytes else max_bytes()
+        res = evict(limit, policy=args.policy)
+        print(f"[ok] removed {res['removed']} entries ({res['freed_bytes']/1e6:.1f} MB); cache now {res['total_bytes']/1e6:.1f} MB")
+
+if __name__ == "__main__":
+    main()
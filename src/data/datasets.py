@@ -1,6 +1,102 @@
-import numpy as np, torch
-from torch.utils.data import Dataset
-class WindowedDataset(Dataset):
-    def __init__(self,X,y,seq_len): self.X=X; self.y=y; self.seq_len=seq_len
-    def __len__(self): return len(self.X)-self.seq_len
-    def __getitem__(self,i): import torch; w=self.X[i:i+self.seq_len].T; t=self.y[i+self.seq_len-1]; return torch.tensor(w).float(), torch.tensor([t]).float()
+# src/data/datasets.py
+"""Sliding-window datasets over one contiguous float32 feature buffer.
+
+Windows are strided views (`sliding_window_view`) into X, never per-sample copies; a window is
+only valid if all of its rows belong to the same symbol, so series concatenated by
+`build_features.py` never bleed into each other. `WindowBatchSampler` hands the dataset whole
+index arrays, and a batch [B, F, T] is produced with a single gather.
+"""
+from __future__ import annotations
+import pathlib
+from typing import Iterator, Optional, Tuple
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+_torch = None
+
+def _tensor(a: np.ndarray):
+    """torch.from_numpy, importing torch on first use only (it costs seconds at import)."""
+    global _torch
+    if _torch is None:
+        import torch
+        _torch = torch
+    return _torch.from_numpy(a)
+
+def window_starts(n_rows: int, seq_len: int, symbol_ids: Optional[np.ndarray] = None) -> np.ndarray:
+    """Start rows of every seq_len window that stays inside one symbol's contiguous run of rows."""
+    if n_rows < seq_len:
+        return np.zeros(0, dtype=np.int64)
+    starts = np.arange(n_rows - seq_len + 1, dtype=np.int64)
+    if symbol_ids is None:
+        return starts
+    sid = np.asarray(symbol_ids)
+    run_start = np.flatnonzero(np.r_[True, sid[1:] != sid[:-1]])
+    run_end = np.append(run_start[1:], n_rows)
+    run_of = np.cumsum(np.r_[True, sid[1:] != sid[:-1]]) - 1
+    return starts[starts + seq_len <= run_end[run_of[starts]]]
+
+class WindowedDataset:
+    """Map-style dataset of (window [F, T], target [1]) tensor pairs; target is y at the window's last row.
+
+    It does not subclass `torch.utils.data.Dataset` (so importing it does not import torch) but
+    implements the same `__len__` / `__getitem__` protocol, which is all `DataLoader` needs.
+
+    X is kept as-is if it is already a C-contiguous float32 array (including a read-only
+    np.memmap), otherwise converted once. Indexing with an int gives one sample; indexing
+    with an int array gives a whole batch ([B, F, T], [B, 1]) in one gather.
+    """
+
+    def __init__(self, X, y, seq_len: int, symbol_ids: Optional[np.ndarray] = None):
+        self.X = np.ascontiguousarray(X, dtype=np.float32)
+        self.y = np.ascontiguousarray(y, dtype=np.float32).reshape(-1)
+        self.seq_len = seq_len
+        self.starts = window_starts(len(self.X), seq_len, symbol_ids)
+        if len(self.X) >= seq_len:
+            self.windows = sliding_window_view(self.X, seq_len, axis=0)  # [N - T + 1, F, T] view
+        else:  # too short for a single window: an empty dataset
+            self.windows = np.empty((0,) + self.X.shape[1:] + (seq_len,), dtype=np.float32)
+
+    @classmethod
+    def from_npy(cls, path: pathlib.Path, seq_len: int, mmap: bool = True) -> "WindowedDataset":
+        """Open `features.npy`, `labels.npy` and `symbol_ids.npy` written by build_features.py."""
+        path = pathlib.Path(path)
+        mode = "r" if mmap else None
+        X = np.load(path / "features.npy", mmap_mode=mode)
+        y = np.load(path / "labels.npy", mmap_mode=mode)
+        sid = np.load(path / "symbol_ids.npy", mmap_mode=mode)
+        return cls(X, y, seq_len, symbol_ids=sid)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def gather(self, idx) -> Tuple[np.ndarray, np.ndarray]:
+        """NumPy windows and targets for dataset positions idx (int or int array)."""
+        s = self.starts[idx]
+        return np.ascontiguousarray(self.windows[s]), self.y[s + self.seq_len - 1, None]
+
+    def __getitem__(self, idx):
+        w, t = self.gather(idx)
+        return _tensor(w), _tensor(np.ascontiguousarray(t))
+
+class WindowBatchSampler:
+    """Yields int64 index arrays of `batch_size` dataset positions. Use with
+    `DataLoader(ds, sampler=WindowBatchSampler(ds, B), batch_size=None)` so each batch is one gather."""
+
+    def __init__(self, dataset: WindowedDataset, batch_size: int, shuffle: bool = True,
+                 drop_last: bool = False, seed: Optional[int] = None):
+        self.n = len(dataset)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+        self.rng = np.random.default_rng(seed)
+
+    def __len__(self):
+        return self.n // self.batch_size if self.drop_last else -(-self.n // self.batch_size)
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        order = self.rng.permutation(self.n) if self.shuffle else np.arange(self.n)
+        for i in range(0, self.n, self.batch_size):
+            batch = order[i:i + self.batch_size]
+            if self.drop_last and len(batch) < self.batch_size:
+                break
+            yield np.sort(batch)  # ascending gathers read the buffer (or mmap) in order
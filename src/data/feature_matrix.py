@@ -0,0 +1,167 @@
+# src/data/feature_matrix.py
+"""Cross-sectional feature engine: the same features as feature_pipeline, computed for a whole
+universe at once on a dates x symbols float64 close matrix with column-wise NumPy kernels.
+
+Symbols list on different dates and skip days the others trade, so the wide matrix is ragged.
+Before computing, each column's observed values are packed to the bottom of a dense matrix
+(`pack_columns`); lags and rolling windows then count *bars of that symbol*, exactly like the
+per-symbol pandas pipeline, and results are scattered back to the original cells.
+"""
+from __future__ import annotations
+from typing import Dict, List, Mapping, Tuple
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .feature_pipeline import FEATURE_COLS
+
+def close_matrix(bars: Mapping[str, pd.DataFrame], price_col: str = "close") -> Tuple[pd.DatetimeIndex, List[str], np.ndarray]:
+    """Lay out per-symbol closes as a [dates, symbols] float64 matrix (NaN where a symbol has no bar)."""
+    symbols = [s for s, df in bars.items() if df is not None and not df.empty]
+    if not symbols:
+        return pd.DatetimeIndex([]), [], np.zeros((0, 0))
+    tz = bars[symbols[0]].index.tz
+    stamps = [bars[s].index.as_unit("ns").asi8 for s in symbols]
+    keys = np.unique(np.concatenate(stamps))
+    M = np.full((len(keys), len(symbols)), np.nan)
+    for j, s in enumerate(symbols):
+        M[np.searchsorted(keys, stamps[j]), j] = bars[s][price_col].to_numpy(dtype=float)
+    index = pd.DatetimeIndex(keys.view("datetime64[ns]"))
+    if tz is not None:
+        index = index.tz_localize("UTC").tz_convert(tz)
+    return index, symbols, M
+
+def pack_columns(M: np.ndarray) -> Tuple[np.ndarray, Tuple[np.ndarray, np.ndarray], Tuple[np.ndarray, np.ndarray]]:
+    """Move each column's non-NaN cells to the bottom rows of a dense [max_count, S] matrix,
+    keeping their order. Returns (P, src, dst) with P[dst] == M[src]; cells are listed
+    symbol by symbol, in time order within each symbol."""
+    valid = ~np.isnan(M)
+    counts = valid.sum(axis=0)
+    depth = int(counts.max()) if counts.size else 0
+    rank = np.cumsum(valid, axis=0) - 1
+    cols, rows = np.nonzero(valid.T)
+    src = (rows, cols)
+    dst = (rank[src] + (depth - counts)[cols], cols)
+    P = np.full((depth, M.shape[1]), np.nan)
+    P[dst] = M[src]
+    return P, src, dst
+
+def unpack_columns(P: np.ndarray, shape: Tuple[int, int], src, dst) -> np.ndarray:
+    out = np.full(shape, np.nan)
+    out[src] = P[dst]
+    return out
+
+# ---- column-wise kernels (NaN-propagating, same semantics as pandas min_periods=window) ----
+
+def lag(x: np.ndarray, k: int) -> np.ndarray:
+    out = np.full_like(x, np.nan)
+    if k < len(x):
+        out[k:] = x[:len(x) - k]
+    return out
+
+def pct_change(x: np.ndarray, k: int) -> np.ndarray:
+    return x / lag(x, k) - 1.0
+
+def rolling_std(x: np.ndarray, w: int) -> np.ndarray:
+    """Sample std (ddof=1) over trailing windows of w rows from cumulative sums."""
+    valid = ~np.isnan(x)
+    # centre each column first; variance is shift-invariant and this keeps the sums well conditioned
+    mu = np.where(valid, x, 0.0).sum(axis=0) / np.maximum(valid.sum(axis=0), 1)
+    xc = np.where(valid, x - mu, 0.0)
+    zero = np.zeros((1, x.shape[1]))
+    c1 = np.concatenate([zero, np.cumsum(xc, axis=0)])
+    c2 = np.concatenate([zero, np.cumsum(xc * xc, axis=0)])
+    cn = np.concatenate([zero, np.cumsum(valid, axis=0)])
+    out = np.full_like(x, np.nan)
+    if len(x) >= w:
+        s1 = c1[w:] - c1[:-w]
+        s2 = c2[w:] - c2[:-w]
+        n = cn[w:] - cn[:-w]
+        var = np.maximum(s2 - s1 * s1 / w, 0.0) / (w - 1)
+        out[w - 1:] = np.where(n == w, np.sqrt(var), np.nan)
+    return out
+
+def rolling_max(x: np.ndarray, w: int) -> np.ndarray:
+    out = np.full_like(x, np.nan)
+    if len(x) >= w:
+        out[w - 1:] = sliding_window_view(x, w, axis=0).max(axis=-1)
+    return out
+
+def rolling_min(x: np.ndarray, w: int) -> np.ndarray:
+    out = np.full_like(x, np.nan)
+    if len(x) >= w:
+        out[w - 1:] = sliding_window_view(x, w, axis=0).min(axis=-1)
+    return out
+
+def ewm_mean(x: np.ndarray, alpha: float) -> np.ndarray:
+    """Column-wise `ewm(alpha=alpha, adjust=False).mean()`; starts at each column's first observation."""
+    out = np.empty_like(x)
+    prev = np.full(x.shape[1], np.nan)
+    for t in range(len(x)):
+        xt = x[t]
+        cur = np.where(np.isnan(prev), xt, (1.0 - alpha) * prev + alpha * xt)
+        prev = np.where(np.isnan(xt), prev, cur)
+        out[t] = prev
+    return out
+
+def rsi_matrix(close: np.ndarray, n: int = 14) -> np.ndarray:
+    delta = close - lag(close, 1)
+    up = ewm_mean(np.clip(delta, 0, None), 1 / n)
+    down = ewm_mean(-np.clip(delta, None, 0), 1 / n)
+    rs = up / (down + 1e-12)
+    return 100 - (100 / (1 + rs))
+
+def packed_features(P: np.ndarray) -> Dict[str, np.ndarray]:
+    """FEATURE_COLS for a packed close matrix (no interior gaps)."""
+    ret1 = pct_change(P, 1)
+    return {
+        "ret1": ret1,
+        "ret5": pct_change(P, 5),
+        "ret20": pct_change(P, 20),
+        "mom20": P / lag(P, 20) - 1.0,
+        "vol20": rolling_std(ret1, 20),
+        "vol60": rolling_std(ret1, 60),
+        "rsi14": rsi_matrix(P, 14),
+        "dd20": P / rolling_max(P, 20) - 1.0,
+    }
+
+def universe_features(M: np.ndarray) -> Dict[str, np.ndarray]:
+    """Unscaled FEATURE_COLS for every cell of a [dates, symbols] close matrix (NaN where no bar)."""
+    P, src, dst = pack_columns(M)
+    return {k: unpack_columns(v, M.shape, src, dst) for k, v in packed_features(P).items()}
+
+def _to_long(index: pd.DatetimeIndex, symbols: List[str], src, dst, keep: np.ndarray, cols: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """Long frame (timestamp index, `symbol` column) of the observed cells selected by `keep`,
+    read straight from the packed feature matrices."""
+    rows, sym_idx = src[0][keep], src[1][keep]
+    prow, pcol = dst[0][keep], dst[1][keep]
+    out = pd.DataFrame({k: v[prow, pcol] for k, v in cols.items()}, index=index[rows])
+    out["symbol"] = np.asarray(symbols, dtype=object)[sym_idx]
+    return out
+
+def engineer_universe_features(bars: Mapping[str, pd.DataFrame], horizon_bars: int = 20, price_col: str = "close") -> pd.DataFrame:
+    """Vectorized equivalent of calling `engineer_basic_features` on every symbol.
+
+    Returns a long frame indexed by bar timestamp with unscaled FEATURE_COLS and a `symbol`
+    column, containing exactly the rows the per-symbol function keeps (features and
+    `horizon_bars` label all defined).
+    """
+    index, symbols, M = close_matrix(bars, price_col=price_col)
+    if not symbols:
+        return pd.DataFrame(columns=FEATURE_COLS + ["symbol"])
+    P, src, dst = pack_columns(M)
+    feats = packed_features(P)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        y = np.log(lag(P[::-1], horizon_bars)[::-1]) - np.log(P)
+    valid = ~np.isnan(y)
+    for v in feats.values():
+        valid &= ~np.isnan(v)
+    return _to_long(index, symbols, src, dst, valid[dst], feats)
+
+def universe_features_long(bars: Mapping[str, pd.DataFrame], price_col: str = "close") -> pd.DataFrame:
+    """Unscaled FEATURE_COLS for every bar of every symbol as a long frame (timestamp index, `symbol` column)."""
+    index, symbols, M = close_matrix(bars, price_col=price_col)
+    if not symbols:
+        return pd.DataFrame(columns=FEATURE_COLS + ["symbol"])
+    P, src, dst = pack_columns(M)
+    return _to_long(index, symbols, src, dst, np.ones(len(src[0]), dtype=bool), packed_features(P))
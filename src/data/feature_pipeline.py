@@ -3,7 +3,6 @@ from __future__ import annotations
 from typing import Dict, Tuple
 import numpy as np
 import pandas as pd
-from sklearn.preprocessing import StandardScaler
 from .utils_timeseries import future_log_return
 
 def rsi(series: pd.Series, n: int = 14) -> pd.Series:
@@ -13,16 +12,10 @@ def rsi(series: pd.Series, n: int = 14) -> pd.Series:
     rs = up / (down + 1e-12)
     return 100 - (100 / (1 + rs))
 
-def engineer_basic_features(df: pd.DataFrame, horizon_bars: int = 20, price_col: str = "close") -> Tuple[np.ndarray, np.ndarray, Dict]:
-    """Compute simple technical features and a forward-return label.
-    Returns (X_scaled, y, meta)
-    - X_scaled: np.ndarray of shape [n_samples, n_features]
-    - y: np.ndarray of shape [n_samples]
-    - meta: {feature_cols, target_col, scaler_mean_, scaler_scale_}
-    """
-    if df is None or df.empty:
-        return np.zeros((0,0)), np.zeros((0,)), {"feature_cols":[], "target_col":"y", "scaler_mean_":[], "scaler_scale_":[]}
+FEATURE_COLS = ["ret1", "ret5", "ret20", "mom20", "vol20", "vol60", "rsi14", "dd20"]
 
+def basic_features(df: pd.DataFrame, price_col: str = "close") -> pd.DataFrame:
+    """Unscaled technical features (FEATURE_COLS) aligned with df.index; NaN during warm-up."""
     close = df[price_col].astype(float)
     ret1 = close.pct_change(1)
     ret5 = close.pct_change(5)
@@ -35,7 +28,7 @@ def engineer_basic_features(df: pd.DataFrame, horizon_bars: int = 20, price_col:
     lo20 = close.rolling(20).min()
     dd20 = close / hi20 - 1.0
 
-    feats = pd.DataFrame({
+    return pd.DataFrame({
         "ret1": ret1,
         "ret5": ret5,
         "ret20": ret20,
@@ -46,6 +39,19 @@ def engineer_basic_features(df: pd.DataFrame, horizon_bars: int = 20, price_col:
         "dd20": dd20,
     }, index=df.index)
 
+def engineer_basic_features(df: pd.DataFrame, horizon_bars: int = 20, price_col: str = "close") -> Tuple[np.ndarray, np.ndarray, Dict]:
+    """Compute simple technical features and a forward-return label.
+    Returns (X, y, meta)
+    - X: np.ndarray of shape [n_samples, n_features], unscaled (normalize cross-sectionally
+      downstream, see data.normalize)
+    - y: np.ndarray of shape [n_samples]
+    - meta: {feature_cols, target_col}
+    """
+    if df is None or df.empty:
+        return np.zeros((0,0)), np.zeros((0,)), {"feature_cols":[], "target_col":"y"}
+
+    feats = basic_features(df, price_col=price_col)
+
     # Label: forward log return
     y = future_log_return(df, horizon_bars=horizon_bars, price_col=price_col)
 
@@ -53,14 +59,8 @@ def engineer_basic_features(df: pd.DataFrame, horizon_bars: int = 20, price_col:
     valid = feats.dropna().index.intersection(y.dropna().index)
     feats = feats.loc[valid]
     y = y.loc[valid]
+    if feats.empty:  # history shorter than the warm-up + horizon
+        return np.zeros((0, len(FEATURE_COLS))), np.zeros((0,)), {"feature_cols":FEATURE_COLS, "target_col":"y"}
 
-    # Scale features
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(feats.values)
-    meta = {
-        "feature_cols": feats.columns.tolist(),
-        "target_col": "y",
-        "scaler_mean_": scaler.mean_.tolist(),
-        "scaler_scale_": scaler.scale_.tolist(),
-    }
-    return X_scaled, y.values.astype(float), meta
+    meta = {"feature_cols": feats.columns.tolist(), "target_col": "y"}
+    return feats.to_numpy(dtype=float), y.values.astype(float), meta
@@ -1,51 +1,189 @@
 # src/data/fetch.py
 from __future__ import annotations
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Tuple, Union
 import pandas as pd
 
-from .cache import load_cached, save_cache
-from .providers.yf import YFinanceProvider
-from .providers.alpha_vantage import AlphaVantageProvider
-from .providers.alpaca import AlpacaProvider
-from .utils_timeseries import restrict_rth, resample_ohlcv, ensure_utc_index
+from .cache import lookup, store, FULL, CacheLookup
+from .metrics import inc, timer
+from .providers.registry import default_providers
+from .providers.router import ProviderRouter
+from .utils_timeseries import restrict_rth, resample_ohlcv, ensure_utc_index, interval_to_seconds  # noqa: F401
 
-_YF = YFinanceProvider()
-_AV = AlphaVantageProvider()
-_APCA = AlpacaProvider()
+# Built on first fetch from the provider registry (default preference: Alpaca (if keys) → yfinance →
+# AlphaVantage), then reordered by observed performance
+_ROUTER: Optional[ProviderRouter] = None
+_ROUTER_LOCK = threading.Lock()
 
-def get_bars(symbol: str, start: str, end: str, interval: str, rth_only: bool) -> pd.DataFrame:
-    """Fetch OHLCV bars with provider fallback and local caching.
-    Returns a tz-aware (UTC) DataFrame with columns open/high/low/close/volume and DatetimeIndex.
-    """
-    # Try cache first
-    df = load_cached(symbol, interval, start, end)
-    if df is not None and not df.empty:
-        df = ensure_utc_index(df)
-        return df
-
-    # Try providers in order: Alpaca (if keys) → yfinance → AlphaVantage
-    for provider in (_APCA, _YF, _AV):
-        try:
-            df = provider.get_bars(symbol, start, end, interval)
-            if df is not None and not df.empty:
-                break
-        except Exception:
-            df = None
-    if df is None or df.empty:
-        return pd.DataFrame(columns=["open","high","low","close","volume"]).astype(float)
+Errors = List[Tuple[str, Exception]]
+
+class BarsResult(NamedTuple):
+    symbol: str
+    df: pd.DataFrame  # empty if nothing was found
+    error: Optional[Exception]  # set when every provider raised for a range that had no data
 
+class FetchError(RuntimeError):
+    def __init__(self, symbol: str, errors: Errors):
+        self.symbol, self.errors = symbol, errors
+        super().__init__(f"{symbol}: " + "; ".join(f"{name}: {err!r}" for name, err in errors))
+
+def _empty() -> pd.DataFrame:
+    return pd.DataFrame(columns=["open","high","low","close","volume"]).astype(float)
+
+def _normalize(df: pd.DataFrame, interval: str, rth_only: bool) -> pd.DataFrame:
     # Normalize timezone and apply optional RTH filter
     df = ensure_utc_index(df)
     if rth_only and interval in ("1min","5min","15min","1h"):
         df = restrict_rth(df)
 
-    # Resample to requested rule (idempotent if already matching)
-    rule_map = {"1min":"1min","5min":"5min","15min":"15min","1h":"1H","1d":"1D"}
-    df = resample_ohlcv(df, rule_map.get(interval, interval))
+    # Resample to requested rule (skipped when bars already match)
+    return resample_ohlcv(df, interval)
+
+def _router() -> ProviderRouter:
+    global _ROUTER
+    if _ROUTER is None:
+        with _ROUTER_LOCK:
+            if _ROUTER is None:
+                _ROUTER = ProviderRouter(default_providers())
+    return _ROUTER
+
+def _fetch_range(symbols: List[str], start: str, end: str, interval: str, rth_only: bool) -> Dict[str, Tuple[Optional[pd.DataFrame], Errors]]:
+    """Fetch one [start, end) range for a batch of symbols with provider fallback, normalize and
+    cache what came back. Providers are tried in the router's order, each asked once (with
+    retries) via get_bars_batch for the symbols the previous ones did not return.
+    Maps symbol -> (frame or None, provider errors)."""
+    out: Dict[str, Tuple[Optional[pd.DataFrame], Errors]] = {s: (None, []) for s in symbols}
+    remaining = list(symbols)
+    answered = False  # some provider responded (possibly with no bars)
+    router = _router()
+    for i, (name, provider) in enumerate(router.order()):
+        if not remaining:
+            break
+        if i:
+            inc("provider.fallbacks", len(remaining), provider=name)
+        try:
+            got = router.fetch_batch(name, provider, remaining, start, end, interval)
+        except Exception as e:
+            for s in remaining:
+                out[s][1].append((name, e))
+            continue
+        answered = True
+        for s in list(remaining):
+            df = got.get(s)
+            if isinstance(df, Exception):
+                out[s][1].append((name, df))
+                continue
+            if df is None or df.empty:
+                continue
+            with timer("fetch.normalize"):
+                df = _normalize(df, interval, rth_only)
+            inc("fetch.rows", len(df), provider=name)
+            # Merge into the cache; never let a cache write failure break the fetch
+            try:
+                store(s, interval, start, end, df, rth_only)
+            except Exception:
+                pass
+            out[s] = (df, out[s][1])
+            remaining.remove(s)
+    # No bars in the range and no provider errors: cache the empty range so it is not asked for again
+    for s in remaining if answered else []:
+        if not out[s][1]:
+            try:
+                store(s, interval, start, end, None, rth_only)
+            except Exception:
+                pass
+    return out
+
+def provider_stats() -> Dict[str, Dict]:
+    """Routing diagnostics: per-provider calls, failures, hit rate, latency and circuit state."""
+    return _router().snapshot()
 
-    # Save cache and return
+def _assemble(parts: List[pd.DataFrame], start: str, end: str) -> pd.DataFrame:
+    parts = [p for p in parts if p is not None and not p.empty]
+    if not parts:
+        return _empty()
+    df = ensure_utc_index(pd.concat(parts).sort_index()) if len(parts) > 1 else ensure_utc_index(parts[0])
+    df = df[~df.index.duplicated(keep="last")]
+    lo, hi = pd.Timestamp(start, tz="UTC"), pd.Timestamp(end, tz="UTC")
+    return df[(df.index >= lo) & (df.index < hi)]
+
+def _get_bars(symbol: str, start: str, end: str, interval: str, rth_only: bool) -> Tuple[pd.DataFrame, Optional[FetchError]]:
+    hit = lookup(symbol, interval, start, end, rth_only)
+    if hit.status == FULL:
+        return (ensure_utc_index(hit.df) if hit.df is not None else _empty()), None
+
+    parts = [hit.df]
+    errors: Errors = []
+    for gap_start, gap_end in hit.gaps:
+        df, errs = _fetch_range([symbol], gap_start, gap_end, interval, rth_only)[symbol]
+        parts.append(df)
+        errors += errs
+    df = _assemble(parts, start, end)
+    return df, (FetchError(symbol, errors) if df.empty and errors else None)
+
+def get_bars(symbol: str, start: str, end: str, interval: str, rth_only: bool) -> pd.DataFrame:
+    """Fetch OHLCV bars with provider fallback and local caching.
+    Returns a tz-aware (UTC) DataFrame with columns open/high/low/close/volume and DatetimeIndex.
+    Cached sub-ranges are served locally; only the missing gaps are requested from providers.
+    """
+    with timer("fetch.get_bars", interval=interval):
+        return _get_bars(symbol, start, end, interval, rth_only)[0]
+
+def get_bars_many(symbols: Iterable[str], start: Union[str, Mapping[str, str]], end: str, interval: str,
+                  rth_only: bool, max_workers: int = 8, batch_size: int = 100) -> Iterator[BarsResult]:
+    """Fetch bars for many symbols concurrently (at most `max_workers` requests in flight).
+
+    Cache lookups run first; symbols missing the same range are grouped and fetched with the
+    providers' batch endpoints, `batch_size` symbols per request. Yields a BarsResult per
+    symbol in completion order; `start` may be a per-symbol mapping. A symbol whose providers
+    all raised comes back with an empty frame and `error` set.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    starts = {s: (start[s] if isinstance(start, Mapping) else start) for s in symbols}
+    ex = ThreadPoolExecutor(max_workers=max(1, max_workers))
     try:
-        if len(df) > 0:
-            save_cache(symbol, interval, start, end, df)
-    except Exception:
-        pass
-    return df
+        parts: Dict[str, List[pd.DataFrame]] = {}
+        errors: Dict[str, Errors] = defaultdict(list)
+        pending: Dict[str, int] = {}
+        by_gap: Dict[Tuple[str, str], List[str]] = defaultdict(list)
+
+        lookups = {ex.submit(lookup, s, interval, starts[s], end, rth_only): s for s in symbols}
+        for fut in as_completed(lookups):
+            sym = lookups[fut]
+            try:
+                hit: CacheLookup = fut.result()
+            except Exception as e:  # unreadable cache entry
+                yield BarsResult(sym, _empty(), e)
+                continue
+            if hit.status == FULL:
+                inc("fetch.symbols", source="cache")
+                yield BarsResult(sym, ensure_utc_index(hit.df) if hit.df is not None else _empty(), None)
+                continue
+            parts[sym] = [hit.df]
+            pending[sym] = len(hit.gaps)
+            for gap in hit.gaps:
+                by_gap[gap].append(sym)
+
+        batches = {}
+        for (gap_start, gap_end), syms in by_gap.items():
+            for i in range(0, len(syms), batch_size):
+                chunk = syms[i:i + batch_size]
+                batches[ex.submit(_fetch_range, chunk, gap_start, gap_end, interval, rth_only)] = chunk
+        for fut in as_completed(batches):
+            try:
+                res = fut.result()
+            except Exception as e:  # normalization failures
+                res = {s: (None, [("fetch", e)]) for s in batches[fut]}
+            for sym, (df, errs) in res.items():
+                parts[sym].append(df)
+                errors[sym] += errs
+                pending[sym] -= 1
+                if pending[sym] == 0:
+                    df = _assemble(parts.pop(sym), starts[sym], end)
+                    err = FetchError(sym, errors[sym]) if df.empty and errors[sym] else None
+                    inc("fetch.symbols", source="error" if err is not None else "provider")
+                    yield BarsResult(sym, df, err)
+    finally:
+        ex.shutdown(wait=True, cancel_futures=True)
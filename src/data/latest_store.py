@@ -0,0 +1,54 @@
+# src/data/latest_store.py
+"""Latest feature snapshot: one row per symbol with its newest complete feature vector.
+
+    <dir>/latest.parquet   symbol, FEATURE_COLS (float32), timestamp of the bar they describe
+    <dir>/_engine.json     OnlineFeatureEngine checkpoint that `jobs.features_latest` advances
+
+Unlike Silver, which only holds rows whose label horizon has matured, the snapshot always ends at
+the last ingested bar. It is a single small file, so a scoring run reads it in milliseconds
+instead of recomputing features from Bronze.
+"""
+from __future__ import annotations
+import pathlib
+from typing import Iterable, List, Optional, Sequence
+import pandas as pd
+
+from .feature_pipeline import FEATURE_COLS
+from .normalize import normalize_panel
+from .online_features import OnlineFeatureEngine
+from .storage import read_parquet, write_parquet
+
+LATEST_FILE = "latest.parquet"
+ENGINE_FILE = "_engine.json"
+
+def latest_frame(engine: OnlineFeatureEngine, symbols: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """Snapshot rows (symbol, FEATURE_COLS, timestamp) of the symbols with every feature defined."""
+    df = engine.latest(symbols).dropna(subset=FEATURE_COLS)
+    return df.reset_index()
+
+def write_latest(df: pd.DataFrame, out_dir: pathlib.Path) -> pathlib.Path:
+    path = pathlib.Path(out_dir) / LATEST_FILE
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    write_parquet(df, tmp)
+    tmp.replace(path)
+    return path
+
+def read_latest(out_dir: pathlib.Path, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    path = pathlib.Path(out_dir) / LATEST_FILE
+    if not path.exists():
+        raise FileNotFoundError(f"no feature snapshot in {out_dir} (run jobs.features_latest)")
+    return read_parquet(path, columns=columns)
+
+def scoring_input(latest: pd.DataFrame, methods: Sequence[str] = ("zscore", "rank"), max_age_days: int = 0) -> pd.DataFrame:
+    """Today's cross-section, normalized like the training panel (same column names and order as its
+    export): symbols whose snapshot is at most `max_age_days` older than the newest one, indexed by symbol."""
+    if "expanding" in methods:
+        raise ValueError("expanding normalization needs the panel history; use zscore and/or rank")
+    ts = pd.to_datetime(latest["timestamp"])
+    as_of = ts.max()
+    cur = latest.loc[ts >= as_of - pd.Timedelta(days=max_age_days), ["symbol"] + FEATURE_COLS]
+    out, cols = normalize_panel(cur.assign(date=as_of.normalize()), list(methods))
+    out = out.set_index(out["symbol"].astype(str))[cols]
+    out.attrs["as_of"] = as_of
+    return out
@@ -1,20 +1,25 @@
 # src/data/make_dataset.py
 import argparse
+import heapq
 import json
 import os
-from typing import List
+import shutil
+import tempfile
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 from dotenv import load_dotenv
 
 import numpy as np
 import pandas as pd
 
-from .feature_pipeline import engineer_basic_features
-from .utils_timeseries import resample_ohlcv
-from .fetch import get_bars  # unified fetch: cache → Alpaca → yfinance → Alpha Vantage
+from .feature_pipeline import basic_features
+from .multiscale import aggregate_many, asof_join
+from .utils_timeseries import interval_to_seconds
+from .fetch import get_bars_many  # unified fetch: cache → Alpaca → yfinance → Alpha Vantage
+from .npy_stream import NpyAppender
+from .parallel import chunked
 
-# Load variables from .env into os.environ (optional convenience)
-load_dotenv()
+STREAM_FETCH_SYMBOLS = 100  # symbols fetched at a time in --stream mode (bounds raw bars in memory)
 
 def parse_csv_list(s: str) -> List[str]:
     return [x.strip() for x in s.split(",") if x.strip()]
@@ -22,16 +27,175 @@ def parse_csv_list(s: str) -> List[str]:
 def future_log_return(df: pd.DataFrame, horizon_bars: int, price_col: str = "close") -> pd.Series:
     return (np.log(df[price_col].shift(-horizon_bars)) - np.log(df[price_col]))
 
-def interval_to_seconds(interval: str) -> int:
-    return {
-        "1min": 60,
-        "5min": 300,
-        "15min": 900,
-        "1h": 3600,
-        "1d": 86400,
-    }[interval]
+def epoch_seconds(index: pd.DatetimeIndex) -> np.ndarray:
+    """UTC epoch seconds of a DatetimeIndex, whatever its resolution (ns, us, ...)."""
+    return index.as_unit("ns").asi8 // 1_000_000_000
+
+def symbol_rows(df: pd.DataFrame, base_interval: str, agg_intervals: List[str], horizons: List[int]) -> pd.DataFrame:
+    """Multi-scale features (columns `name@scale`, sorted) and `y_{h}` labels for one symbol's bars.
+
+    Coarser scales are aggregated in one pass (`multiscale.aggregate_many`) and joined back as of
+    each base bar's close, so every base row carries the latest *completed* bucket of every scale.
+    """
+    df = df.sort_index()
+    base_feats = basic_features(df)
+    feats = [base_feats.add_suffix("@base")]
+    coarser = [r for r in agg_intervals if r != base_interval]
+    for rule in agg_intervals:
+        if rule == base_interval:
+            feats.append(base_feats.add_suffix(f"@{rule}"))
+    bar_ns = interval_to_seconds(base_interval) * 1_000_000_000
+    for rule, b in aggregate_many(df, coarser).items():
+        feats.append(asof_join(basic_features(b.bars), b.complete_ns, df.index, bar_ns).add_suffix(f"@{rule}"))
+    feat_df = pd.concat(feats, axis=1).dropna()
+    # Keep column order stable:
+    feat_df = feat_df[sorted(feat_df.columns)]
+
+    # Create labels on base interval (future log returns)
+    label_df = pd.DataFrame(index=feat_df.index)
+    for h in horizons:
+        label_df[f"y_{h}"] = future_log_return(df.reindex(feat_df.index), h)
+    label_df = label_df.dropna()
+
+    return feat_df.join(label_df, how="inner")
+
+def merge_by_time(t_run: np.ndarray, runs: List[Tuple[int, int]], block_rows: int) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """k-way merge of time-sorted runs (`(first row, rows)` slices of `t_run`) into global time order,
+    ties in run order. Yields (row in t_run, run number) arrays for the next rows. Each run buffers
+    at most `block_rows` unread times, so memory is bounded by `block_rows * len(runs)`.
+
+    The smallest last buffered key (time, run) among runs with rows still on disk bounds every row
+    not yet read, so all buffered rows up to it are emitted in one step; a heap of run heads picks
+    the runs that have any. Runs that emitted are topped up from their memmap before the next step.
+    """
+    inf = np.iinfo(np.int64).max
+    bufs: List[np.ndarray] = [np.zeros(0, dtype=np.int64)] * len(runs)
+    loaded = [0] * len(runs)  # rows of each run read so far
+    last = np.full(len(runs), inf, dtype=np.int64)  # last buffered time of runs with rows on disk
+    heads: List[Tuple[int, int]] = []
+
+    def top_up(r: int, rest: np.ndarray) -> None:
+        first, n = runs[r]
+        take = min(block_rows - len(rest), n - loaded[r])
+        if take > 0:
+            new = np.asarray(t_run[first + loaded[r]:first + loaded[r] + take])
+            rest = np.concatenate([rest, new]) if len(rest) else new
+            loaded[r] += take
+        bufs[r] = rest
+        last[r] = rest[-1] if loaded[r] < n else inf
+        if len(rest):
+            heapq.heappush(heads, (int(rest[0]), r))
+
+    for r in range(len(runs)):
+        top_up(r, bufs[r])
+    while heads:
+        rb = int(np.argmin(last))  # first minimum: ties go to the earlier run
+        bound = (int(last[rb]), rb) if last[rb] < inf else (inf, len(runs))
+        rows, ranks, times, touched = [], [], [], []
+        while heads and heads[0] <= bound:
+            _, r = heapq.heappop(heads)
+            b = bufs[r]
+            j = int(np.searchsorted(b, bound[0], side="right" if r <= bound[1] else "left"))
+            first = runs[r][0] + loaded[r] - len(b)  # t_run row of b[0]
+            rows.append(np.arange(first, first + j))
+            ranks.append(np.full(j, r, dtype=np.int64))
+            times.append(b[:j])
+            touched.append((r, b[j:]))
+        for r, rest in touched:
+            top_up(r, rest)
+        rows, ranks, times = np.concatenate(rows), np.concatenate(ranks), np.concatenate(times)
+        o = np.lexsort((ranks, times))
+        yield rows[o], ranks[o]
+
+def stream_dataset(results: Iterable[Tuple[str, pd.DataFrame]], symbols: List[str], sym2id: Dict[str, int],
+                   out_features: str, out_labels: str, out_symbol_ids: str, out_times: str,
+                   order: str = "time", chunk_rows: int = 1 << 20) -> Optional[Dict]:
+    """Write X/y/symbol_ids/times without holding the dataset in memory.
+
+    Each symbol's rows are appended to temporary .npy runs as soon as they are computed. The
+    runs are then copied to the outputs about `chunk_rows` at a time, either grouped by symbol (in
+    `symbols` order) or merged by time with `merge_by_time` (ties keep `symbols` order). Each run
+    is already in time order, so the merge reads fixed-size blocks of every run and never builds
+    an index over all rows. Returns the column lists and timestamp summaries (None if no rows).
+    """
+    tmp = tempfile.mkdtemp(prefix=".make_dataset-", dir=os.path.dirname(os.path.abspath(out_features)))
+    try:
+        runs: Dict[str, Tuple[int, int]] = {}  # symbol -> (first row in the runs, rows)
+        per_symbol_max_ts: Dict[str, int] = {}
+        feature_cols = target_cols = None
+        apps: Dict[str, NpyAppender] = {}
+        for sym, rows in results:
+            if rows.empty:
+                continue
+            if feature_cols is None:
+                feature_cols = [c for c in rows.columns if "@" in c and not c.startswith("y_")]
+                target_cols = [c for c in rows.columns if c.startswith("y_")]
+                apps = {"X": NpyAppender(os.path.join(tmp, "X.npy"), np.float32, (len(feature_cols),)),
+                        "y": NpyAppender(os.path.join(tmp, "y.npy"), np.float32),
+                        "t": NpyAppender(os.path.join(tmp, "t.npy"), np.int64)}
+            t = epoch_seconds(rows.index)
+            runs[sym] = (apps["X"].rows, len(rows))
+            per_symbol_max_ts[sym] = int(t.max())
+            apps["X"].append(rows[feature_cols].to_numpy(dtype=np.float32))
+            apps["y"].append(rows[target_cols[0]].to_numpy(dtype=np.float32))
+            apps["t"].append(t)
+        if not runs:
+            return None
+        for a in apps.values():
+            a.close()
+        X_run, y_run, t_run = (np.load(os.path.join(tmp, f"{n}.npy"), mmap_mode="r") for n in ("X", "y", "t"))
+
+        ordered = [s for s in symbols if s in runs]
+        run_sids = np.array([sym2id[s] for s in ordered], dtype=np.int32)
+        n_rows = sum(runs[s][1] for s in ordered)
+
+        with NpyAppender(out_features, np.float32, (len(feature_cols),)) as ax, \
+             NpyAppender(out_labels, np.float32) as ay, \
+             NpyAppender(out_symbol_ids, np.int32) as asym, \
+             NpyAppender(out_times, np.int64) as at:
+
+            def write(rows: np.ndarray, ranks: np.ndarray) -> None:
+                o = np.argsort(rows, kind="stable")  # read each run front to back
+                inv = np.empty_like(o)
+                inv[o] = np.arange(len(o))
+                hit = rows[o]
+                ax.append(X_run[hit][inv])
+                ay.append(y_run[hit][inv])
+                at.append(t_run[hit][inv])
+                asym.append(run_sids[ranks])
+
+            if order == "time":
+                pending, n_pending = [], 0
+                for rows, ranks in merge_by_time(t_run, [runs[s] for s in ordered], max(1, chunk_rows // len(ordered))):
+                    pending.append((rows, ranks))
+                    n_pending += len(rows)
+                    if n_pending >= chunk_rows:
+                        write(*(np.concatenate(a) for a in zip(*pending)))
+                        pending, n_pending = [], 0
+                if pending:
+                    write(*(np.concatenate(a) for a in zip(*pending)))
+            else:
+                for r, s in enumerate(ordered):
+                    first, n = runs[s]
+                    for i in range(first, first + n, chunk_rows):
+                        j = min(i + chunk_rows, first + n)
+                        ax.append(X_run[i:j])
+                        ay.append(y_run[i:j])
+                        at.append(t_run[i:j])
+                        asym.append(np.full(j - i, run_sids[r], dtype=np.int32))
+        return {
+            "feature_cols": feature_cols,
+            "target_cols": target_cols,
+            "rows": int(n_rows),
+            "global_max_ts": max(per_symbol_max_ts.values()),
+            "per_symbol_max_ts": dict(sorted(per_symbol_max_ts.items())),
+        }
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
 
 def main():
+    # Load variables from .env into os.environ (optional convenience)
+    load_dotenv()
     ap = argparse.ArgumentParser(description="Build features/labels from market data (prefers Alpaca).")
     ap.add_argument("--symbols", required=True, help="Comma-separated, e.g., AAPL,MSFT,SPY")
     ap.add_argument("--start", required=True, help="UTC ISO date (e.g., 2024-01-01)")
@@ -40,11 +204,16 @@ def main():
     ap.add_argument("--agg-intervals", default="15min,1h", help="e.g., 15min,1h")
     ap.add_argument("--label-horizons", default="4,8", help="Horizon in bars at BASE interval (e.g., 4=1h if base=15m)")
     ap.add_argument("--rth-only", action="store_true")
+    ap.add_argument("--workers", type=int, default=8, help="Concurrent symbol fetches")
     ap.add_argument("--out-features", required=True)
     ap.add_argument("--out-labels", required=True)
     ap.add_argument("--out-symbol-ids", required=True)     # per-row symbol ids
     ap.add_argument("--out-times", required=True)          # NEW: per-row UTC epoch seconds
     ap.add_argument("--out-meta", required=True)
+    ap.add_argument("--stream", action="store_true",
+                    help="Write rows to disk as each symbol finishes (bounded memory for large universes)")
+    ap.add_argument("--row-order", default="time", choices=["time", "symbol"],
+                    help="Output rows merged by time (default) or grouped by symbol")
     args = ap.parse_args()
 
     symbols = parse_csv_list(args.symbols)
@@ -59,79 +228,67 @@ def main():
     # Stable symbol→id mapping based on the order provided
     sym2id = {sym: i for i, sym in enumerate(symbols)}
 
-    all_rows = []
-    for sym in symbols:
-        print(f"[{sym}] fetching {args.base_interval} (cache → Alpaca → yfinance → AlphaVantage)...")
-        df = get_bars(sym, args.start, args.end, args.base_interval, rth_only=args.rth_only)
-        if df.empty:
-            print(f"[{sym}] no data.")
-            continue
-
-        # Build multi-scale frames (base + agg)
-        frames = {"base": df}
-        for rule in agg_intervals:
-            if rule == args.base_interval:
-                frames[rule] = df.copy()
-            else:
-                frames[rule] = resample_ohlcv(df, rule)
-
-        # Engineer features per interval, suffix columns by scale, align on base index
-        feats = []
-        for k, fdf in frames.items():
-            fe = engineer_basic_features(fdf)[
-                ["open", "high", "low", "close", "volume", "ret_1", "logret_1", "rv_15", "rv_60", "rsi_14", "vol_z"]
-            ].add_suffix(f"@{k}")
-            feats.append(fe)
-        base_idx = frames["base"].index
-        feat_df = pd.concat([fe.reindex(base_idx) for fe in feats], axis=1).dropna()
-        # Keep column order stable:
-        feat_df = feat_df[sorted(feat_df.columns)]
-
-        # Create labels on base interval (future log returns)
-        label_df = pd.DataFrame(index=feat_df.index)
-        for h in horizons:
-            label_df[f"y_{h}"] = future_log_return(frames["base"].reindex(feat_df.index), h)
-        label_df = label_df.dropna()
-
-        combined = feat_df.join(label_df, how="inner")
-        combined["symbol"] = sym  # keep symbol to derive symbol_ids later
-        all_rows.append(combined)
-
-    if not all_rows:
-        raise SystemExit("No data collected—check keys/symbols/date range.")
-
-    # Concatenate all symbols; rows are time-aligned within each symbol and then combined
-    data = pd.concat(all_rows).sort_index()
-
-    # Select features and pick the first horizon as main y (you can later train multi-target)
-    feature_cols = [c for c in data.columns if "@" in c and not c.startswith("y_")]
-    target_cols = [c for c in data.columns if c.startswith("y_")]
-
-    X = data[feature_cols].to_numpy(dtype="float32")
-    y = data[target_cols[0]].to_numpy(dtype="float32")
-    symbol_ids = data["symbol"].map(sym2id).to_numpy(dtype=np.int32)
-
-    # Per-row timestamps (UTC epoch seconds) aligned to X/y rows
-    # Use int64 seconds to be robust; index is tz-aware UTC from providers.
-    row_times = (data.index.astype("int64") // 1_000_000_000).astype("int64")
-
-    # Compute summary ts for delta filtering
-    global_max_ts = int(row_times.max()) if len(row_times) else None
-    per_symbol_max_ts = (
-        data["symbol"]
-        .groupby(data["symbol"])
-        .apply(lambda s: int((data.loc[s.index].index.astype("int64").max() // 1_000_000_000)))
-        .to_dict()
-    )
+    def symbol_frames(batch: List[str]) -> Iterator[Tuple[str, pd.DataFrame]]:
+        for sym, df, err in get_bars_many(batch, args.start, args.end, args.base_interval, args.rth_only,
+                                          max_workers=args.workers):
+            if err is not None:
+                print(f"[{sym}] fetch failed: {err}")
+                continue
+            if df.empty:
+                print(f"[{sym}] no data.")
+                continue
+            yield sym, symbol_rows(df, args.base_interval, agg_intervals, horizons)
 
-    bar_seconds = interval_to_seconds(args.base_interval)
+    print(f"Fetching {len(symbols)} symbols @ {args.base_interval} (cache → Alpaca → yfinance → AlphaVantage)...")
+    os.makedirs(os.path.dirname(args.out_features) or ".", exist_ok=True)
+    if args.stream:
+        # Fetch a block of symbols at a time so raw bars never pile up for the whole universe
+        results = (r for batch in chunked(symbols, STREAM_FETCH_SYMBOLS) for r in symbol_frames(batch))
+        summary = stream_dataset(results, symbols, sym2id, args.out_features, args.out_labels,
+                                 args.out_symbol_ids, args.out_times, order=args.row_order)
+        if summary is None:
+            raise SystemExit("No data collected—check keys/symbols/date range.")
+        feature_cols, target_cols = summary["feature_cols"], summary["target_cols"]
+        global_max_ts, per_symbol_max_ts = summary["global_max_ts"], summary["per_symbol_max_ts"]
+    else:
+        rows_by_sym = {}
+        for sym, combined in symbol_frames(symbols):
+            combined["symbol"] = sym  # keep symbol to derive symbol_ids later
+            rows_by_sym[sym] = combined
+
+        # Results arrive in completion order; keep the provided symbol order for stable output
+        all_rows = [rows_by_sym[s] for s in symbols if s in rows_by_sym]
+
+        if not all_rows:
+            raise SystemExit("No data collected—check keys/symbols/date range.")
+
+        # Concatenate all symbols; rows are time-aligned within each symbol and then combined
+        data = pd.concat(all_rows)
+        if args.row_order == "time":
+            data = data.sort_index(kind="stable")
 
-    # Save artifacts (does not touch the provider cache)
-    os.makedirs(os.path.dirname(args.out_features), exist_ok=True)
-    np.save(args.out_features, X)
-    np.save(args.out_labels, y)
-    np.save(args.out_symbol_ids, symbol_ids)
-    np.save(args.out_times, row_times)
+        # Select features and pick the first horizon as main y (you can later train multi-target)
+        feature_cols = [c for c in data.columns if "@" in c and not c.startswith("y_")]
+        target_cols = [c for c in data.columns if c.startswith("y_")]
+
+        X = data[feature_cols].to_numpy(dtype="float32")
+        y = data[target_cols[0]].to_numpy(dtype="float32")
+        symbol_ids = data["symbol"].map(sym2id).to_numpy(dtype=np.int32)
+
+        # Per-row timestamps (UTC epoch seconds) aligned to X/y rows
+        row_times = epoch_seconds(data.index)
+
+        # Compute summary ts for delta filtering
+        global_max_ts = int(row_times.max()) if len(row_times) else None
+        per_symbol_max_ts = {str(s): int(t) for s, t in pd.Series(row_times).groupby(data["symbol"].to_numpy()).max().items()}
+
+        # Save artifacts (does not touch the provider cache)
+        np.save(args.out_features, X)
+        np.save(args.out_labels, y)
+        np.save(args.out_symbol_ids, symbol_ids)
+        np.save(args.out_times, row_times)
+
+    bar_seconds = interval_to_seconds(args.base_interval)
 
     # Write metadata (include sym2id mapping and ts summaries)
     with open(args.out_meta, "w") as f:
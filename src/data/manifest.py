@@ -0,0 +1,164 @@
+# src/data/manifest.py
+from __future__ import annotations
+import os, json, hashlib, pathlib
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, Optional
+import pandas as pd
+
+MANIFEST_FILE = "_manifest.json"
+STATE_FILE = "_state.json"
+MAX_CHANGES = 64  # change records kept per symbol; older consumers fall back to a full recompute
+
+def content_hash(df: pd.DataFrame) -> str:
+    """Stable hash of a bars table (index + values)."""
+    return hashlib.sha1(pd.util.hash_pandas_object(df, index=True).values.tobytes()).hexdigest()
+
+def first_change(old: Optional[pd.DataFrame], new: pd.DataFrame) -> Optional[pd.Timestamp]:
+    """Earliest timestamp in `new` that is absent from, or differs from, `old`. None if nothing changed."""
+    if new is None or new.empty:
+        return None
+    if old is None or old.empty:
+        return new.index.min()
+    common = new.index.intersection(old.index)
+    added = new.index.difference(old.index)
+    cols = [c for c in new.columns if c in old.columns]
+    a = new.loc[common, cols]
+    b = old.loc[common, cols]
+    diff = ~((a == b) | (a.isna() & b.isna())).all(axis=1)
+    changed = added.append(common[diff.to_numpy()])
+    return changed.min() if len(changed) else None
+
+def _iso(ts: Optional[pd.Timestamp]) -> Optional[str]:
+    return None if ts is None else pd.Timestamp(ts).isoformat()
+
+def _write_json(path: pathlib.Path, obj: Dict) -> None:
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w") as f:
+        json.dump(obj, f, indent=1)
+    os.replace(tmp, path)
+
+class BronzeManifest:
+    """Per-symbol watermarks for a Bronze table: last timestamp, row count, content hash and a
+    version that increments on every content change, with the earliest changed timestamp of
+    each change so downstream jobs can recompute only the affected trailing window.
+    """
+
+    def __init__(self, base: pathlib.Path):
+        self.path = pathlib.Path(base) / MANIFEST_FILE
+        self.entries: Dict[str, Dict] = {}
+        if self.path.exists():
+            with open(self.path) as f:
+                self.entries = json.load(f).get("symbols", {})
+
+    def get(self, sym: str) -> Optional[Dict]:
+        return self.entries.get(sym)
+
+    def record(self, sym: str, df: pd.DataFrame, changed_from: Optional[pd.Timestamp],
+               rows: Optional[int] = None, last_ts: Optional[pd.Timestamp] = None) -> bool:
+        """Record the new content of `sym`. Returns False if the content hash is unchanged.
+
+        With `rows` / `last_ts`, `df` may hold only the rewritten part of the table: its hash is
+        then chained onto the previous one instead of hashing the whole history.
+        """
+        prev = self.entries.get(sym)
+        h = content_hash(df)
+        if rows is not None:
+            h = hashlib.sha1(((prev or {}).get("hash", "") + h).encode()).hexdigest()
+        if prev is not None and prev.get("hash") == h:
+            return False
+        version = (prev or {}).get("version", 0) + 1
+        changes = (prev or {}).get("changes", []) + [[version, _iso(changed_from)]]
+        self.entries[sym] = {
+            "version": version,
+            "hash": h,
+            "rows": int(len(df) if rows is None else rows),
+            "last_ts": _iso(last_ts if last_ts is not None else df.index.max() if len(df) else None),
+            "updated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "changes": changes[-MAX_CHANGES:],
+        }
+        return True
+
+    def seed(self, symbols: Iterable[str], read: Callable[[str], Optional[pd.DataFrame]]) -> int:
+        """Record symbols without an entry (tables written before the manifest) from their full
+        content as read by `read(sym)`, and save. Returns the number of symbols recorded."""
+        n = 0
+        for sym in symbols:
+            if sym not in self.entries:
+                df = read(sym)
+                if df is not None and not df.empty:
+                    n += self.record(sym, df, None)
+        if n:
+            self.save()
+        return n
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        _write_json(self.path, {"symbols": self.entries})
+
+class ConsumerState:
+    """Bronze versions a downstream job has already processed, keyed by symbol.
+
+    `params` (e.g. the label horizon) are stored alongside; if they differ from the
+    previous run every symbol is treated as dirty.
+    """
+
+    def __init__(self, out_base: pathlib.Path, params: Optional[Dict] = None):
+        self.path = pathlib.Path(out_base) / STATE_FILE
+        self.params = params or {}
+        self.versions: Dict[str, int] = {}
+        if self.path.exists():
+            with open(self.path) as f:
+                state = json.load(f)
+            if state.get("params", {}) == self.params:
+                self.versions = state.get("symbols", {})
+
+    def pending(self, manifest: BronzeManifest, symbols: Iterable[str],
+                read: Optional[Callable[[str], Optional[pd.DataFrame]]] = None) -> Dict[str, Optional[pd.Timestamp]]:
+        """Dirty symbols mapped to the earliest changed bar timestamp (None = recompute everything).
+
+        Untracked symbols are first seeded into the manifest with `read` (see `BronzeManifest.seed`)
+        so that, once processed and marked, they are skipped until their bars change.
+        """
+        symbols = list(symbols)
+        if read is not None:
+            manifest.seed(symbols, read)
+        out: Dict[str, Optional[pd.Timestamp]] = {}
+        for sym in symbols:
+            entry = manifest.get(sym)
+            if entry is None:
+                out[sym] = None  # not tracked (pre-manifest table and no reader to seed it)
+                continue
+            seen = self.versions.get(sym)
+            if seen == entry["version"]:
+                continue
+            changes = [c for c in entry["changes"] if seen is None or c[0] > seen]
+            covered = bool(seen is not None and changes and changes[0][0] == seen + 1)
+            if not covered or any(c[1] is None for c in changes):
+                out[sym] = None
+            else:
+                out[sym] = min(pd.Timestamp(c[1]) for c in changes)
+        return out
+
+    def mark(self, sym: str, manifest: BronzeManifest) -> None:
+        entry = manifest.get(sym)
+        if entry is not None:
+            self.versions[sym] = entry["version"]
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        _write_json(self.path, {"params": self.params, "symbols": self.versions})
+
+def change_position(index: pd.DatetimeIndex, changed_from: pd.Timestamp) -> int:
+    """Position of the first bar at or after `changed_from` in a sorted index."""
+    if changed_from.tzinfo is None and index.tz is not None:
+        changed_from = changed_from.tz_localize(index.tz)
+    elif changed_from.tzinfo is not None and index.tz is None:
+        changed_from = changed_from.tz_convert("UTC").tz_localize(None)
+    return int(index.searchsorted(changed_from))
+
+def window_start(index: pd.DatetimeIndex, changed_from: Optional[pd.Timestamp], lookback: int) -> Optional[pd.Timestamp]:
+    """Timestamp `lookback` bars before `changed_from` in `index` (None = from the beginning)."""
+    if changed_from is None or len(index) == 0:
+        return None
+    pos = change_position(index, changed_from) - lookback
+    return None if pos <= 0 else index[pos]
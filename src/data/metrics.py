@@ -0,0 +1,151 @@
+# src/data/metrics.py
+"""Process-wide counters and timers for the data layer and jobs.
+
+Instrumented code calls `inc("cache.lookups", status="hit")` or wraps work in
+`with timer("partitions.write"):`; both are a dict update under a lock, so they stay on in
+production. Jobs expose `--metrics PATH` (JSON lines, or Prometheus text if PATH ends in .prom)
+and `--profile DIR` (one cProfile dump per stage) through `add_cli_args` / `stage`.
+"""
+from __future__ import annotations
+import json, os, sys, time, threading, contextlib, cProfile, pathlib
+from datetime import datetime, timezone
+from typing import Dict, Iterator, Optional, Tuple
+
+Key = Tuple[str, Tuple[Tuple[str, str], ...]]  # (name, sorted labels)
+
+_LOCK = threading.Lock()
+_COUNTERS: Dict[Key, float] = {}
+_TIMERS: Dict[Key, list] = {}  # key -> [count, total_seconds, max_seconds]
+
+def _key(name: str, labels: Dict[str, object]) -> Key:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def inc(name: str, value: float = 1, **labels) -> None:
+    k = _key(name, labels)
+    with _LOCK:
+        _COUNTERS[k] = _COUNTERS.get(k, 0) + value
+
+def observe(name: str, seconds: float, **labels) -> None:
+    k = _key(name, labels)
+    with _LOCK:
+        t = _TIMERS.get(k)
+        if t is None:
+            _TIMERS[k] = [1, seconds, seconds]
+        else:
+            t[0] += 1
+            t[1] += seconds
+            t[2] = max(t[2], seconds)
+
+@contextlib.contextmanager
+def timer(name: str, **labels) -> Iterator[None]:
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - t0, **labels)
+
+def file_size(path) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+def peak_rss_bytes() -> int:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return 0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return int(rss if sys.platform == "darwin" else rss * 1024)  # bytes on macOS, KiB on Linux
+
+def reset() -> None:
+    with _LOCK:
+        _COUNTERS.clear()
+        _TIMERS.clear()
+
+def _label_str(labels: Tuple[Tuple[str, str], ...]) -> str:
+    return ",".join(f"{k}={v}" for k, v in labels)
+
+def snapshot() -> Dict:
+    """{"counters": {"name{k=v}": value}, "timers": {"name{k=v}": {count, total_s, max_s}}, "peak_rss_bytes"}."""
+    def fmt(k: Key) -> str:
+        return f"{k[0]}{{{_label_str(k[1])}}}" if k[1] else k[0]
+    with _LOCK:
+        counters = {fmt(k): v for k, v in sorted(_COUNTERS.items())}
+        timers = {fmt(k): {"count": t[0], "total_s": round(t[1], 6), "max_s": round(t[2], 6)} for k, t in sorted(_TIMERS.items())}
+    return {"counters": counters, "timers": timers, "peak_rss_bytes": peak_rss_bytes()}
+
+def diff(before: Dict, after: Dict) -> Dict:
+    """What happened between two snapshots (counters and timer count/total; max and RSS as of `after`)."""
+    counters = {k: v - before["counters"].get(k, 0) for k, v in after["counters"].items()}
+    timers = {}
+    for k, t in after["timers"].items():
+        b = before["timers"].get(k, {"count": 0, "total_s": 0.0})
+        if t["count"] > b["count"]:
+            timers[k] = {"count": t["count"] - b["count"], "total_s": round(t["total_s"] - b["total_s"], 6), "max_s": t["max_s"]}
+    return {"counters": {k: v for k, v in counters.items() if v}, "timers": timers, "peak_rss_bytes": after["peak_rss_bytes"]}
+
+def write_jsonl(path, stage: Optional[str] = None, since: Optional[Dict] = None, **extra) -> None:
+    """Append one JSON line with the current snapshot (or only what changed `since` an earlier one)."""
+    snap = snapshot() if since is None else diff(since, snapshot())
+    rec = {"ts": datetime.now(timezone.utc).isoformat(timespec="seconds"), "stage": stage, **extra, **snap}
+    with open(path, "a") as f:
+        f.write(json.dumps(rec) + "\n")
+
+def _prom_name(name: str) -> str:
+    return "gsi_" + "".join(c if c.isalnum() else "_" for c in name)
+
+def write_prometheus(path, **const_labels) -> None:
+    """Write the current snapshot in Prometheus text exposition format (node_exporter textfile style)."""
+    def labels(ls: Tuple[Tuple[str, str], ...]) -> str:
+        items = list(const_labels.items()) + list(ls)
+        return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}" if items else ""
+    lines = []
+    with _LOCK:
+        counters, timers = dict(_COUNTERS), {k: list(v) for k, v in _TIMERS.items()}
+    for name in sorted({k[0] for k in counters}):
+        lines.append(f"# TYPE {_prom_name(name)}_total counter")
+        lines += [f"{_prom_name(name)}_total{labels(k[1])} {v}" for k, v in counters.items() if k[0] == name]
+    for name in sorted({k[0] for k in timers}):
+        base = _prom_name(name) + "_seconds"
+        lines.append(f"# TYPE {base} summary")
+        for k, (n, total, _) in timers.items():
+            if k[0] == name:
+                lines += [f"{base}_count{labels(k[1])} {n}", f"{base}_sum{labels(k[1])} {total}"]
+    lines += ["# TYPE gsi_peak_rss_bytes gauge", f"gsi_peak_rss_bytes{labels(())} {peak_rss_bytes()}"]
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp, path)
+
+def add_cli_args(ap) -> None:
+    ap.add_argument("--metrics", default=os.getenv("METRICS_FILE"), help="Write metrics: JSON lines, or Prometheus text if the path ends in .prom")
+    ap.add_argument("--profile", default=None, help="Directory for one cProfile dump per stage (<stage>.prof)")
+
+@contextlib.contextmanager
+def stage(name: str, args) -> Iterator[None]:
+    """Time a job stage, cProfile it if `args.profile` is set, and emit metrics if `args.metrics` is set:
+    a JSON line with this stage's own counters and timers, or the cumulative Prometheus file."""
+    before = snapshot()
+    prof = None
+    if getattr(args, "profile", None):
+        prof = cProfile.Profile()
+        prof.enable()
+    t0 = time.perf_counter()
+    try:
+        with timer("stage", stage=name):
+            yield
+    finally:
+        wall = time.perf_counter() - t0
+        if prof is not None:
+            prof.disable()
+            out = pathlib.Path(args.profile)
+            out.mkdir(parents=True, exist_ok=True)
+            prof.dump_stats(str(out / f"{name}.prof"))
+            print(f"[info] profile -> {out / f'{name}.prof'}")
+        path = getattr(args, "metrics", None)
+        if path:
+            if str(path).endswith(".prom"):
+                write_prometheus(path)
+            else:
+                write_jsonl(path, stage=name, since=before, wall_s=round(wall, 6))
@@ -0,0 +1,93 @@
+# src/data/multiscale.py
+"""Multi-timeframe OHLCV aggregation and point-in-time alignment back to the base bars.
+
+Coarser bars are built in one pass per scale from group-boundary indices: bucket ids come from
+integer arithmetic on the timestamps, and open/high/low/close/volume are `first`, `maximum.reduceat`,
+`minimum.reduceat`, `last` and `add.reduceat` over the sorted base arrays. Intraday buckets are
+anchored at each NYSE session's open (so "1h" buckets are 09:30-10:30, ...), and bars outside a
+session fall on the UTC grid of the rule; "1d" buckets are New York calendar days.
+
+Each bucket also gets the time at which it is complete: its start plus the rule, capped at the
+session close (the last hour of a day, or a half-day, completes at the bell). `asof_join` attaches
+a bucket's features to a base row only when the base bar closes at or after that time. Every base
+row therefore sees the latest completed bucket, never the one still forming.
+"""
+from __future__ import annotations
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from .sessions import NY_TZ, session_index, sessions_for
+
+OHLCV = ["open", "high", "low", "close", "volume"]
+_DAY = "1d"
+
+class Buckets(NamedTuple):
+    bars: pd.DataFrame  # OHLCV per bucket, indexed by bucket start
+    complete_ns: np.ndarray  # int64 UTC ns at which each bucket is complete
+
+def rule_ns(rule: str) -> int:
+    """Length of an intraday rule ("5min", "1h", ...) in nanoseconds."""
+    return int(pd.Timedelta(rule).value)
+
+def _buckets(index: pd.DatetimeIndex, rule: str) -> Tuple[np.ndarray, np.ndarray]:
+    """(bucket start, completion time) of every bar in a sorted index, int64 UTC ns."""
+    t = index.as_unit("ns").asi8
+    if len(t) == 0:
+        return t, t
+    table = sessions_for(t)
+    i = session_index(t, table)
+    in_session = i >= 0
+    close = table.close_ns[np.maximum(i, 0)]
+    if rule == _DAY:
+        local = (index if index.tz is not None else index.tz_localize("UTC")).tz_convert(NY_TZ).normalize()
+        keys = local.as_unit("ns").asi8
+        # the close for session bars, else the next New York midnight (23h/25h days around DST)
+        done = np.where(in_session, close, (local + pd.Timedelta(hours=25)).normalize().as_unit("ns").asi8)
+        return keys, done
+    step = rule_ns(rule)
+    open_ = table.open_ns[np.maximum(i, 0)]
+    keys = np.where(in_session, open_ + (t - open_) // step * step, t // step * step)
+    keys = np.maximum.accumulate(keys)  # a grid bucket can straddle the next session's open
+    return keys, np.where(in_session, np.minimum(keys + step, close), keys + step)
+
+def bucket_keys(index: pd.DatetimeIndex, rule: str) -> np.ndarray:
+    """Non-decreasing int64 bucket start (UTC ns) of every timestamp in a sorted index."""
+    return _buckets(index, rule)[0]
+
+def aggregate(df: pd.DataFrame, rule: str, cols: Optional[Dict[str, np.ndarray]] = None) -> Buckets:
+    """OHLCV bars of `rule` from sorted base bars, one reduceat pass per column."""
+    keys, done = _buckets(df.index, rule)
+    if cols is None:
+        cols = {c: df[c].to_numpy(dtype=float) for c in OHLCV}
+    if len(keys) == 0:
+        return Buckets(pd.DataFrame(columns=OHLCV, dtype=float), np.zeros(0, dtype=np.int64))
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(keys)] - 1
+    bars = pd.DataFrame({
+        "open": cols["open"][starts],
+        "high": np.maximum.reduceat(cols["high"], starts),
+        "low": np.minimum.reduceat(cols["low"], starts),
+        "close": cols["close"][ends],
+        "volume": np.add.reduceat(cols["volume"], starts),
+    }, index=pd.DatetimeIndex(keys[starts].view("datetime64[ns]")).tz_localize("UTC").tz_convert(df.index.tz or "UTC"))
+    # a bucket is complete once all of its bars are (a day with post-market bars ends at midnight)
+    return Buckets(bars, np.maximum.accumulate(np.maximum.reduceat(done, starts)))
+
+def aggregate_many(df: pd.DataFrame, rules: Iterable[str]) -> Dict[str, Buckets]:
+    """`aggregate` for several rules, sharing the column extraction."""
+    df = df.sort_index()
+    cols = {c: df[c].to_numpy(dtype=float) for c in OHLCV}
+    return {r: aggregate(df, r, cols) for r in rules}
+
+def asof_positions(complete_ns: np.ndarray, available_ns: np.ndarray) -> np.ndarray:
+    """For each base row available at `available_ns`, the last bucket complete by then (-1 if none)."""
+    return np.searchsorted(complete_ns, available_ns, side="right") - 1
+
+def asof_join(values: pd.DataFrame, complete_ns: np.ndarray, index: pd.DatetimeIndex, bar_ns: int) -> pd.DataFrame:
+    """Per-bucket `values` aligned to the base `index` (bars of length `bar_ns`, labelled by their
+    start) using only buckets completed by the time each base bar closes."""
+    pos = asof_positions(complete_ns, index.as_unit("ns").asi8 + bar_ns)
+    out = values.to_numpy(dtype=float)[np.maximum(pos, 0)] if len(values) else np.full((len(index), values.shape[1]), np.nan)
+    out[pos < 0] = np.nan
+    return pd.DataFrame(out, index=index, columns=values.columns)
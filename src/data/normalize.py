@@ -0,0 +1,196 @@
+# src/data/normalize.py
+"""Point-in-time feature normalization for the cross-sectional panel.
+
+Silver stores raw features; scaling happens after the panel join, so a row is only ever scaled
+with data available on its own date and rows within a ranking group are comparable:
+
+- `zscore`: per-date cross-sectional (x - mean) / std over the symbols present on that date
+- `rank`: per-date percentile rank in [0, 1], ties averaged
+- `expanding`: per-symbol z-score against the symbol's own panel rows up to and including that date
+
+Each is a single vectorized pass over rows sorted by group (`reduceat` / segmented `cumsum` over
+group offsets, no `groupby.apply`). NaNs stay NaN and are left out of the statistics; a zero
+spread scales by 1, like StandardScaler. `ExpandingState` carries the per-symbol running sums
+between runs, so new snapshots are normalized without reading the earlier ones.
+"""
+from __future__ import annotations
+import json, os, pathlib
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+METHODS = {"zscore": "_z", "rank": "_rank", "expanding": "_ez"}  # method -> column suffix
+EXPANDING_MIN_PERIODS = 12  # panel snapshots (a year of month-ends) before an expanding z-score is emitted
+NON_FEATURES = ("symbol", "y", "date")
+
+def group_offsets(keys: np.ndarray) -> np.ndarray:
+    """int64 row offsets [n_groups + 1] of the runs of equal keys in an already grouped array."""
+    keys = np.asarray(keys)
+    if len(keys) == 0:
+        return np.zeros(1, dtype=np.int64)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    return np.append(starts, len(keys)).astype(np.int64)
+
+def _scale(X: np.ndarray, mean: np.ndarray, var: np.ndarray) -> np.ndarray:
+    std = np.sqrt(np.maximum(var, 0.0))
+    std[~(std > 0)] = 1.0
+    return (X - mean) / std
+
+def cross_sectional_zscore(X: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """Per-group z-scores of the columns of X [n_rows, n_features] (population std)."""
+    X = np.asarray(X, dtype=np.float64)
+    if len(X) == 0:
+        return X.copy()
+    starts, sizes = offsets[:-1], np.diff(offsets)
+    ok = ~np.isnan(X)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        n = np.add.reduceat(ok, starts, axis=0)
+        mean = np.repeat(np.add.reduceat(np.where(ok, X, 0.0), starts, axis=0) / n, sizes, axis=0)
+        d = np.where(ok, X - mean, 0.0)
+        var = np.repeat(np.add.reduceat(d * d, starts, axis=0) / n, sizes, axis=0)
+        return _scale(X, mean, var)
+
+def cross_sectional_rank(X: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """Per-group percentile ranks in [0, 1] (ties averaged; 0.5 for a group of one)."""
+    X = np.asarray(X, dtype=np.float64)
+    n_rows = len(X)
+    out = np.full(X.shape, np.nan)
+    if n_rows == 0:
+        return out
+    sizes = np.diff(offsets)
+    gid = np.repeat(np.arange(len(sizes)), sizes)
+    counts = np.add.reduceat(~np.isnan(X), offsets[:-1], axis=0)
+    for j in range(X.shape[1]):
+        x = X[:, j]
+        order = np.lexsort((x, gid))  # by group, then value; NaNs last within a group
+        xs, gs = x[order], gid[order]
+        pos = np.arange(n_rows) - offsets[gs]
+        # runs of equal values share the mean of their positions
+        new = np.r_[True, (gs[1:] != gs[:-1]) | (xs[1:] != xs[:-1])]
+        run_starts = np.flatnonzero(new)
+        avg = np.add.reduceat(pos, run_starts) / np.diff(np.r_[run_starts, n_rows])
+        denom = counts[gs, j] - 1.0
+        with np.errstate(invalid="ignore", divide="ignore"):
+            pct = np.where(denom > 0, avg[np.cumsum(new) - 1] / denom, 0.5)
+        pct[np.isnan(xs)] = np.nan
+        out[order, j] = pct
+    return out
+
+def expanding_zscore(X: np.ndarray, codes: np.ndarray, min_periods: int = EXPANDING_MIN_PERIODS,
+                     init: Optional[np.ndarray] = None) -> np.ndarray:
+    """Per-symbol z-scores against each symbol's own rows so far (rows in time order, `codes`
+    identifying the symbol); NaN until a symbol has `min_periods` observations of a column.
+    `init` [n_codes, 3, n_features] holds count / sum / sum of squares of earlier rows per code."""
+    X = np.asarray(X, dtype=np.float64)
+    if len(X) == 0:
+        return X.copy()
+    codes = np.asarray(codes)
+    order = np.argsort(codes, kind="stable")  # symbol-major, time order kept within a symbol
+    Xs, cs = X[order], codes[order]
+    offsets = group_offsets(cs)
+    ok = ~np.isnan(Xs)
+    v = np.where(ok, Xs, 0.0)
+
+    def seg_cumsum(a: np.ndarray) -> np.ndarray:
+        c = np.cumsum(a, axis=0)
+        before = np.vstack([np.zeros((1, a.shape[1])), c[offsets[1:-1] - 1]])  # running total at each segment start
+        return c - np.repeat(before, np.diff(offsets), axis=0)
+
+    n, sm, sq = seg_cumsum(ok.astype(np.float64)), seg_cumsum(v), seg_cumsum(v * v)
+    if init is not None:
+        n, sm, sq = n + init[cs, 0], sm + init[cs, 1], sq + init[cs, 2]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = sm / n
+        z = _scale(Xs, mean, sq / n - mean * mean)
+    z[n < min_periods] = np.nan
+    out = np.empty_like(z)
+    out[order] = z
+    return out
+
+class ExpandingState:
+    """Per-symbol count, sum and sum of squares of the raw feature columns over the panel rows folded
+    in so far (every month up to `through`), checkpointed as JSON."""
+
+    def __init__(self, columns: Sequence[str], through: Optional[str] = None,
+                 sums: Optional[Dict[str, np.ndarray]] = None):
+        self.columns = list(columns)
+        self.through = through
+        self.sums: Dict[str, np.ndarray] = sums or {}  # symbol -> [3, n_features]
+
+    def init_for(self, symbols: Sequence[str]) -> np.ndarray:
+        """[len(symbols), 3, n_features] running sums (zeros for unseen symbols)."""
+        zero = np.zeros((3, len(self.columns)))
+        return np.stack([self.sums.get(str(s), zero) for s in symbols]) if len(symbols) else zero[None][:0]
+
+    def update(self, rows: pd.DataFrame, through: Optional[str] = None) -> None:
+        """Fold panel rows (symbol + raw columns) into the sums."""
+        if len(rows):
+            codes, uniq = pd.factorize(rows["symbol"].astype(str))
+            X = rows[self.columns].to_numpy(dtype=np.float64)
+            ok = ~np.isnan(X)
+            v = np.where(ok, X, 0.0)
+            acc = self.init_for(uniq)
+            for i, a in enumerate((ok.astype(np.float64), v, v * v)):
+                np.add.at(acc[:, i], codes, a)
+            self.sums.update(zip(uniq, acc))
+        if through is not None:
+            self.through = through
+
+    def save(self, path: pathlib.Path) -> None:
+        tmp = pathlib.Path(path).with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump({"columns": self.columns, "through": self.through,
+                       "symbols": {s: a.tolist() for s, a in self.sums.items()}}, f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: pathlib.Path, columns: Sequence[str]) -> "ExpandingState":
+        """The checkpoint at `path`, or an empty state if there is none or it has other columns."""
+        path = pathlib.Path(path)
+        if path.exists():
+            with open(path) as f:
+                d = json.load(f)
+            if d.get("columns") == list(columns):
+                return cls(columns, d.get("through"), {s: np.asarray(a, dtype=np.float64) for s, a in d["symbols"].items()})
+        return cls(columns)
+
+def parse_methods(spec: str) -> List[str]:
+    """"zscore,rank" -> ["zscore", "rank"]; "none" or "" -> []."""
+    methods = [m.strip() for m in (spec or "").split(",") if m.strip() and m.strip() != "none"]
+    bad = [m for m in methods if m not in METHODS]
+    if bad:
+        raise ValueError(f"unknown normalization {bad}; expected any of {sorted(METHODS)} or 'none'")
+    return methods
+
+def raw_columns(columns: Iterable[str]) -> List[str]:
+    """Feature columns of a panel that are not themselves normalized copies of another column."""
+    cols = [c for c in columns if c not in NON_FEATURES]
+    derived = {f"{c}{s}" for c in cols for s in METHODS.values()}
+    return [c for c in cols if c not in derived]
+
+def normalized_columns(raw: Sequence[str], methods: Sequence[str]) -> List[str]:
+    return [f"{c}{METHODS[m]}" for m in methods for c in raw]
+
+def normalize_panel(panel: pd.DataFrame, methods: Sequence[str], min_periods: int = EXPANDING_MIN_PERIODS,
+                    state: Optional[ExpandingState] = None) -> Tuple[pd.DataFrame, List[str]]:
+    """Replace the normalized columns of a date-sorted panel with freshly computed `methods`;
+    expanding statistics continue from `state` (which is not modified) when given.
+    Returns (panel, training feature columns): the normalized columns, or the raw ones if none."""
+    raw = raw_columns(panel.columns)
+    stale = [c for c in normalized_columns(raw, list(METHODS)) if c in panel.columns]
+    panel = panel.drop(columns=stale)
+    if not methods:
+        return panel, raw
+    X = panel[raw].to_numpy(dtype=np.float64)
+    new = {}
+    for m in methods:
+        if m == "expanding":
+            codes, uniq = pd.factorize(panel["symbol"].astype(str))
+            Z = expanding_zscore(X, codes, min_periods, None if state is None else state.init_for(uniq))
+        else:
+            offsets = group_offsets(pd.to_datetime(panel["date"]).to_numpy())
+            Z = (cross_sectional_zscore if m == "zscore" else cross_sectional_rank)(X, offsets)
+        new.update({f"{c}{METHODS[m]}": Z[:, j].astype(np.float32) for j, c in enumerate(raw)})
+    cols = list(new)
+    panel = pd.concat([panel, pd.DataFrame(new, index=panel.index)], axis=1)
+    return panel, cols
@@ -0,0 +1,66 @@
+# src/data/npy_stream.py
+"""Append-only `.npy` writer for outputs whose final length is not known up front.
+
+Rows are streamed to disk right after a fixed-size header; `close()` rewrites the header with the
+real shape, so the result is a regular `.npy` that opens with `np.load(..., mmap_mode="r")`.
+Memory use is bounded by the chunks passed to `append`, not by the file.
+"""
+from __future__ import annotations
+import os, struct
+from typing import Tuple
+import numpy as np
+
+HEADER_BYTES = 128  # magic + version + length + dict, padded; 64-byte aligned like np.save
+_MAGIC = b"\x93NUMPY\x01\x00"
+
+def _header(dtype: np.dtype, shape: Tuple[int, ...]) -> bytes:
+    d = repr({"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": shape})
+    body = d.encode("latin1")
+    pad = HEADER_BYTES - len(_MAGIC) - 2 - len(body) - 1
+    if pad < 0:
+        raise ValueError(f"npy header too long for shape {shape}")
+    return _MAGIC + struct.pack("<H", HEADER_BYTES - len(_MAGIC) - 2) + body + b" " * pad + b"\n"
+
+class NpyAppender:
+    """Write a C-order array of `dtype` with rows shaped `row_shape`, one chunk at a time."""
+
+    def __init__(self, path: str, dtype, row_shape: Tuple[int, ...] = ()):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.row_shape = tuple(row_shape)
+        self.rows = 0
+        self._tmp = f"{path}.partial"
+        self._f = open(self._tmp, "wb")
+        self._f.write(_header(self.dtype, (0,) + self.row_shape))
+
+    def append(self, arr: np.ndarray) -> None:
+        arr = np.ascontiguousarray(arr, dtype=self.dtype)
+        if arr.shape[1:] != self.row_shape:
+            raise ValueError(f"{self.path}: rows shaped {arr.shape[1:]}, expected {self.row_shape}")
+        self._f.write(arr.tobytes())
+        self.rows += len(arr)
+
+    def close(self) -> int:
+        """Finalize the header and move the file into place. Returns the number of rows."""
+        if self._f.closed:
+            return self.rows
+        self._f.seek(0)
+        self._f.write(_header(self.dtype, (self.rows,) + self.row_shape))
+        self._f.close()
+        os.replace(self._tmp, self.path)
+        return self.rows
+
+    def abort(self) -> None:
+        if not self._f.closed:
+            self._f.close()
+        if os.path.exists(self._tmp):
+            os.remove(self._tmp)
+
+    def __enter__(self) -> "NpyAppender":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
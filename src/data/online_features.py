@@ -0,0 +1,182 @@
+# src/data/online_features.py
+"""Online (streaming) version of `feature_pipeline.basic_features`.
+
+Each symbol keeps a few dozen floats of state: the last 61 closes, the last 60 one-bar returns
+with running sums / sums of squares for vol20 and vol60, a monotonic deque for the 20-bar high
+and the two EWM accumulators behind RSI. Appending a bar updates all of FEATURE_COLS in O(1)
+and gives the same values as recomputing `basic_features` over the full history.
+
+State is checkpointed as JSON (closes, returns, EWM accumulators, bar count, last timestamp);
+the running sums and the deque are rebuilt from the buffers on load. `from_history` builds the
+same state from a whole close series in vectorized form, for cold starts and corrections.
+"""
+from __future__ import annotations
+import json, math, os, pathlib
+from collections import deque
+from typing import Dict, Iterable, Mapping, Optional
+import numpy as np
+import pandas as pd
+
+from .feature_pipeline import FEATURE_COLS
+
+RSI_N = 14
+_NAN = float("nan")
+
+class OnlineFeatureState:
+    """Streaming FEATURE_COLS for one symbol."""
+
+    def __init__(self):
+        self.n = 0  # bars seen
+        self.last_ts: Optional[pd.Timestamp] = None
+        self.closes: deque = deque(maxlen=61)
+        self.rets: deque = deque(maxlen=60)
+        self.sum20 = self.sq20 = self.sum60 = self.sq60 = 0.0
+        self.hi20: deque = deque()  # (bar number, close), closes strictly decreasing
+        self.up = self.down = _NAN  # RSI EWM accumulators (adjust=False)
+
+    def update(self, close: float, ts: Optional[pd.Timestamp] = None) -> Dict[str, float]:
+        """Append one bar and return its features (NaN while a window is still warming up)."""
+        close = float(close)
+        prev = self.closes[-1] if self.closes else _NAN
+        if self.closes:
+            r = close / prev - 1.0
+            if len(self.rets) >= 20:
+                old = self.rets[-20]
+                self.sum20 -= old
+                self.sq20 -= old * old
+            if len(self.rets) == 60:
+                old = self.rets[0]
+                self.sum60 -= old
+                self.sq60 -= old * old
+            self.rets.append(r)
+            self.sum20 += r
+            self.sq20 += r * r
+            self.sum60 += r
+            self.sq60 += r * r
+            # RSI: EWM of gains/losses starting at the first delta
+            a = 1.0 / RSI_N
+            gain, loss = max(close - prev, 0.0), max(prev - close, 0.0)
+            if math.isnan(self.up):
+                self.up, self.down = gain, loss
+            else:
+                self.up = (1 - a) * self.up + a * gain
+                self.down = (1 - a) * self.down + a * loss
+        self.closes.append(close)
+        self.n += 1
+        while self.hi20 and self.hi20[-1][1] <= close:
+            self.hi20.pop()
+        self.hi20.append((self.n, close))
+        while self.hi20[0][0] <= self.n - 20:
+            self.hi20.popleft()
+        if ts is not None:
+            self.last_ts = pd.Timestamp(ts)
+        return self.features()
+
+    def _lag(self, k: int) -> float:
+        return self.closes[-1 - k] if len(self.closes) > k else _NAN
+
+    @staticmethod
+    def _std(s: float, sq: float, w: int) -> float:
+        return math.sqrt(max(sq - s * s / w, 0.0) / (w - 1))
+
+    def features(self) -> Dict[str, float]:
+        """Features of the latest bar."""
+        if not self.closes:
+            return {c: _NAN for c in FEATURE_COLS}
+        c = self.closes[-1]
+        ret20 = c / self._lag(20) - 1.0
+        rsi = _NAN if math.isnan(self.up) else 100 - 100 / (1 + self.up / (self.down + 1e-12))
+        return {
+            "ret1": c / self._lag(1) - 1.0,
+            "ret5": c / self._lag(5) - 1.0,
+            "ret20": ret20,
+            "mom20": ret20,
+            "vol20": self._std(self.sum20, self.sq20, 20) if len(self.rets) >= 20 else _NAN,
+            "vol60": self._std(self.sum60, self.sq60, 60) if len(self.rets) >= 60 else _NAN,
+            "rsi14": rsi,
+            "dd20": c / self.hi20[0][1] - 1.0 if self.n >= 20 else _NAN,
+        }
+
+    def to_dict(self) -> Dict:
+        return {"n": self.n, "last_ts": None if self.last_ts is None else self.last_ts.isoformat(),
+                "closes": list(self.closes), "rets": list(self.rets), "up": self.up, "down": self.down}
+
+    @classmethod
+    def from_history(cls, close: pd.Series) -> "OnlineFeatureState":
+        """State after feeding every bar of a sorted close series, without the per-bar loop."""
+        c = close.to_numpy(dtype=float)
+        if len(c) == 0:
+            return cls()
+        d = np.diff(c)
+        up = down = _NAN
+        if len(d):  # EWM with adjust=False has the same recursion as `update`
+            up = float(pd.Series(np.maximum(d, 0.0)).ewm(alpha=1.0 / RSI_N, adjust=False).mean().iloc[-1])
+            down = float(pd.Series(np.maximum(-d, 0.0)).ewm(alpha=1.0 / RSI_N, adjust=False).mean().iloc[-1])
+        tail = c[-61:]
+        return cls.from_dict({"n": len(c), "last_ts": close.index[-1].isoformat(), "closes": tail.tolist(),
+                              "rets": (tail[1:] / tail[:-1] - 1.0).tolist(), "up": up, "down": down})
+
+    @classmethod
+    def from_dict(cls, d: Mapping) -> "OnlineFeatureState":
+        st = cls()
+        st.n = int(d["n"])
+        st.last_ts = None if d.get("last_ts") is None else pd.Timestamp(d["last_ts"])
+        st.closes.extend(float(x) for x in d["closes"])
+        st.rets.extend(float(x) for x in d["rets"])
+        st.up, st.down = float(d["up"]), float(d["down"])
+        r = np.asarray(st.rets, dtype=float)
+        st.sum60, st.sq60 = float(r.sum()), float((r * r).sum())
+        st.sum20, st.sq20 = float(r[-20:].sum()), float((r[-20:] ** 2).sum())
+        first = st.n - len(st.closes) + 1  # bar number of closes[0]
+        for i, c in enumerate(st.closes):
+            if i >= len(st.closes) - 20:
+                while st.hi20 and st.hi20[-1][1] <= c:
+                    st.hi20.pop()
+                st.hi20.append((first + i, c))
+        return st
+
+class OnlineFeatureEngine:
+    """OnlineFeatureState per symbol, with a JSON checkpoint."""
+
+    def __init__(self):
+        self.states: Dict[str, OnlineFeatureState] = {}
+
+    def update(self, symbol: str, bars: pd.DataFrame, price_col: str = "close") -> pd.DataFrame:
+        """Feed a symbol's bars (sorted by time); bars at or before the state's last timestamp are
+        skipped. Returns the features of the bars actually applied."""
+        st = self.states.setdefault(symbol, OnlineFeatureState())
+        if st.last_ts is not None and len(bars):
+            last = st.last_ts
+            if bars.index.tz is not None and last.tzinfo is None:
+                last = last.tz_localize("UTC")
+            bars = bars.loc[bars.index > last]
+        closes = bars[price_col].to_numpy(dtype=float)
+        rows = [st.update(c, ts) for c, ts in zip(closes, bars.index)]
+        return pd.DataFrame(rows, index=bars.index, columns=FEATURE_COLS)
+
+    def latest(self, symbols: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """Latest features for each symbol (index: symbol, plus the bar's timestamp)."""
+        syms = list(self.states) if symbols is None else [s for s in symbols if s in self.states]
+        rows = [dict(self.states[s].features(), timestamp=self.states[s].last_ts) for s in syms]
+        return pd.DataFrame(rows, index=pd.Index(syms, name="symbol"), columns=FEATURE_COLS + ["timestamp"])
+
+    def save(self, path: pathlib.Path) -> None:
+        path = pathlib.Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump({"symbols": {s: st.to_dict() for s, st in self.states.items()}}, f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: pathlib.Path) -> "OnlineFeatureEngine":
+        eng = cls()
+        path = pathlib.Path(path)
+        if path.exists():
+            with open(path) as f:
+                eng.states = {s: OnlineFeatureState.from_dict(d) for s, d in json.load(f)["symbols"].items()}
+        return eng
+
+    def reset(self, symbol: str) -> None:
+        """Forget a symbol (e.g. after a correction to already-applied bars); replay its history next."""
+        self.states.pop(symbol, None)
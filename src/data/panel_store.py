@@ -0,0 +1,98 @@
+# src/data/panel_store.py
+"""Training-ready export of the monthly panel: plain `.npy` arrays that open with `mmap_mode="r"`,
+so LambdaRank runs and sweep workers share the OS page cache instead of each decoding parquet.
+
+    <dir>/X.npy        float32 [n_rows, n_features], C-contiguous
+    <dir>/y.npy        float32 [n_rows]
+    <dir>/groups.npy   int64   [n_groups + 1] row offsets; group g is rows offsets[g]:offsets[g+1]
+    <dir>/dates.npy    datetime64[D] [n_groups] snapshot date of each group
+    <dir>/symbols.npy  int32   [n_rows] codes into meta["symbols"]
+    <dir>/meta.json    feature names, symbol vocabulary, shapes and dtypes (written last)
+"""
+from __future__ import annotations
+import os, json, pathlib
+from typing import Dict, List, NamedTuple, Optional
+import numpy as np
+import pandas as pd
+
+META_FILE = "meta.json"
+FORMAT_VERSION = 1
+_NON_FEATURES = ("symbol", "y", "date")
+
+class TrainingPanel(NamedTuple):
+    X: np.ndarray  # float32 [n_rows, n_features]
+    y: np.ndarray  # float32 [n_rows]
+    group_offsets: np.ndarray  # int64 [n_groups + 1]
+    dates: np.ndarray  # datetime64[D] [n_groups]
+    symbol_codes: np.ndarray  # int32 [n_rows]
+    meta: Dict
+
+    @property
+    def group_sizes(self) -> np.ndarray:
+        """Rows per group, as LightGBM's `group=` expects."""
+        return np.diff(self.group_offsets)
+
+    @property
+    def symbols(self) -> np.ndarray:
+        """Symbol of every row (materialized from the codes)."""
+        return np.asarray(self.meta["symbols"], dtype=object)[self.symbol_codes]
+
+def _save(out_dir: pathlib.Path, name: str, arr: np.ndarray) -> None:
+    tmp = out_dir / f".{name}.tmp.npy"
+    np.save(tmp, arr)
+    os.replace(tmp, out_dir / f"{name}.npy")
+
+def export_panel(panel: pd.DataFrame, out_dir: pathlib.Path, feature_cols: Optional[List[str]] = None,
+                 extra_meta: Optional[Dict] = None) -> Dict:
+    """Write a panel (rows sorted by `date`, columns features + symbol + y + date) as memory-mappable arrays.
+    Returns the meta dict."""
+    out_dir = pathlib.Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    if feature_cols is None:
+        feature_cols = [c for c in panel.columns if c not in _NON_FEATURES]
+    dates = pd.to_datetime(panel["date"]).to_numpy(dtype="datetime64[D]")
+    if len(dates) > 1 and (dates[1:] < dates[:-1]).any():
+        raise ValueError("panel rows must be sorted by date")
+
+    starts = np.flatnonzero(np.r_[True, dates[1:] != dates[:-1]]) if len(dates) else np.zeros(0, dtype=np.int64)
+    offsets = np.append(starts, len(dates)).astype(np.int64)
+    codes, vocab = pd.factorize(panel["symbol"], sort=True)
+
+    # meta.json goes last: readers treat its presence as "export complete"
+    meta_path = out_dir / META_FILE
+    if meta_path.exists():
+        meta_path.unlink()
+    _save(out_dir, "X", np.ascontiguousarray(panel[feature_cols].to_numpy(dtype=np.float32)))
+    _save(out_dir, "y", panel["y"].to_numpy(dtype=np.float32))
+    _save(out_dir, "groups", offsets)
+    _save(out_dir, "dates", dates[starts])
+    _save(out_dir, "symbols", codes.astype(np.int32))
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "feature_cols": list(feature_cols),
+        "label_col": "y",
+        "n_rows": int(len(panel)),
+        "n_features": len(feature_cols),
+        "n_groups": int(len(starts)),
+        "dtype": "float32",
+        "symbols": [str(s) for s in vocab],
+        **(extra_meta or {}),
+    }
+    tmp = out_dir / ".meta.tmp"
+    with open(tmp, "w") as f:
+        json.dump(meta, f, indent=1)
+    os.replace(tmp, meta_path)
+    return meta
+
+def load_panel(path: pathlib.Path, mmap: bool = True) -> TrainingPanel:
+    """Open an exported panel. With mmap=True (default) arrays are read-only memory maps: opening is
+    O(1) and processes reading the same export share pages."""
+    path = pathlib.Path(path)
+    meta_path = path / META_FILE
+    if not meta_path.exists():
+        raise FileNotFoundError(f"no complete panel export in {path} (missing {META_FILE})")
+    with open(meta_path) as f:
+        meta = json.load(f)
+    mode = "r" if mmap else None
+    arrays = [np.load(path / f"{n}.npy", mmap_mode=mode) for n in ("X", "y", "groups", "dates", "symbols")]
+    return TrainingPanel(*arrays, meta)
@@ -0,0 +1,33 @@
+# src/data/parallel.py
+"""Fan per-symbol work out to a process pool while the parent stays the only writer.
+
+Workers return their rows as Arrow tables (cheap to pickle, no per-object overhead) and results
+come back in submission order, so feeding them to a DatePartitionWriter produces exactly the
+same partitions as running the chunks serially.
+"""
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, TypeVar
+import pandas as pd
+import pyarrow as pa
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+def chunked(items: Sequence[T], size: int) -> List[Sequence[T]]:
+    return [items[i:i + size] for i in range(0, len(items), max(size, 1))]
+
+def map_ordered(fn: Callable[[T], R], tasks: Iterable[T], workers: int = 1) -> Iterator[R]:
+    """fn over tasks, in a pool of `workers` processes (inline when workers <= 1); results in task order."""
+    tasks = list(tasks)
+    if workers <= 1 or len(tasks) <= 1:
+        yield from map(fn, tasks)
+        return
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+        yield from pool.map(fn, tasks)
+
+def to_arrow(df: Optional[pd.DataFrame]) -> Optional[pa.Table]:
+    return None if df is None or df.empty else pa.Table.from_pandas(df)
+
+def from_arrow(table: Optional[pa.Table]) -> Optional[pd.DataFrame]:
+    return None if table is None else table.to_pandas()
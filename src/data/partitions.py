@@ -0,0 +1,143 @@
+# src/data/partitions.py
+from __future__ import annotations
+import os, shutil, tempfile, time, pathlib
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from .metrics import file_size, inc, observe
+from .storage import read_parquet, write_parquet
+
+PART_FILE = "part.parquet"
+
+def _date_keys(index: pd.DatetimeIndex) -> np.ndarray:
+    """ISO date strings (YYYY-MM-DD) for each row of a DatetimeIndex."""
+    return np.asarray(index.strftime("%Y-%m-%d"), dtype=object)
+
+class DatePartitionWriter:
+    """Buffer (date, symbol) rows for many symbols and write each `date=*` partition once.
+
+    Rows are added as DataFrames indexed by timestamp with a `symbol` column. Nothing
+    touches disk until `flush()`, which merges the buffered rows into each affected
+    `date=YYYY-MM-DD/part.parquet` with a single read and a single write per partition:
+    rows of symbols present in the buffer replace the existing rows for those symbols.
+
+    With `update=True` existing rows are updated instead of replaced: non-null buffered values
+    overwrite, and columns or cells the buffer leaves null keep their existing values (used for
+    wide label tables whose horizons mature at different times).
+
+    If `spill_rows` is set, the buffer is spilled to memory-mapped Arrow IPC files once it
+    holds that many rows, so peak memory stays bounded on very large universes.
+    """
+
+    def __init__(self, base: pathlib.Path, key: str = "symbol", spill_rows: Optional[int] = None,
+                 spill_dir: Optional[str] = None, update: bool = False):
+        self.base = pathlib.Path(base)
+        self.key = key
+        self.update = update
+        self.spill_rows = spill_rows
+        self._spill_root = spill_dir
+        self._spill_tmp: Optional[str] = None
+        self._frames: List[pd.DataFrame] = []
+        self._buffered = 0
+        # each spill: (ipc path, {date: (offset, length)})
+        self._spills: List[Tuple[str, Dict[str, Tuple[int, int]]]] = []
+        self.rows_added = 0
+
+    def add(self, df: pd.DataFrame) -> None:
+        if df is None or df.empty:
+            return
+        self._frames.append(df)
+        self._buffered += len(df)
+        self.rows_added += len(df)
+        if self.spill_rows and self._buffered >= self.spill_rows:
+            self._spill()
+
+    def _sorted_buffer(self) -> Tuple[pd.DataFrame, np.ndarray]:
+        buf = pd.concat(self._frames)
+        keys = _date_keys(buf.index)
+        order = np.argsort(keys, kind="stable")
+        return buf.iloc[order], keys[order]
+
+    def _spill(self) -> None:
+        if not self._frames:
+            return
+        if self._spill_tmp is None:
+            self._spill_tmp = tempfile.mkdtemp(prefix="partitions-", dir=self._spill_root)
+        buf, keys = self._sorted_buffer()
+        uniq, starts, counts = np.unique(keys, return_index=True, return_counts=True)
+        ranges = {str(d): (int(s), int(c)) for d, s, c in zip(uniq, starts, counts)}
+        path = os.path.join(self._spill_tmp, f"spill-{len(self._spills):05d}.arrow")
+        table = pa.Table.from_pandas(buf)
+        with pa.OSFile(path, "wb") as sink, ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        self._spills.append((path, ranges))
+        self._frames, self._buffered = [], 0
+
+    def flush(self) -> Dict:
+        """Write every buffered date partition exactly once.
+        Returns {"partitions": n_written, "rows": n_rows, "seconds": elapsed}.
+        """
+        t0 = time.perf_counter()
+        mem_ranges: Dict[str, Tuple[int, int]] = {}
+        buf = None
+        if self._frames:
+            buf, keys = self._sorted_buffer()
+            uniq, starts, counts = np.unique(keys, return_index=True, return_counts=True)
+            mem_ranges = {str(d): (int(s), int(c)) for d, s, c in zip(uniq, starts, counts)}
+        spilled = [(ipc.open_file(pa.memory_map(p, "r")).read_all(), r) for p, r in self._spills]
+
+        dates = set(mem_ranges)
+        for _, r in spilled:
+            dates.update(r)
+
+        n_parts = n_rows = 0
+        for d in sorted(dates):
+            pieces = [t.slice(*r[d]).to_pandas() for t, r in spilled if d in r]
+            if d in mem_ranges:
+                s, c = mem_ranges[d]
+                pieces.append(buf.iloc[s:s + c])
+            chunk = pd.concat(pieces) if len(pieces) > 1 else pieces[0]
+            chunk = chunk[~chunk[self.key].duplicated(keep="last")]
+            n_rows += self._write_partition(d, chunk)
+            n_parts += 1
+
+        self._frames, self._buffered = [], 0
+        self._spills = []
+        if self._spill_tmp is not None:
+            shutil.rmtree(self._spill_tmp, ignore_errors=True)
+            self._spill_tmp = None
+        elapsed = time.perf_counter() - t0
+        observe("partitions.flush", elapsed)
+        return {"partitions": n_parts, "rows": n_rows, "seconds": elapsed}
+
+    def _write_partition(self, date: str, chunk: pd.DataFrame) -> int:
+        date_dir = self.base / f"date={date}"
+        date_dir.mkdir(parents=True, exist_ok=True)
+        out_path = date_dir / PART_FILE
+        if out_path.exists():
+            inc("partitions.bytes_read", file_size(out_path))
+            exist = read_parquet(out_path)
+            if self.update:
+                chunk = self._update_rows(exist, chunk)
+            else:
+                exist = exist[~exist[self.key].isin(chunk[self.key])]
+                if not exist.empty:
+                    chunk = pd.concat([exist, chunk])
+        tmp = date_dir / f"{PART_FILE}.tmp"
+        write_parquet(chunk, tmp)
+        os.replace(tmp, out_path)  # a crash mid-write never leaves a truncated partition behind
+        inc("partitions.written")
+        inc("partitions.rows", len(chunk))
+        inc("partitions.bytes_written", file_size(out_path))
+        return len(chunk)
+
+    def _update_rows(self, exist: pd.DataFrame, chunk: pd.DataFrame) -> pd.DataFrame:
+        name = chunk.index.name or "timestamp"
+        new = chunk.rename_axis(name).reset_index().set_index(self.key)
+        old = exist.rename_axis(name).reset_index().set_index(self.key)
+        cols = list(new.columns) + [c for c in old.columns if c not in new.columns]
+        merged = new.combine_first(old)[cols].reset_index()
+        return merged.set_index(name).rename_axis(chunk.index.name)
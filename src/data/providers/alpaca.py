@@ -9,6 +9,8 @@ class AlpacaProvider(MarketDataProvider):
         self.secret = os.getenv("APCA_API_SECRET_KEY")
         self.base_url = os.getenv("APCA_API_BASE_URL", "https://paper-api.alpaca.markets")
         # NOTE: implement real Alpaca fetch if desired; stub returns empty without keys
+    def is_configured(self) -> bool:
+        return bool(self.key and self.secret)
     def get_bars(self, symbol: str, start: str, end: str, interval: str) -> pd.DataFrame:
         if not (self.key and self.secret):
             return pd.DataFrame(columns=["open","high","low","close","volume"]).astype(float)
@@ -1,9 +1,30 @@
-# src/data/providers/base.py
 from __future__ import annotations
 from abc import ABC, abstractmethod
+from typing import Dict, List, Union
 import pandas as pd
 
 class MarketDataProvider(ABC):
+    def is_configured(self) -> bool:
+        """False when the provider cannot serve requests (e.g. missing API keys); routing skips it."""
+        return True
+
     @abstractmethod
     def get_bars(self, symbol: str, start: str, end: str, interval: str) -> pd.DataFrame:
         ...
+
+    def get_bars_batch(self, symbols: List[str], start: str, end: str, interval: str) -> Dict[str, Union[pd.DataFrame, Exception]]:
+        """Bars for several symbols over the same range, keyed by symbol.
+        Symbols with no data may be left out; a symbol whose own request failed maps to the
+        exception. The default makes one `get_bars` call per symbol; providers with a
+        multi-symbol endpoint override it.
+        """
+        out: Dict[str, Union[pd.DataFrame, Exception]] = {}
+        for sym in symbols:
+            try:
+                df = self.get_bars(sym, start, end, interval)
+            except Exception as e:
+                out[sym] = e
+                continue
+            if df is not None and not df.empty:
+                out[sym] = df
+        return out
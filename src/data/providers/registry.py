@@ -0,0 +1,65 @@
+# src/data/providers/registry.py
+"""Name-based provider registry. Providers are imported and constructed on first use, so importing
+`data.fetch` does not pull in vendor SDKs (yfinance, alpaca-py, ...) until a fetch actually happens.
+
+Third-party packages can add providers through the `gsi.market_data_providers` entry-point group
+(`name = "package.module:ProviderClass"`); they are only looked up for names not registered here.
+"""
+from __future__ import annotations
+import importlib, os, threading
+from typing import Callable, Dict, List, Tuple, Union
+
+from .base import MarketDataProvider
+
+ENTRY_POINT_GROUP = "gsi.market_data_providers"
+# Default preference: Alpaca (if keys) → yfinance → AlphaVantage; override with MARKET_DATA_PROVIDERS
+DEFAULT_ORDER = ["alpaca", "yfinance", "alpha_vantage"]
+
+Factory = Union[str, Callable[[], MarketDataProvider]]  # "module:Class" (relative to this package) or a callable
+_FACTORIES: Dict[str, Factory] = {
+    "alpaca": ".alpaca:AlpacaProvider",
+    "yfinance": ".yf:YFinanceProvider",
+    "alpha_vantage": ".alpha_vantage:AlphaVantageProvider",
+    "synthetic": ".synthetic:SyntheticProvider",  # offline, deterministic (tests and benchmarks)
+}
+_INSTANCES: Dict[str, MarketDataProvider] = {}
+_LOCK = threading.Lock()
+
+def register(name: str, factory: Factory) -> None:
+    """Register (or replace) a provider by name; any cached instance is dropped."""
+    with _LOCK:
+        _FACTORIES[name] = factory
+        _INSTANCES.pop(name, None)
+
+def _resolve(name: str) -> Factory:
+    if name in _FACTORIES:
+        return _FACTORIES[name]
+    from importlib.metadata import entry_points
+    for ep in entry_points(group=ENTRY_POINT_GROUP):
+        if ep.name == name:
+            return ep.load
+    raise KeyError(f"unknown market data provider {name!r}")
+
+def _build(factory: Factory) -> MarketDataProvider:
+    if callable(factory):
+        obj = factory()
+        return obj() if isinstance(obj, type) else obj  # entry points load to the class
+    module, _, attr = factory.partition(":")
+    return getattr(importlib.import_module(module, __package__), attr)()
+
+def get_provider(name: str) -> MarketDataProvider:
+    """The shared instance of a provider, constructed on first request."""
+    with _LOCK:
+        inst = _INSTANCES.get(name)
+        if inst is None:
+            inst = _INSTANCES[name] = _build(_resolve(name))
+        return inst
+
+def provider_names() -> List[str]:
+    """Provider names in preference order (MARKET_DATA_PROVIDERS, comma-separated, or DEFAULT_ORDER)."""
+    env = os.getenv("MARKET_DATA_PROVIDERS", "")
+    names = [n.strip() for n in env.split(",") if n.strip()]
+    return names or list(DEFAULT_ORDER)
+
+def default_providers() -> List[Tuple[str, MarketDataProvider]]:
+    return [(name, get_provider(name)) for name in provider_names()]
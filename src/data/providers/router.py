@@ -0,0 +1,140 @@
+# src/data/providers/router.py
+"""Adaptive routing over market data providers.
+
+The router keeps per-provider statistics (calls, failures, share of requested symbols actually
+returned, latency EWMA) and uses them to pick the order providers are tried in: cheapest
+expected time per symbol served first, with the configured order as tie-break. Providers that
+report `is_configured() == False` are skipped, and a provider that fails `failure_threshold`
+times in a row has its circuit opened for `cooldown` seconds; afterwards one trial request
+is let through (half-open) and its outcome closes or re-opens the circuit.
+"""
+from __future__ import annotations
+import time, threading
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+import pandas as pd
+
+from .base import MarketDataProvider
+from ..metrics import inc, observe
+
+@dataclass
+class ProviderStats:
+    name: str
+    priority: int
+    calls: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    symbols_requested: int = 0
+    symbols_returned: int = 0
+    latency_ewma: Optional[float] = None  # seconds per requested symbol
+    open_until: float = 0.0
+    trial_in_flight: bool = False  # the half-open trial call has been dispatched and not recorded yet
+    last_error: Optional[str] = None
+
+    @property
+    def hit_rate(self) -> float:
+        # Laplace-smoothed share of requested symbols that came back with data
+        return (self.symbols_returned + 1) / (self.symbols_requested + 2)
+
+    @property
+    def expected_cost(self) -> float:
+        """Expected seconds per symbol actually served (0 until measured, so new providers get tried)."""
+        return (self.latency_ewma or 0.0) / self.hit_rate
+
+class CircuitOpenError(RuntimeError):
+    """The provider's circuit is open, or its half-open trial call is already taken by another caller."""
+
+class ProviderRouter:
+    def __init__(self, providers: Sequence[Tuple[str, MarketDataProvider]], failure_threshold: int = 3,
+                 cooldown: float = 300.0, retries: int = 2, backoff: float = 0.5, alpha: float = 0.2,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        self.providers = list(providers)
+        self.stats = {name: ProviderStats(name, i) for i, (name, _) in enumerate(self.providers)}
+        self.failure_threshold, self.cooldown = failure_threshold, cooldown
+        self.retries, self.backoff, self.alpha = retries, backoff, alpha
+        self._clock, self._sleep = clock, sleep
+        self._lock = threading.Lock()
+
+    def order(self) -> List[Tuple[str, MarketDataProvider]]:
+        """Providers to try, best first: configured, circuit closed (or due a half-open trial that
+        no other caller has taken yet; `fetch_batch` reserves it when it actually calls the provider)."""
+        now = self._clock()
+        with self._lock:
+            ok = [(n, p) for n, p in self.providers
+                  if self.stats[n].open_until <= now and not self.stats[n].trial_in_flight and p.is_configured()]
+            return sorted(ok, key=lambda np_: (self.stats[np_[0]].expected_cost, self.stats[np_[0]].priority))
+
+    def _dispatch(self, name: str) -> bool:
+        """Let a call through to `name`; True if it is the half-open trial (the cooldown just ended)."""
+        now = self._clock()
+        with self._lock:
+            st = self.stats[name]
+            if st.open_until > now or st.trial_in_flight:
+                raise CircuitOpenError(f"{name}: circuit open")
+            st.trial_in_flight = st.open_until > 0  # only this call reaches the provider until it is recorded
+            return st.trial_in_flight
+
+    def fetch_batch(self, name: str, provider: MarketDataProvider, symbols: List[str], start: str, end: str,
+                    interval: str) -> Dict[str, Union[pd.DataFrame, Exception]]:
+        """provider.get_bars_batch with retries and exponential backoff; raises the last error.
+        A call in which every requested symbol failed counts as a provider failure. Raises
+        CircuitOpenError without calling the provider if its circuit is open or its half-open
+        trial is already in flight."""
+        trial = self._dispatch(name)
+        for attempt in range(self.retries + 1):
+            t0 = self._clock()
+            try:
+                got = provider.get_bars_batch(symbols, start, end, interval)
+                errors = [v for v in got.values() if isinstance(v, Exception)]
+                if symbols and len(errors) == len(symbols):  # every symbol failed: the provider is down
+                    raise errors[-1]
+            except Exception as e:
+                self._record(name, len(symbols), 0, self._clock() - t0, e, trial)
+                if attempt == self.retries or self.stats[name].open_until > self._clock():
+                    raise
+                inc("provider.retries", provider=name)
+                self._sleep(self.backoff * 2 ** attempt)
+                continue
+            n_ok = sum(1 for df in got.values() if isinstance(df, pd.DataFrame) and not df.empty)
+            self._record(name, len(symbols), n_ok, self._clock() - t0, None, trial)
+            return got
+
+    def _record(self, name: str, requested: int, returned: int, elapsed: float, error: Optional[Exception],
+                trial: bool = False) -> None:
+        observe("provider.request", elapsed, provider=name)
+        inc("provider.symbols_requested", requested, provider=name)
+        inc("provider.symbols_returned", returned, provider=name)
+        if error is not None:
+            inc("provider.errors", provider=name)
+        with self._lock:
+            st = self.stats[name]
+            if trial:
+                st.trial_in_flight = False
+            st.calls += 1
+            st.symbols_requested += requested
+            st.symbols_returned += returned
+            per_symbol = elapsed / max(requested, 1)
+            st.latency_ewma = per_symbol if st.latency_ewma is None else (1 - self.alpha) * st.latency_ewma + self.alpha * per_symbol
+            if error is None:
+                st.consecutive_failures = 0
+                st.open_until = 0.0
+                return
+            st.failures += 1
+            st.consecutive_failures += 1
+            st.last_error = repr(error)
+            if st.consecutive_failures >= self.failure_threshold:
+                st.open_until = self._clock() + self.cooldown
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Per-provider stats for diagnostics, keyed by provider name."""
+        now = self._clock()
+        with self._lock:
+            out = {}
+            for name, p in self.providers:
+                st = self.stats[name]
+                d = asdict(st)
+                d.update(configured=p.is_configured(), circuit_open=st.open_until > now,
+                         hit_rate=round(st.hit_rate, 4), expected_cost=st.expected_cost)
+                d.pop("open_until")
+                out[name] = d
+        return out
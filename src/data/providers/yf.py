@@ -1,7 +1,8 @@
 # src/data/providers/yf.py
 from __future__ import annotations
+import ast, logging, re, threading
+from typing import Dict, List, Union
 import pandas as pd
-import yfinance as yf
 
 from .base import MarketDataProvider
 
@@ -12,16 +13,78 @@ _INTERVAL_MAP = {
     "1h": "60m",
     "1d": "1d",
 }
+_COLS = {"Open":"open","High":"high","Low":"low","Close":"close","Volume":"volume"}
+BATCH_SIZE = 100  # tickers per yf.download request
+_FAILED = re.compile(r"^(\[.*?\]): (.*)$", re.S)  # yf.download's "['AAA', 'BBB']: <error>" log lines
+# per-ticker failures that mean Yahoo positively has no bars in the range (anything else, e.g. a
+# rate limit or network error, is reported as an exception so the empty range is not cached)
+_NO_DATA = ("no price data found", "no data found", "data doesn't exist")
+
+def _empty() -> pd.DataFrame:
+    return pd.DataFrame(columns=["open","high","low","close","volume"]).astype(float)
+
+def _standardize(df: pd.DataFrame) -> pd.DataFrame:
+    """Single-ticker yfinance frame -> open/high/low/close/volume."""
+    # Standardize columns
+    df = df.rename(columns=_COLS)[["open","high","low","close","volume"]]
+    # Dates where the ticker did not trade come back as all-NaN rows in multi-ticker frames
+    return df.dropna(how="all")
+
+class _FailureLog(logging.Handler):
+    """Per-ticker failures that yf.download logs, instead of raising, on the current thread."""
+
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.thread = threading.get_ident()
+        self.errors: Dict[str, str] = {}
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if record.thread != self.thread:
+            return
+        m = _FAILED.match(record.getMessage().strip())
+        if m:
+            try:
+                tickers = ast.literal_eval(m.group(1))
+            except (ValueError, SyntaxError):
+                return
+            for t in tickers:
+                self.errors[str(t).upper()] = m.group(2).strip()
 
 class YFinanceProvider(MarketDataProvider):
     def get_bars(self, symbol: str, start: str, end: str, interval: str) -> pd.DataFrame:
+        return self.get_bars_batch([symbol], start, end, interval).get(symbol, _empty())
+
+    def get_bars_batch(self, symbols: List[str], start: str, end: str, interval: str) -> Dict[str, Union[pd.DataFrame, Exception]]:
+        """One yf.download per BATCH_SIZE tickers; the (ticker, field) column MultiIndex is split
+        into standard per-symbol OHLCV frames. yf.download only logs per-ticker failures; they are
+        mapped to exceptions unless Yahoo reported that the ticker has no bars in the range."""
+        import yfinance as yf  # heavy; only needed once something is actually fetched
         yf_interval = _INTERVAL_MAP.get(interval, "1d")
-        # yfinance returns naive index for daily, tz-aware for intraday; we'll normalize later
-        df = yf.download(symbol, start=start, end=end, interval=yf_interval, auto_adjust=False, progress=False)
-        if df is None or df.empty:
-            return pd.DataFrame(columns=["open","high","low","close","volume"]).astype(float)
-        # Standardize columns
-        cols = {"Open":"open","High":"high","Low":"low","Close":"close","Volume":"volume"}
-        df = df.rename(columns=cols)[["open","high","low","close","volume"]]
-        # yfinance index may be naive; keep as is, upstream will localize to UTC
-        return df
+        out: Dict[str, Union[pd.DataFrame, Exception]] = {}
+        yf_logger = logging.getLogger("yfinance")
+        for i in range(0, len(symbols), BATCH_SIZE):
+            chunk = list(symbols[i:i + BATCH_SIZE])
+            failures = _FailureLog()
+            yf_logger.addHandler(failures)
+            try:
+                # yfinance returns naive index for daily, tz-aware for intraday; we'll normalize later
+                df = yf.download(chunk, start=start, end=end, interval=yf_interval, auto_adjust=False,
+                                 group_by="ticker", progress=False, threads=True)
+            finally:
+                yf_logger.removeHandler(failures)
+            for sym in chunk:
+                err = failures.errors.get(sym.upper())
+                if err is not None and not any(k in err.lower() for k in _NO_DATA):
+                    out[sym] = RuntimeError(f"yfinance {sym}: {err}")
+            if df is None or df.empty:
+                continue
+            if isinstance(df.columns, pd.MultiIndex):
+                tickers = set(df.columns.get_level_values(0))
+                frames = {s: df[s] for s in chunk if s in tickers and s not in out}
+            else:
+                frames = {chunk[0]: df} if len(chunk) == 1 and chunk[0] not in out else {}
+            for sym, sub in frames.items():
+                sub = _standardize(sub)
+                if not sub.empty:
+                    out[sym] = sub
+        return out
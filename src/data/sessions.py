@@ -0,0 +1,126 @@
+# src/data/sessions.py
+"""NYSE regular-session calendar as int64 arrays, built once per year range and memoized.
+
+`nyse_sessions(first_year, last_year)` lists every trading date with its open and close in UTC
+nanoseconds. Weekends, exchange holidays (including Good Friday and the one-off closures) and
+13:00 early closes are applied, and DST is resolved once per date rather than once per bar. RTH
+masks and session lookups for any number of bars are then a `searchsorted` over the opens and
+one comparison against the closes.
+
+Holiday rules follow the current NYSE schedule (Juneteenth from 2022 on). Dates before 1998 are
+approximate.
+"""
+from __future__ import annotations
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import List, NamedTuple, Optional
+import numpy as np
+import pandas as pd
+
+NY_TZ = "America/New_York"
+OPEN = "09:30"
+CLOSE = "16:00"
+EARLY_CLOSE = "13:00"
+
+# Unscheduled full-day closures
+SPECIAL_CLOSURES = [
+    "2001-09-11", "2001-09-12", "2001-09-13", "2001-09-14",  # September 11
+    "2004-06-11",  # Reagan funeral
+    "2007-01-02",  # Ford funeral
+    "2012-10-29", "2012-10-30",  # Hurricane Sandy
+    "2018-12-05",  # G.H.W. Bush funeral
+    "2025-01-09",  # Carter funeral
+]
+
+class SessionTable(NamedTuple):
+    dates: np.ndarray  # datetime64[D] trading dates (New York)
+    open_ns: np.ndarray  # int64 UTC ns
+    close_ns: np.ndarray  # int64 UTC ns
+
+def _easter(year: int) -> date:
+    """Gregorian Easter Sunday (anonymous Gregorian algorithm)."""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month = (h + l - 7 * m + 114) // 31
+    return date(year, month, (h + l - 7 * m + 114) % 31 + 1)
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """n-th `weekday` (Mon=0) of a month; n=-1 for the last one."""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + (month == 12), month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+def _observed(d: date) -> date:
+    """Saturday holidays move to Friday, Sunday ones to Monday."""
+    return d - timedelta(days=1) if d.weekday() == 5 else d + timedelta(days=1) if d.weekday() == 6 else d
+
+def holidays(year: int) -> List[date]:
+    """Full-day NYSE closures in `year` (weekday dates only)."""
+    out = [
+        _nth_weekday(year, 1, 0, 3),  # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),  # Washington's Birthday
+        _easter(year) - timedelta(days=2),  # Good Friday
+        _nth_weekday(year, 5, 0, -1),  # Memorial Day
+        _observed(date(year, 7, 4)),
+        _nth_weekday(year, 9, 0, 1),  # Labor Day
+        _nth_weekday(year, 11, 3, 4),  # Thanksgiving
+        _observed(date(year, 12, 25)),
+    ]
+    if date(year, 1, 1).weekday() != 5:  # a Saturday New Year's Day is not observed on Dec 31
+        out.append(_observed(date(year, 1, 1)))
+    if year >= 2022:
+        out.append(_observed(date(year, 6, 19)))  # Juneteenth
+    out += [date.fromisoformat(d) for d in SPECIAL_CLOSURES if d.startswith(str(year))]
+    return sorted(d for d in set(out) if d.weekday() < 5)
+
+def early_closes(year: int) -> List[date]:
+    """13:00 closes: July 3 (Mon-Thu), the day after Thanksgiving, Christmas Eve (Mon-Thu)."""
+    out = [_nth_weekday(year, 11, 3, 4) + timedelta(days=1)]
+    for d in (date(year, 7, 3), date(year, 12, 24)):
+        if d.weekday() < 4:
+            out.append(d)
+    return sorted(out)
+
+def _utc_ns(days: np.ndarray, hhmm: str) -> np.ndarray:
+    h, m = (int(x) for x in hhmm.split(":"))
+    local = pd.DatetimeIndex(days + np.timedelta64(h * 60 + m, "m")).tz_localize(NY_TZ)
+    return local.as_unit("ns").asi8
+
+@lru_cache(maxsize=16)
+def nyse_sessions(first_year: int, last_year: int) -> SessionTable:
+    """Trading sessions from Jan 1 of `first_year` through Dec 31 of `last_year`."""
+    days = np.arange(np.datetime64(f"{first_year}-01-01"), np.datetime64(f"{last_year + 1}-01-01"), dtype="datetime64[D]")
+    closed = np.array([d for y in range(first_year, last_year + 1) for d in holidays(y)], dtype="datetime64[D]")
+    days = days[np.is_busday(days, holidays=closed)]
+    early = np.array([d for y in range(first_year, last_year + 1) for d in early_closes(y)], dtype="datetime64[D]")
+    close_ns = np.where(np.isin(days, early), _utc_ns(days, EARLY_CLOSE), _utc_ns(days, CLOSE))
+    return SessionTable(days, _utc_ns(days, OPEN), close_ns)
+
+def sessions_for(t_ns: np.ndarray) -> SessionTable:
+    """The memoized session table covering every timestamp in `t_ns` (UTC ns)."""
+    if len(t_ns) == 0:
+        return nyse_sessions(2000, 2000)
+    lo, hi = pd.Timestamp(int(t_ns.min())).year, pd.Timestamp(int(t_ns.max())).year
+    # one table per decade boundary keeps the cache small and the lookups cheap
+    return nyse_sessions(lo - lo % 10, hi - hi % 10 + 9)
+
+def session_index(t_ns: np.ndarray, table: Optional[SessionTable] = None) -> np.ndarray:
+    """Position in `table` of the session each timestamp falls in ([open, close)), else -1."""
+    table = sessions_for(t_ns) if table is None else table
+    i = np.searchsorted(table.open_ns, t_ns, side="right") - 1
+    ok = (i >= 0) & (t_ns < table.close_ns[np.maximum(i, 0)])
+    return np.where(ok, i, -1)
+
+def rth_mask(index: pd.DatetimeIndex) -> np.ndarray:
+    """True for bars that start inside a regular NYSE session (holidays and early closes applied)."""
+    if index.tz is None:
+        index = index.tz_localize("UTC")
+    return session_index(index.as_unit("ns").asi8) >= 0
@@ -0,0 +1,62 @@
+# src/data/storage.py
+"""Storage schema shared by the parquet tables the pipeline writes.
+
+    floating columns  float32 (tables that keep full precision, e.g. raw bars, pass float32=False)
+    symbol            dictionary<int32, string>   (pandas Categorical in memory)
+    date              date32                      (int32 days since the epoch)
+    compression       zstd, explicit row-group size
+
+`read_parquet` returns those dtypes as-is (float32, Categorical `symbol`, datetime64 `date`), so a
+table read, updated and written again keeps its schema.
+"""
+from __future__ import annotations
+import pathlib
+from typing import List, Optional
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+COMPRESSION = "zstd"
+COMPRESSION_LEVEL = 3
+ROW_GROUP_ROWS = 128 * 1024  # panel reads are whole-table or by month; date partitions fit in one group
+KEY_COLS = ("symbol",)
+DATE_COLS = ("date",)
+SYMBOL_TYPE = pa.dictionary(pa.int32(), pa.string())
+
+def compact(df: pd.DataFrame, float32: bool = True) -> pd.DataFrame:
+    """In-memory form of the storage schema: float32 floats and a Categorical `symbol`."""
+    dtypes = {}
+    for c, t in df.dtypes.items():
+        if float32 and pd.api.types.is_float_dtype(t) and t != np.float32:
+            dtypes[c] = np.float32
+        elif c in KEY_COLS and not isinstance(t, pd.CategoricalDtype):
+            dtypes[c] = "category"
+    return df.astype(dtypes) if dtypes else df
+
+def arrow_schema(schema: pa.Schema, float32: bool = True) -> pa.Schema:
+    """`schema` with the storage types applied (e.g. to read old and new files as one dataset)."""
+    for i, field in enumerate(schema):
+        t = field.type
+        if float32 and pa.types.is_floating(t):
+            t = pa.float32()
+        elif field.name in KEY_COLS:
+            t = SYMBOL_TYPE
+        elif field.name in DATE_COLS and (pa.types.is_timestamp(t) or pa.types.is_date(t)):
+            t = pa.date32()
+        if t != field.type:
+            schema = schema.set(i, field.with_type(t))
+    return schema
+
+def to_table(df: pd.DataFrame, float32: bool = True) -> pa.Table:
+    table = pa.Table.from_pandas(df)  # cast in Arrow: one pass, no per-column pandas astype
+    return table.cast(arrow_schema(table.schema, float32))
+
+def write_parquet(df: pd.DataFrame, path: pathlib.Path, float32: bool = True,
+                  row_group_size: int = ROW_GROUP_ROWS) -> None:
+    pq.write_table(to_table(df, float32), str(path), compression=COMPRESSION,
+                   compression_level=COMPRESSION_LEVEL, row_group_size=row_group_size)
+
+def read_parquet(path: pathlib.Path, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Read a table keeping the storage dtypes (date32 columns come back as datetime64)."""
+    return pq.read_table(str(path), columns=columns).to_pandas(date_as_object=False)
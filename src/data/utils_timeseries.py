@@ -3,7 +3,19 @@ from __future__ import annotations
 import numpy as np
 import pandas as pd
 
-NY_TZ = "America/New_York"
+from .sessions import NY_TZ, rth_mask
+
+OHLCV_AGG = {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}
+_DAY_NS = 86400 * 10**9
+
+def interval_to_seconds(interval: str) -> int:
+    return {
+        "1min": 60,
+        "5min": 300,
+        "15min": 900,
+        "1h": 3600,
+        "1d": 86400,
+    }[interval]
 
 def ensure_utc_index(df: pd.DataFrame) -> pd.DataFrame:
     if df is None or df.empty:
@@ -16,33 +28,41 @@ def ensure_utc_index(df: pd.DataFrame) -> pd.DataFrame:
 
 def restrict_rth(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Keep Regular Trading Hours (NYSE): 09:30–16:00 America/New_York.
+    Keep bars starting inside a regular NYSE session: [09:30, 16:00) America/New_York, or
+    [09:30, 13:00) on early-close days; weekends and exchange holidays are dropped.
     Assumes df.index is tz-aware UTC; returns filtered UTC-indexed frame.
     """
     if df is None or df.empty:
         return df
-    idx_local = df.index.tz_convert(NY_TZ)
-    start_t = pd.Timestamp("09:30", tz=NY_TZ).time()
-    end_t = pd.Timestamp("16:00", tz=NY_TZ).time()
-    mask = (idx_local.time >= start_t) & (idx_local.time <= end_t)
-    return df.loc[mask]
+    return df.loc[rth_mask(df.index)]
+
+def _pandas_rule(rule: str) -> str:
+    return {"1d": "1D"}.get(rule, rule)
+
+def on_grid(df: pd.DataFrame, rule: str) -> bool:
+    """True if resampling `df` to `rule` would return it unchanged: a strictly increasing index where
+    every bar already sits on its own bucket label, and no missing values."""
+    if len(df) < 2 or not set(OHLCV_AGG) <= set(df.columns):
+        return False
+    t = df.index.as_unit("ns").asi8
+    step = int(pd.Timedelta(_pandas_rule(rule)).value)
+    # daily buckets are labelled at UTC midnight, intraday ones from the first bar (origin="start")
+    offs = t % _DAY_NS if step == _DAY_NS else (t - t[0]) % step
+    return bool((offs == 0).all() and (np.diff(t) > 0).all() and not df[list(OHLCV_AGG)].isna().to_numpy().any())
 
 def resample_ohlcv(df: pd.DataFrame, rule: str) -> pd.DataFrame:
     """
-    Resample to a pandas rule, e.g. "15min" -> "15min", "1h" -> "1H", "1d" -> "1D".
-    Keeps OHLCV semantics.
+    Resample to a pandas rule, e.g. "15min", "1h", "1d" -> "1D". Keeps OHLCV semantics.
+    Bars already on the target grid are returned without resampling.
     """
     if df is None or df.empty:
         return df
-    # Normalize rule capitalization
-    rule_map = {"1min": "1min", "5min": "5min", "15min": "15min", "1h": "1H", "1d": "1D"}
-    r = rule_map.get(rule, rule)
-    out = (
-        df.resample(r, origin="start")
-        .agg({"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"})
-        .dropna()
-    )
-    return out
+    if on_grid(df, rule):
+        return df[list(OHLCV_AGG)]
+    r = _pandas_rule(rule)
+    # intraday buckets start at the first bar; daily ones at midnight (origin has no effect there)
+    kw = {} if pd.Timedelta(r) >= pd.Timedelta(days=1) else {"origin": "start"}
+    return df.resample(r, **kw).agg(OHLCV_AGG).dropna()
 
 def future_log_return(df: pd.DataFrame, horizon_bars: int, price_col: str = "close") -> pd.Series:
     """Log-return over 'horizon_bars' into the future: log(P_{t+h}/P_t)
@@ -1,71 +1,236 @@
 # src/jobs/build_panel_monthly.py
 from __future__ import annotations
-import argparse, sys, pathlib
+import argparse, sys, pathlib, os, json, shutil
+from typing import Dict, List, Optional
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.dataset as ds
 
 THIS_DIR = pathlib.Path(__file__).resolve().parent
 SRC_ROOT = THIS_DIR.parent
 sys.path.insert(0, str(SRC_ROOT))
 
-def month_end_dates(path: pathlib.Path) -> list:
-    # derive available dates from features_daily partitions
-    dates = []
-    for d in path.glob("date=*"):
-        try:
-            dates.append(pd.to_datetime(d.name.split("=",1)[1]))
-        except Exception:
-            pass
-    if not dates:
+from data.metrics import add_cli_args, file_size, inc, stage, timer
+from data.normalize import ExpandingState, normalize_panel, normalized_columns, parse_methods, raw_columns
+from data.panel_store import META_FILE, export_panel
+from data.storage import arrow_schema, compact, read_parquet, write_parquet
+
+PART_FILE = "part.parquet"
+INDEX_FILE = "_months.json"  # per month: snapshot date, rows, normalization
+STATE_FILE = "_expanding.json"  # ExpandingState checkpoint for --normalize expanding
+LEGACY_FILE = "panel.parquet"  # single-file panel written before month fragments
+FEAT_BASE = pathlib.Path("data/features_daily")
+LAB_BASE = pathlib.Path("data/labels_daily")
+_PARTITIONING = ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive")
+
+def partition_dates(path: pathlib.Path) -> List[str]:
+    """ISO dates of the `date=YYYY-MM-DD` partitions under path (names only, no file reads)."""
+    if not path.exists():
         return []
-    s = pd.Series(1, index=pd.DatetimeIndex(dates).normalize()).sort_index()
-    # pick last calendar day present per month
-    return s.groupby([s.index.year, s.index.month]).apply(lambda x: x.index.max()).tolist()
+    return sorted(e.name[5:] for e in os.scandir(path) if e.is_dir() and e.name.startswith("date="))
 
-def main():
-    ap = argparse.ArgumentParser(description="Join features + matured labels into a cross-sectional panel and groups for LambdaMART.")
-    ap.add_argument("--out", default="data/panel", help="Output directory")
-    args = ap.parse_args()
+def month_end_dates(path: pathlib.Path) -> Dict[str, str]:
+    """{'YYYY-MM': last partition date present in that month}."""
+    out: Dict[str, str] = {}
+    for d in partition_dates(path):
+        out[d[:7]] = d  # sorted ascending, so the last one per month wins
+    return out
+
+def read_partitions(base: pathlib.Path, dates: List[str], columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Read only the given date partitions (and columns) of a hive-partitioned table, in parallel.
+    Returns a frame with a string `date` column taken from the partition path."""
+    paths = [str(base / f"date={d}" / PART_FILE) for d in dates if (base / f"date={d}" / PART_FILE).exists()]
+    if not paths:
+        return pd.DataFrame()
+    # storage schema of the first partition, so partitions written before float32 / dictionary
+    # symbols are cast to it as they are read
+    first = ds.dataset(paths[:1], format="parquet", partitioning=_PARTITIONING, partition_base_dir=str(base))
+    dset = ds.dataset(paths, format="parquet", partitioning=_PARTITIONING, partition_base_dir=str(base),
+                      schema=arrow_schema(first.schema))
+    if columns is None:
+        # stored pandas index columns are named strings; a RangeIndex is only described (a dict)
+        index_cols = {c for c in (dset.schema.pandas_metadata or {}).get("index_columns", []) if isinstance(c, str)}
+        columns = [c for c in dset.schema.names if c not in index_cols]
+    columns = [c for c in dict.fromkeys(columns + ["date"]) if c in dset.schema.names]
+    inc("panel.partitions_read", len(paths))
+    inc("panel.bytes_read", sum(file_size(p) for p in paths))
+    return dset.to_table(columns=columns, use_threads=True).to_pandas()
+
+def month_path(out_dir: pathlib.Path, month: str) -> pathlib.Path:
+    return out_dir / f"month={month}" / PART_FILE
+
+def load_index(out_dir: pathlib.Path) -> Dict[str, Dict]:
+    """{'YYYY-MM': {"date", "rows", "normalize"}} of the month fragments in the panel."""
+    path = out_dir / INDEX_FILE
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def save_index(out_dir: pathlib.Path, index: Dict[str, Dict]) -> None:
+    tmp = out_dir / f"{INDEX_FILE}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(dict(sorted(index.items())), f, indent=1)
+    os.replace(tmp, out_dir / INDEX_FILE)
+    # rows per snapshot date, in panel row order (one snapshot per month)
+    with open(out_dir / "groups.json", "w") as f:
+        json.dump([e["rows"] for _, e in sorted(index.items())], f)
+
+def write_month(out_dir: pathlib.Path, month: str, df: pd.DataFrame) -> None:
+    path = month_path(out_dir, month)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    write_parquet(compact(df), tmp)
+    tmp.replace(path)
+    inc("panel.bytes_written", file_size(path))
+
+def read_panel(out: str = "data/panel", months: Optional[List[str]] = None,
+               columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """The panel (or some of its months) in row order, read as one pyarrow dataset."""
+    out_dir = pathlib.Path(out)
+    index = load_index(out_dir)
+    paths = [str(month_path(out_dir, m)) for m in sorted(index if months is None else months)]
+    if not paths:
+        return pd.DataFrame()
+    dset = ds.dataset(paths, format="parquet")
+    if columns is None:
+        # stored pandas index columns are named strings; a RangeIndex is only described (a dict)
+        index_cols = {c for c in (dset.schema.pandas_metadata or {}).get("index_columns", []) if isinstance(c, str)}
+        columns = [c for c in dset.schema.names if c not in index_cols]
+    inc("panel.bytes_read", sum(file_size(p) for p in paths))
+    return dset.to_table(columns=columns, use_threads=True).to_pandas(date_as_object=False)
+
+def migrate(out_dir: pathlib.Path) -> None:
+    """Split a single-file panel.parquet into month fragments (once)."""
+    legacy = out_dir / LEGACY_FILE
+    if not legacy.exists():
+        return
+    panel = read_parquet(legacy)
+    index = load_index(out_dir)
+    for month, part in panel.groupby(panel["date"].dt.strftime("%Y-%m"), sort=True):
+        write_month(out_dir, month, part)
+        index[month] = {"date": str(part["date"].iloc[0].date()), "rows": len(part), "normalize": None}
+    save_index(out_dir, index)
+    legacy.unlink()
+    print(f"[info] split {LEGACY_FILE} into {len(index)} month fragments -> {out_dir}")
 
-    feat_base = pathlib.Path("data/features_daily")
-    lab_base = pathlib.Path("data/labels_daily")
-    out_dir = pathlib.Path(args.out)
+def clear(out_dir: pathlib.Path) -> None:
+    for e in os.scandir(out_dir):
+        if e.is_dir() and e.name.startswith("month="):
+            shutil.rmtree(e.path)
+    for name in (INDEX_FILE, STATE_FILE, "groups.json"):
+        if (out_dir / name).exists():
+            (out_dir / name).unlink()
+
+def expanding_state(out_dir: pathlib.Path, raw: List[str], index: Dict[str, Dict], first: str) -> ExpandingState:
+    """Running per-symbol sums over every panel month before `first`: the checkpoint plus whatever
+    months it has not folded in yet (normally none or one)."""
+    state = ExpandingState.load(out_dir / STATE_FILE, raw)
+    if state.through is not None and state.through >= first:
+        state = ExpandingState(raw)  # an older month is being rewritten: start over
+    for m in sorted(index):
+        if m < first and (state.through is None or m > state.through):
+            state.update(read_panel(str(out_dir), [m], ["symbol"] + raw), through=m)
+    return state
+
+def write_export(panel: pd.DataFrame, train_dir: pathlib.Path, horizon: int, feature_cols: List[str]) -> None:
+    meta = export_panel(panel, train_dir, feature_cols=feature_cols, extra_meta={"horizon": horizon})
+    print(f"[ok] export X[{meta['n_rows']}x{meta['n_features']}] float32, {meta['n_groups']} groups -> {train_dir}")
+
+def run(out: str = "data/panel", horizon: int = 126, rebuild: bool = False, export: bool = False,
+        feat_base: pathlib.Path = FEAT_BASE, lab_base: pathlib.Path = LAB_BASE, normalize: str = "zscore,rank") -> Dict:
+    """Add (or replace) the month-end snapshots missing from the panel, one fragment per month, with
+    the raw Silver features normalized (`normalize`: comma-separated methods of `data.normalize`,
+    or "none"). Months already written are neither read nor rewritten. Returns stats."""
+    methods = parse_methods(normalize)
+    out_dir = pathlib.Path(out)
     out_dir.mkdir(parents=True, exist_ok=True)
+    train_dir = out_dir / "train"
+    if rebuild:
+        clear(out_dir)
+    migrate(out_dir)
 
-    dates = month_end_dates(feat_base)
-    if not dates:
+    month_ends = month_end_dates(feat_base)
+    if not month_ends:
         print("[warn] No features_daily partitions found.")
-        return
+        return {"rows": 0, "months": 0}
 
-    panel_rows = []
-    groups = []
-    for d in dates:
-        d_str = str(d.date())
-        f_path = feat_base / f"date={d_str}" / "part.parquet"
-        l_path = lab_base / f"date={d_str}" / "part.parquet"
-        if not f_path.exists() or not l_path.exists():
-            continue
-        F = pd.read_parquet(f_path)
-        L = pd.read_parquet(l_path)
-        df = F.merge(L[["symbol","y"]], on="symbol", how="inner")
-        df["date"] = pd.to_datetime(d).normalize()
-        if df.empty:
-            continue
-        groups.append(len(df))
-        panel_rows.append(df)
-
-    if not panel_rows:
+    # Months whose month-end snapshot is already in the panel are skipped; a month whose
+    # snapshot date moved (the month was still in progress last time) or that was normalized
+    # differently is replaced. Expanding z-scores of later months depend on earlier ones, so with
+    # them every month after the first replaced one is rewritten too.
+    index = load_index(out_dir)
+    todo = sorted(m for m, d in month_ends.items()
+                  if index.get(m, {}).get("date") != d or index[m].get("normalize") != methods)
+    if todo and "expanding" in methods:
+        todo = sorted(set(todo) | {m for m in index if m > todo[0] and m in month_ends})
+    if not todo:
+        print(f"[ok] panel up to date ({len(index)} months) -> {out_dir}")
+        if export and not (train_dir / META_FILE).exists():
+            panel = read_panel(out)
+            raw = raw_columns(panel.columns)
+            write_export(panel, train_dir, horizon, normalized_columns(raw, methods) or raw)
+        return {"rows": 0, "months": 0}
+
+    # Labels first (two columns): features are only read for snapshots whose label has matured
+    y_col = f"y_{horizon}"
+    L = read_partitions(lab_base, [month_ends[m] for m in todo], columns=["symbol", y_col, "y"])
+    if not L.empty:
+        if y_col not in L.columns:
+            y_col = "y"  # labels written before multi-horizon maturation
+        L = L[["date", "symbol", y_col]].rename(columns={y_col: "y"}).dropna(subset=["y"])
+    if L.empty:
         print("[warn] No overlapping features+labels dates available.")
-        return
+        return {"rows": 0, "months": 0}
+    F = read_partitions(feat_base, sorted(L["date"].unique()))
+    new = F.merge(L, on=["date", "symbol"], how="inner")
+    new = new[[c for c in new.columns if c != "date"] + ["date"]]
+    new["date"] = pd.to_datetime(new["date"]).dt.normalize()
+    new = new.sort_values("date", kind="stable", ignore_index=True)
+    if new.empty:
+        print("[warn] No overlapping features+labels dates available.")
+        return {"rows": 0, "months": 0}
+    months = new["date"].dt.strftime("%Y-%m")
+    added = sorted(months.unique())
 
-    panel = pd.concat(panel_rows, ignore_index=True)
-    panel.to_parquet(out_dir / "panel.parquet")
-    # Save groups as JSON list
-    import json
-    with open(out_dir / "groups.json","w") as f:
-        json.dump(groups, f)
+    # zscore / rank only use each date's own rows; expanding continues from the running
+    # per-symbol sums of the months before
+    raw = raw_columns(new.columns)
+    state = expanding_state(out_dir, raw, index, added[0]) if "expanding" in methods else None
+    with timer("panel.normalize"):
+        new, feature_cols = normalize_panel(new, methods, state=state)
+    for m, part in new.groupby(months, sort=True):
+        write_month(out_dir, m, part)
+        index[m] = {"date": month_ends[m], "rows": len(part), "normalize": methods}
+    save_index(out_dir, index)
+    if state is not None:
+        # the newest month may still be replaced (its snapshot date moves until the month ends),
+        # so the checkpoint stops before it
+        last = max(index)
+        earlier = [m for m in index if m < last]
+        state.update(new.loc[(months < last).to_numpy(), ["symbol"] + raw], through=max(earlier) if earlier else None)
+        state.save(out_dir / STATE_FILE)
 
-    print(f"[ok] panel rows={len(panel)} dates={len(groups)} -> {out_dir}")
+    total = sum(e["rows"] for e in index.values())
+    if export:
+        write_export(read_panel(out), train_dir, horizon, feature_cols)
+
+    print(f"[ok] panel +{len(new)} rows for {len(added)} months; total rows={total} months={len(index)} -> {out_dir}")
+    return {"rows": len(new), "months": len(added), "total_rows": total}
+
+def main():
+    ap = argparse.ArgumentParser(description="Join features + matured labels into a cross-sectional panel and groups for LambdaMART.")
+    ap.add_argument("--out", default="data/panel", help="Output directory")
+    ap.add_argument("--horizon", type=int, default=126, help="Label horizon to use (labels_daily column y_{horizon})")
+    ap.add_argument("--rebuild", action="store_true", help="Rebuild every month instead of appending new ones")
+    ap.add_argument("--export", action="store_true", help="Also write memory-mappable .npy training arrays to <out>/train")
+    ap.add_argument("--normalize", default="zscore,rank",
+                    help="Comma-separated feature normalizations: zscore, rank (per date), expanding (per symbol), or none")
+    add_cli_args(ap)
+    args = ap.parse_args()
+    with stage("panel", args):
+        run(args.out, args.horizon, args.rebuild, args.export, normalize=args.normalize)
 
 if __name__ == "__main__":
     main()
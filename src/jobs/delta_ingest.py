@@ -1,54 +1,88 @@
 # src/jobs/delta_ingest.py
 from __future__ import annotations
-import argparse, sys, pathlib, json
-from datetime import datetime, timedelta
+import argparse, sys, pathlib
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
 import pandas as pd
 
 THIS_DIR = pathlib.Path(__file__).resolve().parent
 SRC_ROOT = THIS_DIR.parent
 sys.path.insert(0, str(SRC_ROOT))
 
-from data.fetch import get_bars
+from data import bronze
+from data.fetch import get_bars_many
+from data.manifest import BronzeManifest
+from data.metrics import add_cli_args, stage
 
-def main():
-    ap = argparse.ArgumentParser(description="Incrementally fetch daily bars and maintain per-symbol parquet tables.")
-    ap.add_argument("--symbols", required=True, help="Comma-separated tickers")
-    ap.add_argument("--start", required=False, default=None, help="ISO date; if omitted, derive from existing tables")
-    ap.add_argument("--end", required=False, default=None, help="ISO date; default today")
-    ap.add_argument("--rth-only", action="store_true")
-    args = ap.parse_args()
+RAW_BASE = pathlib.Path("data/raw_bars/interval=1d")
 
-    symbols = [s.strip() for s in args.symbols.split(",") if s.strip()]
-    end = args.end or datetime.utcnow().date().isoformat()
+def run(symbols: List[str], start: Optional[str] = None, end: Optional[str] = None, rth_only: bool = False,
+        workers: int = 8, base: pathlib.Path = RAW_BASE, keep_bars: bool = False) -> Tuple[Dict[str, pd.DataFrame], Dict]:
+    """Fetch new bars for `symbols`, merge them into Bronze and update the manifest.
+
+    Only each symbol's watermark and the year fragments the new bars overlap are read, and only
+    changed fragments are rewritten. With `keep_bars`, returns ({symbol: full bars table} for every
+    changed symbol, stats) so later stages can skip re-reading them; otherwise ({}, stats).
+    """
+    end = end or datetime.utcnow().date().isoformat()
+    base.mkdir(parents=True, exist_ok=True)
+    manifest = BronzeManifest(base)
+    n_changed = n_fetched = 0
 
-    base = pathlib.Path("data/raw_bars/interval=1d")
+    # Determine each symbol's start from its watermark (legacy single-file tables are split first)
+    starts, rows = {}, {}
     for sym in symbols:
-        sym_dir = base / f"symbol={sym}"
-        sym_dir.mkdir(parents=True, exist_ok=True)
-        table_path = sym_dir / "bars.parquet"
-
-        # Determine start based on existing data
-        if table_path.exists():
-            df_existing = pd.read_parquet(table_path)
-            last_ts = pd.to_datetime(df_existing.index).max().tz_localize("UTC") if df_existing.index.tz is None else pd.to_datetime(df_existing.index).max()
-            start_dt = (last_ts + pd.Timedelta(days=-5)).date().isoformat()  # small overlap to allow corrections
+        wm = bronze.watermark(base, sym) or bronze.migrate(base, sym)
+        if wm is not None:
+            rows[sym] = wm["rows"]
+            last_ts = pd.Timestamp(wm["last_ts"])
+            last_ts = last_ts.tz_localize("UTC") if last_ts.tzinfo is None else last_ts
+            starts[sym] = (last_ts + pd.Timedelta(days=-5)).date().isoformat()  # small overlap to allow corrections
         else:
-            start_dt = args.start or "2015-01-01"
+            starts[sym] = start or "2015-01-01"
 
-        df = get_bars(sym, start_dt, end, "1d", args.rth_only)
+    bars: Dict[str, pd.DataFrame] = {}
+    for sym, df, err in get_bars_many(symbols, starts, end, "1d", rth_only, max_workers=workers):
+        if err is not None:
+            print(f"[error] {sym}: {err}")
+            continue
         if df is None or df.empty:
             print(f"[warn] no data for {sym}")
             continue
+        n_fetched += 1
+        changed_from, written, wm = bronze.merge_bars(base, sym, df)
+        rows[sym] = wm["rows"]
+        if changed_from is None:
+            if manifest.get(sym) is None:  # table from before the manifest: hash it once
+                full = bronze.read_bars(base, sym)
+                manifest.record(sym, full, None)
+                n_changed += 1
+            print(f"[ok] {sym}: unchanged rows={wm['rows']}")
+            continue
+        fragments = pd.concat([written[y] for y in sorted(written)])
+        if manifest.record(sym, fragments, changed_from, rows=wm["rows"], last_ts=pd.Timestamp(wm["last_ts"])):
+            n_changed += 1
+        if keep_bars:
+            bars[sym] = bronze.read_bars(base, sym)
+        print(f"[ok] {sym}: rows={wm['rows']} rewrote years={sorted(written)} -> {bronze.symbol_dir(base, sym)}")
 
-        # Append & de-dup
-        if table_path.exists():
-            df_all = pd.read_parquet(table_path)
-            df_all = pd.concat([df_all, df]).sort_index()
-            df_all = df_all[~df_all.index.duplicated(keep="last")]
-        else:
-            df_all = df
-        df_all.to_parquet(table_path)
-        print(f"[ok] {sym}: rows={len(df_all)} -> {table_path}")
+    manifest.save()
+    print(f"[ok] manifest: {n_changed} changed symbols -> {manifest.path}")
+    return bars, {"symbols": n_fetched, "changed": n_changed, "rows": sum(rows.get(s, 0) for s in symbols)}
+
+def main():
+    ap = argparse.ArgumentParser(description="Incrementally fetch daily bars and maintain per-symbol, per-year parquet fragments.")
+    ap.add_argument("--symbols", required=True, help="Comma-separated tickers")
+    ap.add_argument("--start", required=False, default=None, help="ISO date; if omitted, derive from existing tables")
+    ap.add_argument("--end", required=False, default=None, help="ISO date; default today")
+    ap.add_argument("--rth-only", action="store_true")
+    ap.add_argument("--workers", type=int, default=8, help="Concurrent symbol fetches")
+    add_cli_args(ap)
+    args = ap.parse_args()
+
+    symbols = [s.strip() for s in args.symbols.split(",") if s.strip()]
+    with stage("ingest", args):
+        run(symbols, args.start, args.end, args.rth_only, args.workers)
 
 if __name__ == "__main__":
     main()
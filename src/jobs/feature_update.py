@@ -1,50 +1,111 @@
 # src/jobs/feature_update.py
 from __future__ import annotations
-import argparse, sys, pathlib
+import argparse, sys, pathlib, time
+from typing import Dict, Mapping, Optional, Tuple
 import pandas as pd
+import pyarrow as pa
 import numpy as np
 
 THIS_DIR = pathlib.Path(__file__).resolve().parent
 SRC_ROOT = THIS_DIR.parent
 sys.path.insert(0, str(SRC_ROOT))
 
-from data.feature_pipeline import engineer_basic_features
+from data import bronze
+from data.feature_matrix import engineer_universe_features
+from data.partitions import DatePartitionWriter
+from data.manifest import BronzeManifest, ConsumerState, window_start
+from data.metrics import add_cli_args, stage, timer
+from data.parallel import chunked, from_arrow, map_ordered, to_arrow
+
+RAW_BASE = pathlib.Path("data/raw_bars/interval=1d")
+OUT_BASE = pathlib.Path("data/features_daily")
+# Bars of history a feature row needs: 60 for vol60, and enough for RSI's exponential smoothing to
+# forget where it started ((13/14)**300 < 1e-9, far below float32 resolution)
+WARMUP_BARS = 300
+
+def history_start(changed_from: Optional[pd.Timestamp], horizon: int) -> Optional[pd.Timestamp]:
+    """First bar to load for a symbol whose bars changed from `changed_from` (None = all of them):
+    the `horizon` rows rewritten before the change plus WARMUP_BARS, as calendar days."""
+    if changed_from is None:
+        return None
+    return pd.Timestamp(changed_from) - pd.Timedelta(days=(horizon + WARMUP_BARS) * 3 // 2 + 14)
+
+def load_bars(raw_base: pathlib.Path, symbols, loaded: Optional[Mapping[str, pd.DataFrame]] = None,
+              since: Optional[Mapping[str, Optional[pd.Timestamp]]] = None) -> dict:
+    """Bars per symbol, taken from `loaded` (e.g. the ingest stage's output) when present, else read from Bronze.
+    With `since`, only bars from each symbol's start timestamp on are returned."""
+    bars = {}
+    for sym in symbols:
+        start = (since or {}).get(sym)
+        if loaded is not None and sym in loaded:
+            df = loaded[sym]
+        else:
+            df = bronze.read_bars(raw_base, sym, since=start)
+        if df is None:
+            continue
+        bars[sym] = df if start is None else df.loc[df.index >= start]
+    return bars
+
+def feature_chunk(task: Tuple) -> Tuple[Optional[pa.Table], int]:
+    """Features for one chunk of dirty symbols, as an Arrow table, plus the number of symbols loaded."""
+    chunk, raw_base, horizon, loaded = task
+    # Features are unscaled (normalization happens in the panel), so only the trailing window
+    # plus warm-up is loaded instead of the whole history
+    chunk_bars = load_bars(raw_base, chunk, loaded, {s: history_start(c, horizon) for s, c in chunk.items()})
+    with timer("features.compute"):
+        feat = engineer_universe_features(chunk_bars, horizon_bars=horizon, price_col="close")
+    # Rows whose label matured or whose inputs changed: `horizon` bars before the first
+    # changed bar onwards
+    since = {s: window_start(df.index, chunk[s], horizon) for s, df in chunk_bars.items()}
+    cut = feat["symbol"].map({s: t.value for s, t in since.items() if t is not None}).fillna(np.iinfo(np.int64).min)
+    return to_arrow(feat.loc[feat.index.as_unit("ns").asi8 >= cut.to_numpy(dtype=np.int64)]), len(chunk_bars)
+
+def run(horizon: int = 126, spill_rows: Optional[int] = None, chunk_symbols: int = 500, full: bool = False,
+        bars: Optional[Mapping[str, pd.DataFrame]] = None, raw_base: pathlib.Path = RAW_BASE,
+        out_base: pathlib.Path = OUT_BASE, workers: int = 1) -> Dict:
+    """Recompute features for the symbols whose Bronze bars changed and write them to Silver.
+    `bars` may hold tables already in memory; anything else is read from disk."""
+    out_base.mkdir(parents=True, exist_ok=True)
+
+    # Only symbols whose bars changed since the last run are recomputed
+    manifest = BronzeManifest(raw_base)
+    # "scaling" marks partitions written before features were stored raw, so they are rebuilt once
+    state = ConsumerState(out_base, params={"horizon": horizon, "scaling": "raw"})
+    all_syms = bronze.symbols(raw_base)
+    dirty = {s: None for s in all_syms} if full else state.pending(manifest, all_syms, lambda s: bronze.read_bars(raw_base, s))
+    print(f"[info] {len(dirty)}/{len(all_syms)} symbols need feature updates")
+
+    # Compute features for every symbol first (chunks fan out to `workers` processes), then the
+    # parent writes each date partition once
+    writer = DatePartitionWriter(out_base, spill_rows=spill_rows)
+    t0 = time.perf_counter()
+    n_syms = 0
+    tasks = [(dict(c), raw_base, horizon, {s: bars[s] for s, _ in c if s in bars} if bars else None)
+             for c in chunked(list(dirty.items()), chunk_symbols)]
+    for table, n in map_ordered(feature_chunk, tasks, workers):
+        writer.add(from_arrow(table))
+        n_syms += n
+    t_compute = time.perf_counter() - t0
+
+    stats = writer.flush()
+    for sym in dirty:
+        state.mark(sym, manifest)
+    state.save()
+    print(f"[ok] features for {n_syms} symbols rows={writer.rows_added} ({t_compute:.2f}s)")
+    print(f"[ok] wrote {stats['partitions']} partitions rows={stats['rows']} in {stats['seconds']:.2f}s -> {out_base}")
+    return {"symbols": n_syms, "rows": writer.rows_added, "partitions": stats["partitions"]}
 
 def main():
     ap = argparse.ArgumentParser(description="Build daily features from raw_bars tables into partitioned features_daily.")
     ap.add_argument("--horizon", type=int, default=126, help="Forward horizon in trading days (≈6 months)")
+    ap.add_argument("--spill-rows", type=int, default=None, help="Spill the write buffer to disk every N rows (default: keep in memory)")
+    ap.add_argument("--chunk-symbols", type=int, default=500, help="Symbols per vectorized feature pass")
+    ap.add_argument("--full", action="store_true", help="Recompute every symbol, ignoring the Bronze manifest")
+    ap.add_argument("--workers", type=int, default=1, help="Processes computing symbol chunks (this process writes)")
+    add_cli_args(ap)
     args = ap.parse_args()
-
-    raw_base = pathlib.Path("data/raw_bars/interval=1d")
-    out_base = pathlib.Path("data/features_daily")
-    out_base.mkdir(parents=True, exist_ok=True)
-
-    for sym_dir in sorted(raw_base.glob("symbol=*")):
-        sym = sym_dir.name.split("=",1)[1]
-        table_path = sym_dir / "bars.parquet"
-        if not table_path.exists():
-            continue
-        df = pd.read_parquet(table_path)
-        X, y, meta = engineer_basic_features(df, horizon_bars=args.horizon, price_col="close")
-        if len(y)==0:
-            continue
-        n = len(y)
-        idx = df.index[:len(df)-args.horizon][-n:]
-        feat = pd.DataFrame(X, index=idx, columns=meta["feature_cols"]).assign(symbol=sym)
-        for date, chunk in feat.groupby(feat.index.date):
-            date_dir = out_base / f"date={str(date)}"
-            date_dir.mkdir(parents=True, exist_ok=True)
-            # append mode: read existing, concat, drop dup by symbol
-            out_path = date_dir / "part.parquet"
-            if out_path.exists():
-                exist = pd.read_parquet(out_path)
-                exist = exist[exist["symbol"] != sym]
-                chunk.to_parquet(out_path)
-                all_df = pd.concat([exist, chunk]).drop_duplicates(subset=["symbol"], keep="last")
-                all_df.to_parquet(out_path)
-            else:
-                chunk.to_parquet(out_path)
-        print(f"[ok] features for {sym}")
+    with stage("features", args):
+        run(args.horizon, args.spill_rows, args.chunk_symbols, args.full, workers=args.workers)
 
 if __name__ == "__main__":
     main()
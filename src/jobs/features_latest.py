@@ -0,0 +1,79 @@
+# src/jobs/features_latest.py
+"""Advance the latest-features snapshot (`data/features_latest`) after an ingest.
+
+Symbols whose Bronze bars only grew past the snapshot are stepped forward bar by bar with the
+online feature engine (a few bars each per night); new symbols and corrected history are rebuilt
+from their full series in vectorized form. The result is rewritten as one small table.
+"""
+from __future__ import annotations
+import argparse, sys, pathlib
+from typing import Dict, Mapping, Optional
+import pandas as pd
+
+THIS_DIR = pathlib.Path(__file__).resolve().parent
+SRC_ROOT = THIS_DIR.parent
+sys.path.insert(0, str(SRC_ROOT))
+
+from data import bronze
+from data.latest_store import ENGINE_FILE, LATEST_FILE, latest_frame, write_latest
+from data.manifest import BronzeManifest, ConsumerState
+from data.metrics import add_cli_args, inc, stage, timer
+from data.online_features import OnlineFeatureEngine, OnlineFeatureState
+
+RAW_BASE = pathlib.Path("data/raw_bars/interval=1d")
+OUT_BASE = pathlib.Path("data/features_latest")
+
+def run(full: bool = False, bars: Optional[Mapping[str, pd.DataFrame]] = None,
+        raw_base: pathlib.Path = RAW_BASE, out_base: pathlib.Path = OUT_BASE) -> Dict:
+    """Bring the snapshot up to date with Bronze. `bars` may hold tables already in memory."""
+    out_base.mkdir(parents=True, exist_ok=True)
+    manifest = BronzeManifest(raw_base)
+    state = ConsumerState(out_base)
+    all_syms = bronze.symbols(raw_base)
+    dirty = {s: None for s in all_syms} if full else state.pending(manifest, all_syms, lambda s: bronze.read_bars(raw_base, s))
+    engine = OnlineFeatureEngine() if full else OnlineFeatureEngine.load(out_base / ENGINE_FILE)
+    if not dirty and (out_base / LATEST_FILE).exists():
+        print(f"[ok] features_latest up to date ({len(engine.states)} symbols) -> {out_base}")
+        return {"rows": 0, "symbols": 0, "appended": 0, "replayed": 0}
+
+    appended = replayed = 0
+    with timer("latest.update"):
+        for sym, changed_from in dirty.items():
+            st = engine.states.get(sym)
+            loaded = bars.get(sym) if bars else None
+            if st is not None and st.last_ts is not None and changed_from is not None and changed_from > st.last_ts:
+                # only new bars, all at or after changed_from: step the state forward
+                df = loaded if loaded is not None else bronze.read_bars(raw_base, sym, since=changed_from)
+                engine.update(sym, df)
+                appended += 1
+            else:
+                df = loaded if loaded is not None else bronze.read_bars(raw_base, sym)
+                if df is None or df.empty:
+                    engine.reset(sym)
+                    continue
+                engine.states[sym] = OnlineFeatureState.from_history(df["close"].sort_index())
+                replayed += 1
+        for sym in set(engine.states) - set(all_syms):
+            engine.reset(sym)  # no longer in Bronze
+
+    snap = latest_frame(engine, all_syms)
+    path = write_latest(snap, out_base)
+    engine.save(out_base / ENGINE_FILE)
+    for sym in dirty:
+        state.mark(sym, manifest)
+    state.save()
+    inc("latest.rows_written", len(snap))
+    as_of = snap["timestamp"].max() if len(snap) else None
+    print(f"[ok] features_latest: {appended} appended, {replayed} rebuilt; {len(snap)} symbols as of {as_of} -> {path}")
+    return {"rows": len(snap), "symbols": len(snap), "appended": appended, "replayed": replayed}
+
+def main():
+    ap = argparse.ArgumentParser(description="Update the one-row-per-symbol latest features snapshot from Bronze.")
+    ap.add_argument("--full", action="store_true", help="Rebuild every symbol from its full history")
+    add_cli_args(ap)
+    args = ap.parse_args()
+    with stage("latest", args):
+        run(args.full)
+
+if __name__ == "__main__":
+    main()
@@ -1,45 +1,116 @@
 # src/jobs/label_maturer.py
 from __future__ import annotations
-import argparse, sys, pathlib
+import argparse, sys, pathlib, time
+from typing import Dict, List, Mapping, Optional, Tuple
 import pandas as pd
+import pyarrow as pa
 import numpy as np
 
 THIS_DIR = pathlib.Path(__file__).resolve().parent
 SRC_ROOT = THIS_DIR.parent
 sys.path.insert(0, str(SRC_ROOT))
 
-def main():
-    ap = argparse.ArgumentParser(description="Compute forward-return labels per (date,symbol) once horizon has matured.")
-    ap.add_argument("--horizon", type=int, default=126, help="Forward horizon in trading days (≈6 months)")
-    args = ap.parse_args()
+from data import bronze
+from data.manifest import BronzeManifest, ConsumerState, change_position, window_start
+from data.partitions import DatePartitionWriter
+from data.metrics import add_cli_args, stage
+from data.parallel import chunked, from_arrow, map_ordered, to_arrow
+
+def label_col(h: int) -> str:
+    return f"y_{h}"
+
+def symbol_labels(df: pd.DataFrame, sym: str, horizons: List[int], changed_from: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+    """Forward log returns log(P_{t+h}/P_t) for every horizon in one pass over the closes.
+
+    With `changed_from`, only cells whose inputs changed are returned (t >= first changed bar - h,
+    i.e. newly matured or corrected); other cells are NaN so an updating writer keeps them.
+    Rows with no value at any horizon are dropped.
+    """
+    df = df.sort_index()
+    # A changed bar at t affects the labels of the max(horizon) bars before it
+    since = window_start(df.index, changed_from, max(horizons))
+    if since is not None:
+        df = df.loc[df.index >= since]
+    logc = np.log(df["close"].to_numpy(dtype=float))
+    n = len(logc)
+    first = 0 if changed_from is None else change_position(df.index, changed_from)
+    Y = np.full((n, len(horizons)), np.nan)
+    for j, h in enumerate(horizons):
+        if h < n:
+            Y[:n - h, j] = logc[h:] - logc[:-h]
+        Y[:max(first - h, 0), j] = np.nan  # unchanged cells
+    keep = ~np.isnan(Y).all(axis=1)
+    out = pd.DataFrame(Y[keep], index=df.index[keep], columns=[label_col(h) for h in horizons])
+    out.insert(0, "symbol", sym)
+    return out
+
+RAW_BASE = pathlib.Path("data/raw_bars/interval=1d")
+OUT_BASE = pathlib.Path("data/labels_daily")
+
+def parse_horizons(horizons: str) -> List[int]:
+    return sorted({int(h) for h in horizons.split(",") if h.strip()})
 
-    raw_base = pathlib.Path("data/raw_bars/interval=1d")
-    out_base = pathlib.Path("data/labels_daily")
+def label_chunk(task: Tuple) -> Optional[pa.Table]:
+    """Labels for one chunk of dirty symbols, concatenated into an Arrow table."""
+    chunk, raw_base, horizons, loaded = task
+    frames = []
+    for sym, changed_from in chunk.items():
+        if loaded is not None and sym in loaded:
+            df = loaded[sym]
+        else:
+            # labels only change within max(horizons) bars of the first changed bar: skip older years
+            since = None if changed_from is None else changed_from - pd.Timedelta(days=2 * max(horizons) + 14)
+            df = bronze.read_bars(raw_base, sym, since)
+            if df is None:
+                continue
+        frames.append(symbol_labels(df, sym, horizons, changed_from))
+    frames = [f for f in frames if not f.empty]
+    return to_arrow(pd.concat(frames)) if frames else None
+
+def run(horizons: List[int], full: bool = False, bars: Optional[Mapping[str, pd.DataFrame]] = None,
+        raw_base: pathlib.Path = RAW_BASE, out_base: pathlib.Path = OUT_BASE, workers: int = 1,
+        chunk_symbols: int = 200) -> Dict:
+    """Mature labels for the symbols whose Bronze bars changed and merge them into Gold.
+    `bars` may hold tables already in memory; anything else is read from disk."""
     out_base.mkdir(parents=True, exist_ok=True)
 
-    for sym_dir in sorted(raw_base.glob("symbol=*")):
-        sym = sym_dir.name.split("=",1)[1]
-        table_path = sym_dir / "bars.parquet"
-        if not table_path.exists():
-            continue
-        df = pd.read_parquet(table_path).sort_index()
-        close = pd.Series(df["close"])
-        close_fwd = close.shift(-args.horizon)
-        y = (np.log(close_fwd) - np.log(close)).dropna()
-        # Emit per date partition with one row
-        tmp = pd.DataFrame({"symbol": sym, "y": y})
-        for date, chunk in tmp.groupby(tmp.index.date):
-            date_dir = out_base / f"date={str(date)}"
-            date_dir.mkdir(parents=True, exist_ok=True)
-            out_path = date_dir / "part.parquet"
-            if out_path.exists():
-                exist = pd.read_parquet(out_path)
-                exist = exist[exist["symbol"] != sym]
-                all_df = pd.concat([exist, chunk]).drop_duplicates(subset=["symbol"], keep="last")
-                all_df.to_parquet(out_path)
-            else:
-                chunk.to_parquet(out_path)
-        print(f"[ok] labels for {sym}")
+    # Only symbols whose bars changed since the last run are recomputed
+    manifest = BronzeManifest(raw_base)
+    state = ConsumerState(out_base, params={"horizons": horizons})
+    all_syms = bronze.symbols(raw_base)
+    dirty = {s: None for s in all_syms} if full else state.pending(manifest, all_syms, lambda s: bronze.read_bars(raw_base, s))
+    print(f"[info] {len(dirty)}/{len(all_syms)} symbols need label updates (horizons={horizons})")
+
+    # All horizons for all dirty symbols first (chunks fan out to `workers` processes), then the
+    # parent writes each affected date partition once
+    writer = DatePartitionWriter(out_base, update=True)
+    t0 = time.perf_counter()
+    tasks = [(dict(c), raw_base, horizons, {s: bars[s] for s, _ in c if s in bars} if bars else None)
+             for c in chunked(list(dirty.items()), chunk_symbols)]
+    for table in map_ordered(label_chunk, tasks, workers):
+        writer.add(from_arrow(table))
+    t_compute = time.perf_counter() - t0
+
+    stats = writer.flush()
+    for sym in dirty:
+        state.mark(sym, manifest)
+    state.save()
+    print(f"[ok] labels for {len(dirty)} symbols cells={writer.rows_added} ({t_compute:.2f}s)")
+    print(f"[ok] wrote {stats['partitions']} partitions rows={stats['rows']} in {stats['seconds']:.2f}s -> {out_base}")
+    return {"symbols": len(dirty), "rows": writer.rows_added, "partitions": stats["partitions"]}
+
+def main():
+    ap = argparse.ArgumentParser(description="Compute forward-return labels per (date,symbol) once horizon has matured.")
+    ap.add_argument("--horizons", default="21,63,126,252", help="Comma-separated forward horizons in trading days; written as y_{h} columns")
+    ap.add_argument("--horizon", type=int, default=None, help="Single horizon (overrides --horizons)")
+    ap.add_argument("--full", action="store_true", help="Recompute every symbol, ignoring the Bronze manifest")
+    ap.add_argument("--workers", type=int, default=1, help="Processes computing labels (this process writes)")
+    ap.add_argument("--chunk-symbols", type=int, default=200, help="Symbols per worker task")
+    add_cli_args(ap)
+    args = ap.parse_args()
+    with stage("labels", args):
+        run([args.horizon] if args.horizon else parse_horizons(args.horizons), args.full,
+            workers=args.workers, chunk_symbols=args.chunk_symbols)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,119 @@
+# src/jobs/run_pipeline.py
+"""Run ingest → features, labels, latest → panel in one process.
+
+Bars of the symbols the ingest stage changed are loaded once and handed to the feature and
+label stages, so Bronze is read once per night instead of three times; each layer is still
+persisted once by its stage, and every stage remains runnable on its own as before.
+"""
+from __future__ import annotations
+import argparse, sys, pathlib, time
+from typing import Callable, Dict, List, Tuple
+
+THIS_DIR = pathlib.Path(__file__).resolve().parent
+SRC_ROOT = THIS_DIR.parent
+sys.path.insert(0, str(SRC_ROOT))
+
+from data import bronze
+from data.metrics import add_cli_args, stage
+from jobs import delta_ingest, feature_update, features_latest, label_maturer, build_panel_monthly
+
+Stage = Tuple[List[str], Callable[[Dict], Dict]]  # (dependencies, fn(context) -> stats)
+
+def topo_order(stages: Dict[str, Stage]) -> List[str]:
+    """Stage names with every stage after its dependencies (declaration order otherwise)."""
+    order: List[str] = []
+    seen = set()
+    def visit(name: str, path: Tuple[str, ...] = ()):
+        if name in path:
+            raise ValueError(f"cycle in pipeline: {' -> '.join(path + (name,))}")
+        if name in seen:
+            return
+        for dep in stages[name][0]:
+            if dep in stages:
+                visit(dep, path + (name,))
+        seen.add(name)
+        order.append(name)
+    for name in stages:
+        visit(name)
+    return order
+
+def build_stages(args) -> Dict[str, Stage]:
+    horizons = [args.horizon] if args.horizon else label_maturer.parse_horizons(args.horizons)
+
+    def ingest(ctx: Dict) -> Dict:
+        if args.symbols:
+            symbols = [s.strip() for s in args.symbols.split(",") if s.strip()]
+        else:  # refresh everything already in Bronze
+            symbols = bronze.symbols(delta_ingest.RAW_BASE)
+        ctx["bars"], stats = delta_ingest.run(symbols, args.start, args.end, args.rth_only, args.fetch_workers,
+                                              keep_bars=True)
+        return stats
+
+    def features(ctx: Dict) -> Dict:
+        return feature_update.run(args.feature_horizon, args.spill_rows, args.chunk_symbols, args.full,
+                                  bars=ctx.get("bars"), workers=args.workers)
+
+    def labels(ctx: Dict) -> Dict:
+        return label_maturer.run(horizons, args.full, bars=ctx.get("bars"), workers=args.workers)
+
+    def latest(ctx: Dict) -> Dict:
+        return features_latest.run(args.full, bars=ctx.get("bars"))
+
+    def panel(ctx: Dict) -> Dict:
+        return build_panel_monthly.run(args.out, args.panel_horizon, args.rebuild, args.export,
+                                       normalize=args.normalize)
+
+    return {
+        "ingest": ([], ingest),
+        "features": (["ingest"], features),
+        "labels": (["ingest"], labels),
+        "latest": (["ingest"], latest),
+        "panel": (["features", "labels"], panel),
+    }
+
+def main():
+    ap = argparse.ArgumentParser(description="Run the daily Bronze → Silver → Gold pipeline in one process.")
+    ap.add_argument("--symbols", default=None, help="Comma-separated tickers (default: every symbol already in Bronze)")
+    ap.add_argument("--start", default=None, help="ISO date for symbols without a Bronze table")
+    ap.add_argument("--end", default=None, help="ISO date; default today")
+    ap.add_argument("--rth-only", action="store_true")
+    ap.add_argument("--fetch-workers", type=int, default=8, help="Concurrent symbol fetches")
+    ap.add_argument("--workers", type=int, default=1, help="Processes for the feature and label stages")
+    ap.add_argument("--feature-horizon", type=int, default=126, help="feature_update --horizon")
+    ap.add_argument("--spill-rows", type=int, default=None)
+    ap.add_argument("--chunk-symbols", type=int, default=500)
+    ap.add_argument("--horizons", default="21,63,126,252", help="label_maturer --horizons")
+    ap.add_argument("--horizon", type=int, default=None, help="label_maturer --horizon (overrides --horizons)")
+    ap.add_argument("--panel-horizon", type=int, default=126, help="build_panel_monthly --horizon")
+    ap.add_argument("--out", default="data/panel", help="Panel output directory")
+    ap.add_argument("--rebuild", action="store_true", help="Rebuild every panel month")
+    ap.add_argument("--export", action="store_true", help="Also write the .npy training export")
+    ap.add_argument("--normalize", default="zscore,rank", help="build_panel_monthly --normalize")
+    ap.add_argument("--full", action="store_true", help="Recompute every symbol's features, labels and latest snapshot")
+    ap.add_argument("--stages", default=None, help="Comma-separated subset to run, e.g. features,labels,panel")
+    add_cli_args(ap)
+    args = ap.parse_args()
+
+    stages = build_stages(args)
+    selected = set(s.strip() for s in args.stages.split(",")) if args.stages else set(stages)
+    unknown = selected - set(stages)
+    if unknown:
+        ap.error(f"unknown stages: {sorted(unknown)}")
+
+    ctx: Dict = {}
+    timings = []
+    t_all = time.perf_counter()
+    for name in topo_order(stages):
+        if name not in selected:
+            continue
+        print(f"[info] stage {name}")
+        t0 = time.perf_counter()
+        with stage(name, args):
+            stats = stages[name][1](ctx)
+        timings.append((name, time.perf_counter() - t0, stats))
+    for name, secs, stats in timings:
+        print(f"[ok] {name:<8} {secs:7.2f}s rows={stats.get('rows', 0)} " + " ".join(f"{k}={v}" for k, v in stats.items() if k != "rows"))
+    print(f"[ok] pipeline done in {time.perf_counter() - t_all:.2f}s")
+
+if __name__ == "__main__":
+    main()
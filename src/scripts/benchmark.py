@@ -0,0 +1,163 @@
+# src/scripts/benchmark.py
+"""Offline benchmark suite on the deterministic synthetic provider.
+
+Every scale runs in a fresh temporary working directory (so `data/` and the bar cache start
+cold) and times the fetch layer, feature engines, the daily jobs, make_dataset and
+WindowedDataset iteration. Results are written as JSON; pass --compare to diff against a
+previous run.
+
+    python -m src.scripts.benchmark --scales 10,1000 --years 5 --out bench.json
+    python -m src.scripts.benchmark --scales 10 --compare bench.json
+"""
+from __future__ import annotations
+import argparse, contextlib, io, json, os, platform, subprocess, sys, tempfile, time, pathlib
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+THIS_DIR = pathlib.Path(__file__).resolve().parent
+SRC_ROOT = THIS_DIR.parent
+sys.path.insert(0, str(SRC_ROOT))
+os.environ["MARKET_DATA_PROVIDERS"] = "synthetic"  # before the fetch layer builds its router
+
+import numpy as np
+import pandas as pd
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SRC_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+class Bench:
+    def __init__(self, scale: int, verbose: bool = False):
+        self.scale, self.verbose, self.results = scale, verbose, []
+
+    def time(self, name: str, fn: Callable[[], object], rows: Callable[[object], int] = lambda r: 0):
+        """Run fn once (stdout captured unless verbose) and record wall time and row count."""
+        sink = contextlib.nullcontext() if self.verbose else contextlib.redirect_stdout(io.StringIO())
+        t0 = time.perf_counter()
+        with sink:
+            out = fn()
+        secs = time.perf_counter() - t0
+        n = int(rows(out) or 0)
+        self.results.append({"scale": self.scale, "name": name, "seconds": round(secs, 4), "rows": n})
+        print(f"[ok] {self.scale:>5} symbols  {name:<28} {secs:8.3f}s rows={n}")
+        return out
+
+def run_scale(scale: int, years: int, seq_len: int, batch_size: int, verbose: bool) -> List[Dict]:
+    from data.fetch import get_bars_many
+    from data.feature_pipeline import engineer_basic_features
+    from data.feature_matrix import engineer_universe_features
+    from data.datasets import WindowedDataset, WindowBatchSampler
+    from data import make_dataset
+    from data.latest_store import read_latest, scoring_input
+    from jobs import delta_ingest, feature_update, features_latest, label_maturer, build_panel_monthly
+
+    b = Bench(scale, verbose)
+    symbols = [f"S{i:05d}" for i in range(scale)]
+    end = "2024-01-01"
+    start = f"{2024 - years}-01-01"
+
+    def fetch():
+        return {s: df for s, df, _ in get_bars_many(symbols, start, end, "1d", False)}
+    bars = b.time("get_bars.cold", fetch, lambda r: sum(len(d) for d in r.values()))
+    b.time("get_bars.warm", fetch, lambda r: sum(len(d) for d in r.values()))
+    b.time("engineer_basic_features", lambda: [engineer_basic_features(df, horizon_bars=20) for df in bars.values()],
+           lambda r: sum(len(y) for _, y, _ in r))
+    b.time("engineer_universe_features", lambda: engineer_universe_features(bars, horizon_bars=20), len)
+
+    b.time("job.delta_ingest", lambda: delta_ingest.run(symbols, start, end)[1], lambda r: r["rows"])
+    b.time("job.feature_update", lambda: feature_update.run(126), lambda r: r["rows"])
+    b.time("job.label_maturer", lambda: label_maturer.run([21, 63, 126, 252]), lambda r: r["rows"])
+    b.time("job.build_panel_monthly", lambda: build_panel_monthly.run(horizon=126, export=True), lambda r: r["rows"])
+    b.time("job.features_latest", lambda: features_latest.run(), lambda r: r["symbols"])
+    b.time("job.delta_ingest.next_week", lambda: delta_ingest.run(symbols, start, "2024-01-08")[1], lambda r: r["rows"])
+    b.time("job.features_latest.next_week", lambda: features_latest.run(), lambda r: r["symbols"])
+    b.time("scoring_input", lambda: scoring_input(read_latest(features_latest.OUT_BASE)), len)
+
+    def dataset(out: pathlib.Path, *extra: str):
+        argv = sys.argv
+        sys.argv = ["make_dataset", "--symbols", ",".join(symbols), "--start", start, "--end", end,
+                    "--base-interval", "1d", "--agg-intervals", "1d", "--label-horizons", "20",
+                    "--out-features", str(out / "X.npy"), "--out-labels", str(out / "y.npy"),
+                    "--out-symbol-ids", str(out / "sym.npy"), "--out-times", str(out / "t.npy"),
+                    "--out-meta", str(out / "meta.json"), *extra]
+        try:
+            make_dataset.main()
+        finally:
+            sys.argv = argv
+        return np.load(out / "X.npy", mmap_mode="r")
+    b.time("make_dataset", lambda: dataset(pathlib.Path("data/processed_md")), len)
+    # streamed and grouped by symbol, so each series is one contiguous run for WindowedDataset
+    out = pathlib.Path("data/processed_stream")
+    b.time("make_dataset.stream", lambda: dataset(out, "--stream", "--row-order", "symbol"), len)
+
+    ds = WindowedDataset(np.load(out / "X.npy", mmap_mode="r"), np.load(out / "y.npy"), seq_len,
+                         symbol_ids=np.load(out / "sym.npy"))
+    def epoch():
+        n = 0
+        for idx in WindowBatchSampler(ds, batch_size, seed=0):
+            w, _ = ds.gather(idx)
+            n += len(w)
+        return n
+    b.time(f"WindowedDataset.epoch[T={seq_len}]", epoch, lambda n: n)
+    return b.results
+
+def compare(new: Dict, old_path: str) -> None:
+    with open(old_path) as f:
+        old = json.load(f)
+    base = {(r["scale"], r["name"]): r["seconds"] for r in old["results"]}
+    print(f"[info] vs {old_path} ({old['meta'].get('commit')})")
+    for r in new["results"]:
+        prev = base.get((r["scale"], r["name"]))
+        if prev:
+            ratio = r["seconds"] / prev if prev > 0 else float("inf")
+            flag = "  <-- slower" if ratio > 1.2 else ""
+            print(f"  {r['scale']:>5} {r['name']:<28} {prev:8.3f}s -> {r['seconds']:8.3f}s  x{ratio:.2f}{flag}")
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark the data layer and jobs on synthetic bars (no network).")
+    ap.add_argument("--scales", default="10,1000,5000", help="Comma-separated universe sizes")
+    ap.add_argument("--years", type=int, default=5, help="Years of daily history per symbol")
+    ap.add_argument("--seq-len", type=int, default=60, help="WindowedDataset window length")
+    ap.add_argument("--batch-size", type=int, default=512)
+    ap.add_argument("--out", default="benchmark.json", help="JSON results path")
+    ap.add_argument("--compare", default=None, help="Previous results JSON to compare against")
+    ap.add_argument("--verbose", action="store_true", help="Show the benchmarked code's own output")
+    args = ap.parse_args()
+
+    out_path = pathlib.Path(args.out).resolve()
+    cwd = os.getcwd()
+    results: List[Dict] = []
+    for scale in [int(s) for s in args.scales.split(",") if s.strip()]:
+        with tempfile.TemporaryDirectory(prefix=f"bench-{scale}-") as tmp:
+            os.chdir(tmp)
+            try:
+                results += run_scale(scale, args.years, args.seq_len, args.batch_size, args.verbose)
+            finally:
+                os.chdir(cwd)
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "cpu_count": os.cpu_count(),
+            "years": args.years,
+            "seq_len": args.seq_len,
+            "batch_size": args.batch_size,
+        },
+        "results": results,
+    }
+    with open(out_path, "w") as f:
+        json.dump(report, f, indent=1)
+    print(f"[ok] wrote {len(results)} timings -> {out_path}")
+    if args.compare:
+        compare(report, args.compare)
+
+if __name__ == "__main__":
+    main()
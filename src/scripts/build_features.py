@@ -10,7 +10,19 @@ SRC_ROOT = THIS_DIR.parent
 sys.path.insert(0, str(SRC_ROOT))
 
 from data.feature_pipeline import engineer_basic_features
-from data.fetch import get_bars
+from data.fetch import get_bars_many
+from data.normalize import normalize_panel, parse_methods
+
+def normalize_rows(X: pd.DataFrame, symbol_ids: np.ndarray, epoch: np.ndarray, methods, min_periods: int):
+    """Point-in-time normalization of the exported rows (`data.normalize`): "expanding" scales each
+    symbol by its own rows so far, "zscore"/"rank" across the symbols sharing a timestamp.
+    Returns (normalized features in the input row order, their column names)."""
+    order = np.argsort(epoch, kind="stable")  # time order; symbol order kept within a timestamp
+    rows = X.iloc[order].assign(symbol=symbol_ids[order], date=pd.to_datetime(epoch[order], unit="s"))
+    out, cols = normalize_panel(rows.reset_index(drop=True), methods, min_periods)
+    Z = np.empty((len(X), len(cols)))
+    Z[order] = out[cols].to_numpy(dtype=float)
+    return pd.DataFrame(Z, columns=cols), cols
 
 def main():
     load_dotenv()
@@ -21,14 +33,25 @@ def main():
     ap.add_argument("--base-interval", dest="base_interval", default="1d", choices=["1min","5min","15min","1h","1d"])
     ap.add_argument("--label-horizons", default="20", help="Horizon in bars at BASE interval (e.g., 20≈1 trading month @1d)")
     ap.add_argument("--rth-only", action="store_true")
+    ap.add_argument("--workers", type=int, default=8, help="Concurrent symbol fetches")
+    ap.add_argument("--normalize", default="expanding",
+                    help="Comma-separated feature normalizations: expanding (per symbol), zscore, rank (per timestamp), or none")
+    ap.add_argument("--min-periods", type=int, default=60, help="Rows a symbol needs before its expanding statistics are used")
     args = ap.parse_args()
+    methods = parse_methods(args.normalize)
 
     symbols = [s.strip() for s in args.symbols.split(",") if s.strip()]
     horizon = int(args.label_horizons.split(",")[0])
 
+    bars = {}
+    for sym, df, err in get_bars_many(symbols, args.start, args.end, args.base_interval, args.rth_only, max_workers=args.workers):
+        if err is not None:
+            print(f"[error] {sym}: {err}")
+        bars[sym] = df
+
     framesX, framesY, sym_ids, times = [], [], [], []
     for sid, sym in enumerate(symbols):
-        df = get_bars(sym, args.start, args.end, args.base_interval, args.rth_only)
+        df = bars[sym]
         X, y, meta = engineer_basic_features(df, horizon_bars=horizon, price_col="close")
         if len(y) == 0:
             print(f"[warn] No usable rows for {sym}; skipping.")
@@ -39,10 +62,10 @@ def main():
         n = len(y)
         # Ensure the last n indices align with earlier times (exclude tail horizon)
         idx = df.index[:len(df)-horizon][-n:]
-        framesX.append(pd.DataFrame(X, index=idx))
+        framesX.append(pd.DataFrame(X, index=idx, columns=meta["feature_cols"]))
         framesY.append(pd.Series(y, index=idx, name="y"))
         sym_ids.append(pd.Series([sid]*n, index=idx, name="symbol_id"))
-        times.append(pd.Series(idx.view('int64')//10**9, index=idx, name="epoch_utc"))
+        times.append(pd.Series(idx.as_unit("ns").asi8 // 10**9, index=idx, name="epoch_utc"))
 
     if not framesX:
         print("[error] No data produced.")
@@ -53,6 +76,15 @@ def main():
     sym_all = pd.concat(sym_ids).reset_index(drop=True).to_frame()
     t_all = pd.concat(times).reset_index(drop=True).to_frame()
 
+    # engineer_basic_features is unscaled (rsi14 is 0-100 next to returns of ~0.01)
+    if methods:
+        X_all, cols = normalize_rows(X_all, sym_all["symbol_id"].to_numpy(), t_all["epoch_utc"].to_numpy(),
+                                     methods, args.min_periods)
+        keep = X_all.notna().all(axis=1).to_numpy()  # expanding warm-up rows have no statistics yet
+        X_all, y_all, sym_all, t_all = (f.loc[keep].reset_index(drop=True) for f in (X_all, y_all, sym_all, t_all))
+        meta = dict(meta, feature_cols=cols, raw_feature_cols=meta["feature_cols"], normalize=methods,
+                    min_periods=args.min_periods)
+
     out_dir = pathlib.Path("data/processed")
     out_dir.mkdir(parents=True, exist_ok=True)
 
@@ -60,6 +92,10 @@ def main():
     y_all.to_parquet(out_dir/"labels.parquet")
     sym_all.to_parquet(out_dir/"symbol_ids.parquet")
     t_all.to_parquet(out_dir/"times.parquet")
+    # Same arrays as .npy for memory-mapped training (WindowedDataset.from_npy)
+    np.save(out_dir/"features.npy", np.ascontiguousarray(X_all.to_numpy(dtype=np.float32)))
+    np.save(out_dir/"labels.npy", y_all["y"].to_numpy(dtype=np.float32))
+    np.save(out_dir/"symbol_ids.npy", sym_all["symbol_id"].to_numpy(dtype=np.int32))
 
     # Save meta from the last symbol (features are the same schema)
     with open(out_dir/"meta.json","w") as f:
@@ -7,7 +7,7 @@ THIS_DIR = pathlib.Path(__file__).resolve().parent
 SRC_ROOT = THIS_DIR.parent
 sys.path.insert(0, str(SRC_ROOT))
 
-from data.fetch import get_bars  # noqa: E402
+from data.fetch import get_bars_many  # noqa: E402
 
 def main():
     load_dotenv()
@@ -17,12 +17,16 @@ def main():
     ap.add_argument("--end", required=True)
     ap.add_argument("--interval", default="1d", choices=["1min","5min","15min","1h","1d"])
     ap.add_argument("--rth-only", action="store_true")
+    ap.add_argument("--workers", type=int, default=8, help="Concurrent symbol fetches")
     args = ap.parse_args()
 
     out_dir = pathlib.Path("data/raw"); out_dir.mkdir(parents=True, exist_ok=True)
 
-    for sym in [s.strip() for s in args.symbols.split(",") if s.strip()]:
-        df = get_bars(sym, args.start, args.end, args.interval, args.rth_only)
+    symbols = [s.strip() for s in args.symbols.split(",") if s.strip()]
+    for sym, df, err in get_bars_many(symbols, args.start, args.end, args.interval, args.rth_only, max_workers=args.workers):
+        if err is not None:
+            print(f"[error] {sym}: {err}")
+            continue
         if df is None or df.empty:
             print(f"[warn] {sym}: no data")
             continue
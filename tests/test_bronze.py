@@ -0,0 +1,44 @@
+import os, pathlib, sys
+import numpy as np
+import pandas as pd
+sys.path.insert(0, str(pathlib.Path('src').resolve()))
+from data import bronze
+
+def _bars(start, end, seed=0):
+    idx = pd.bdate_range(start, end, tz='UTC')
+    c = 100 + np.cumsum(np.random.default_rng(seed).normal(0, 1, len(idx)))
+    return pd.DataFrame({'open': c, 'high': c, 'low': c, 'close': c, 'volume': 1.0}, index=idx)
+
+def test_merge_rewrites_only_overlapped_years(tmp_path):
+    full = _bars('2020-01-01', '2023-03-31')
+    sym_dir = tmp_path / 'symbol=AAA'
+    sym_dir.mkdir()
+    full.loc[:'2023-03-10'].to_parquet(sym_dir / 'bars.parquet')  # legacy single-file table
+
+    wm = bronze.migrate(tmp_path, 'AAA')
+    assert not (sym_dir / 'bars.parquet').exists()
+    assert bronze.years(tmp_path, 'AAA') == [2020, 2021, 2022, 2023]
+    assert wm['rows'] == len(full.loc[:'2023-03-10'])
+    before = {y: os.stat(bronze.fragment_path(tmp_path, 'AAA', y)).st_mtime_ns for y in (2020, 2021, 2022)}
+
+    new = full.loc['2023-03-06':].copy()
+    new.loc['2023-03-08', 'close'] += 1.0  # correction inside the overlap
+    changed_from, written, wm = bronze.merge_bars(tmp_path, 'AAA', new)
+    assert changed_from == pd.Timestamp('2023-03-08', tz='UTC')
+    assert list(written) == [2023]
+    assert {y: os.stat(bronze.fragment_path(tmp_path, 'AAA', y)).st_mtime_ns for y in (2020, 2021, 2022)} == before
+    assert wm['rows'] == len(full) and pd.Timestamp(wm['last_ts']) == full.index[-1]
+
+    expected = full.copy()
+    expected.loc['2023-03-08', 'close'] += 1.0
+    pd.testing.assert_frame_equal(bronze.read_bars(tmp_path, 'AAA'), expected, check_freq=False)
+    assert bronze.read_bars(tmp_path, 'AAA', since=pd.Timestamp('2022-06-01')).index[0].year == 2022
+
+    # re-merging the same bars is a no-op
+    changed_from, written, _ = bronze.merge_bars(tmp_path, 'AAA', new)
+    assert changed_from is None and written == {}
+
+    # every corrected row wins, not just some of them
+    fixed = expected.loc['2023-02-01':] * 1.01
+    bronze.merge_bars(tmp_path, 'AAA', fixed)
+    pd.testing.assert_frame_equal(bronze.read_bars(tmp_path, 'AAA').loc['2023-02-01':], fixed, check_freq=False)
@@ -0,0 +1,28 @@
+import json, pathlib, sys
+import numpy as np
+sys.path.insert(0, str(pathlib.Path('src').resolve()))
+from data.providers.synthetic import SyntheticProvider
+from scripts import build_features
+
+def _run(tmp_path, monkeypatch, *extra):
+    p = SyntheticProvider()
+    def fake_get_bars_many(symbols, start, end, interval, rth_only, max_workers=8):
+        return [(s, p.get_bars(s, start, end, interval), None) for s in symbols]
+    monkeypatch.setattr(build_features, 'get_bars_many', fake_get_bars_many)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sys, 'argv', ['build_features', '--symbols', 'AAA,BBB,CCC', '--start', '2018-01-01',
+                                      '--end', '2021-01-01', *extra])
+    build_features.main()
+    out = tmp_path / 'data' / 'processed'
+    return np.load(out / 'features.npy'), np.load(out / 'symbol_ids.npy'), json.loads((out / 'meta.json').read_text())
+
+def test_exported_features_are_normalized(tmp_path, monkeypatch):
+    X, sids, meta = _run(tmp_path, monkeypatch)
+    assert meta['normalize'] == ['expanding'] and meta['feature_cols'][0] == 'ret1_ez'
+    assert np.isfinite(X).all() and len(X) == len(sids)
+    rsi = X[:, meta['feature_cols'].index('rsi14_ez')]
+    assert np.abs(np.median(rsi)) < 1 and 0.5 < rsi.std() < 2  # on the scale of the other columns, not 0-100
+    X, _, meta = _run(tmp_path, monkeypatch, '--normalize', 'rank')
+    assert meta['feature_cols'][-1] == 'dd20_rank' and X.min() >= 0 and X.max() <= 1
+    X, _, meta = _run(tmp_path, monkeypatch, '--normalize', 'none')
+    assert 'normalize' not in meta and X[:, meta['feature_cols'].index('rsi14')].max() > 50
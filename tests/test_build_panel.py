@@ -0,0 +1,52 @@
+import os, pathlib, sys
+import numpy as np
+import pandas as pd
+sys.path.insert(0, str(pathlib.Path('src').resolve()))
+from data.storage import write_parquet
+from jobs import build_panel_monthly as bpm
+
+SYMS = ['A', 'B', 'C', 'D', 'E']
+
+def _write(df, path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_parquet(df, path)
+
+def _silver(base, dates, seed=0):
+    rng = np.random.default_rng(seed)
+    for d in dates:
+        f = pd.DataFrame({'ret1': rng.normal(size=5), 'rsi14': rng.uniform(0, 100, 5), 'symbol': SYMS})
+        _write(f, base / 'features_daily' / f'date={d}' / 'part.parquet')
+        _write(pd.DataFrame({'symbol': SYMS, 'y_126': rng.normal(size=5)}), base / 'labels_daily' / f'date={d}' / 'part.parquet')
+
+def _run(base, out, **kw):
+    return bpm.run(str(out), feat_base=base / 'features_daily', lab_base=base / 'labels_daily',
+                   normalize='zscore,rank,expanding', **kw)
+
+def test_append_writes_only_new_months(tmp_path):
+    ends = [str(d.date()) for d in pd.date_range('2020-01-31', periods=15, freq='ME')]
+    _silver(tmp_path, ends[:-1] + ['2021-03-15'])  # last month still in progress
+    out = tmp_path / 'panel'
+    _run(tmp_path, out)
+    old = {m: os.stat(bpm.month_path(out, m)).st_mtime_ns for m in bpm.load_index(out)}
+
+    _silver(tmp_path, [ends[-1], '2021-04-30'], seed=1)  # month closes, a new one starts
+    stats = _run(tmp_path, out)
+    assert stats['months'] == 2 and stats['total_rows'] == 16 * 5
+    index = bpm.load_index(out)
+    assert index['2021-03']['date'] == '2021-03-31' and sorted(index) == sorted(old) + ['2021-04']
+    assert all(os.stat(bpm.month_path(out, m)).st_mtime_ns == t for m, t in old.items() if m != '2021-03')
+
+    _run(tmp_path, tmp_path / 'full', rebuild=True)
+    a, b = bpm.read_panel(str(out)), bpm.read_panel(str(tmp_path / 'full'))
+    assert a['date'].is_monotonic_increasing and a['rsi14_ez'].notna().sum() == 5 * 5  # 12-month warm-up
+    pd.testing.assert_frame_equal(a, b, check_exact=False, rtol=1e-5)
+
+def test_legacy_single_file_panel_is_split(tmp_path):
+    out = tmp_path / 'panel'
+    legacy = pd.DataFrame({'ret1': [1.0, 2.0, 3.0], 'symbol': ['A', 'B', 'A'], 'y': [0.1, 0.2, 0.3],
+                           'date': pd.to_datetime(['2020-01-31', '2020-01-31', '2020-02-28'])})
+    _write(legacy, out / 'panel.parquet')
+    bpm.migrate(out)
+    assert not (out / 'panel.parquet').exists() and sorted(bpm.load_index(out)) == ['2020-01', '2020-02']
+    assert bpm.read_panel(str(out))['ret1'].tolist() == [1.0, 2.0, 3.0]
+    assert (out / 'groups.json').read_text() == '[2, 1]'
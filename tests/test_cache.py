@@ -0,0 +1,84 @@
+import pathlib, sys
+sys.path.insert(0, str(pathlib.Path('src').resolve()))
+import pandas as pd
+from data import cache
+
+def test_missing_ranges():
+    cov = cache.merge_ranges([(10, 20), (0, 5), (18, 30)])
+    assert cov == [(0, 5), (10, 30)]
+    assert cache.missing_ranges(cov, 0, 40) == [(5, 10), (30, 40)]
+    assert cache.missing_ranges(cov, 12, 25) == []
+
+def test_lookup_serves_subranges_and_reports_gaps(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, '_CACHE_DIR', str(tmp_path))
+    idx = pd.bdate_range('2018-01-01', '2022-12-31', tz='UTC')
+    df = pd.DataFrame({'close': range(len(idx))}, index=idx, dtype=float)
+    assert cache.lookup('AAA', '1d', '2018-01-01', '2023-01-01').status == cache.MISS
+    cache.store('AAA', '1d', '2018-01-01', '2023-01-01', df)
+    assert not list(tmp_path.rglob('*.tmp'))  # written to a temp file, then replaced
+
+    hit = cache.lookup('AAA', '1d', '2019-03-01', '2020-01-01')
+    assert hit.status == cache.FULL and hit.gaps == []
+    assert hit.df.index.min() == pd.Timestamp('2019-03-01', tz='UTC')
+    assert hit.df.index.max() < pd.Timestamp('2020-01-01', tz='UTC')
+
+    part = cache.lookup('AAA', '1d', '2018-01-01', '2024-01-01')
+    assert part.status == cache.PARTIAL
+    assert part.gaps == [('2023-01-01', '2024-01-01')]
+    assert len(part.df) == len(df)
+
+def test_evict_lru_keeps_recent_entries(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, '_CACHE_DIR', str(tmp_path))
+    idx = pd.bdate_range('2020-01-01', '2020-12-31', tz='UTC')
+    df = pd.DataFrame({'close': range(len(idx))}, index=idx, dtype=float)
+    for sym in ('AAA', 'BBB', 'CCC'):
+        cache.store(sym, '1d', '2020-01-01', '2021-01-01', df)
+    cache.lookup('AAA', '1d', '2020-02-01', '2020-03-01')  # AAA becomes most recently used
+    one = cache.stats()['bytes'] // 3
+    res = cache.evict(one + 1, policy='lru')
+    assert res['removed'] == 2
+    assert cache.lookup('AAA', '1d', '2020-02-01', '2020-03-01').status == cache.FULL
+    assert cache.lookup('BBB', '1d', '2020-02-01', '2020-03-01').status == cache.MISS
+    assert not (tmp_path / 'interval=1d' / 'BBB.parquet').exists()
+
+def test_empty_ranges_are_cached(tmp_path, monkeypatch):
+    from data import fetch
+    from data.providers.base import MarketDataProvider
+    from data.providers.router import ProviderRouter
+    calls = []
+
+    class _NoBars(MarketDataProvider):
+        def get_bars(self, symbol, start, end, interval):
+            calls.append((symbol, start, end))
+            return pd.DataFrame()
+
+    monkeypatch.setattr(cache, '_CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(fetch, '_ROUTER', ProviderRouter([('nobars', _NoBars())]))
+    for _ in range(2):
+        assert fetch.get_bars('DELISTED', '2019-01-01', '2019-02-01', '1d', False).empty
+    assert len(calls) == 1
+    assert cache.lookup('DELISTED', '1d', '2019-01-10', '2019-01-20').status == cache.FULL
+    assert not (tmp_path / 'interval=1d' / 'DELISTED.parquet').exists()
+    assert cache.stats()['bytes'] == 0
+
+def test_swallowed_provider_failures_are_not_cached(tmp_path, monkeypatch):
+    import logging, types
+    from data import fetch
+    from data.providers.router import ProviderRouter
+    from data.providers.yf import YFinanceProvider
+    calls = []
+
+    def download(tickers, **kw):  # like yf.download: failures are only logged
+        calls.append(sorted(tickers))  # batch order follows cache lookup completion
+        logging.getLogger('yfinance').error("['DOWN']: YFRateLimitError('Too Many Requests. Rate limited.')")
+        logging.getLogger('yfinance').error("['GONE']: possibly delisted; no price data found  (1d 2019-01-01 -> 2019-02-01)")
+        return pd.DataFrame()
+
+    monkeypatch.setitem(sys.modules, 'yfinance', types.SimpleNamespace(download=download))
+    monkeypatch.setattr(cache, '_CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(fetch, '_ROUTER', ProviderRouter([('yfinance', YFinanceProvider())], retries=0, failure_threshold=99))
+    for _ in range(2):
+        res = {r.symbol: r for r in fetch.get_bars_many(['DOWN', 'GONE'], '2019-01-01', '2019-02-01', '1d', False)}
+        assert res['DOWN'].error is not None and res['GONE'].error is None and res['GONE'].df.empty
+    assert calls == [['DOWN', 'GONE'], ['DOWN']]  # only the positively empty range was cached
+    assert cache.lookup('DOWN', '1d', '2019-01-01', '2019-02-01').status == cache.MISS
@@ -0,0 +1,35 @@
+import pathlib, sys
+sys.path.insert(0, str(pathlib.Path('src').resolve()))
+import numpy as np
+import pytest
+from data.datasets import WindowedDataset, WindowBatchSampler
+
+def _dataset():
+    X = np.arange(20, dtype=float).reshape(10, 2)
+    y = np.arange(10, dtype=float)
+    sid = np.array([0, 0, 0, 0, 1, 1, 1, 2, 2, 2])
+    return X, WindowedDataset(X, y, seq_len=3, symbol_ids=sid)
+
+def test_windows_respect_symbol_boundaries_and_batch_in_one_gather():
+    X, ds = _dataset()
+    assert ds.starts.tolist() == [0, 1, 4, 7]
+    w, t = ds.gather(2)
+    np.testing.assert_array_equal(w, X[4:7].T.astype(np.float32))
+    assert t.tolist() == [6.0]
+
+    batches = list(WindowBatchSampler(ds, batch_size=3, shuffle=False))
+    W, T = ds.gather(batches[0])
+    assert W.shape == (3, 2, 3) and W.dtype == np.float32 and W.flags.c_contiguous
+    assert T[:, 0].tolist() == [2.0, 3.0, 6.0]
+
+def test_getitem_returns_tensors():
+    torch = pytest.importorskip('torch')
+    X, ds = _dataset()
+    w, t = ds[np.array([0, 3])]
+    assert isinstance(w, torch.Tensor) and tuple(w.shape) == (2, 2, 3) and tuple(t.shape) == (2, 1)
+
+def test_series_shorter_than_a_window_give_an_empty_dataset():
+    ds = WindowedDataset(np.zeros((3, 2)), np.zeros(3), 5)
+    assert len(ds) == 0 and list(WindowBatchSampler(ds, batch_size=4)) == []
+    W, T = ds.gather(np.zeros(0, dtype=np.int64))
+    assert W.shape == (0, 2, 5) and T.shape == (0, 1)
@@ -0,0 +1,36 @@
+import pathlib, sys
+sys.path.insert(0, str(pathlib.Path('src').resolve()))
+import numpy as np, pandas as pd
+from data.feature_pipeline import FEATURE_COLS, basic_features, engineer_basic_features
+from data.feature_matrix import engineer_universe_features, universe_features_long
+
+def _ragged_bars(n_sym=12, seed=0):
+    rng = np.random.default_rng(seed)
+    bars = {}
+    for i in range(n_sym):
+        start = pd.Timestamp('2020-01-01') + pd.Timedelta(days=int(rng.integers(0, 150)))
+        idx = pd.bdate_range(start, '2021-06-30', tz='UTC')
+        idx = idx.delete(rng.choice(len(idx), 8, replace=False))  # per-symbol gaps
+        if i == 0:
+            idx = idx[:30]  # too short to produce any labelled row
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, len(idx))))
+        bars[f'S{i}'] = pd.DataFrame({'close': close}, index=idx)
+    return bars
+
+def test_universe_features_match_per_symbol():
+    bars = _ragged_bars()
+    out = universe_features_long(bars)
+    for sym, df in bars.items():
+        got = out[out['symbol'] == sym]
+        ref = basic_features(df)
+        assert got.index.equals(ref.index)
+        np.testing.assert_allclose(got[FEATURE_COLS].values, ref.values, rtol=1e-8, atol=1e-10, equal_nan=True)
+
+def test_engineer_universe_features_match_per_symbol():
+    bars = _ragged_bars()
+    out = engineer_universe_features(bars, horizon_bars=20)
+    for sym, df in bars.items():
+        X, y, meta = engineer_basic_features(df, horizon_bars=20)
+        got = out[out['symbol'] == sym]
+        assert got.shape[0] == X.shape[0]
+        np.testing.assert_allclose(got[FEATURE_COLS].values, X, rtol=1e-7, atol=1e-8)
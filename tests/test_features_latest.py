@@ -0,0 +1,59 @@
+import pathlib, sys
+import numpy as np
+import pandas as pd
+sys.path.insert(0, str(pathlib.Path('src').resolve()))
+from data import bronze
+from data.feature_pipeline import FEATURE_COLS, basic_features
+from data.latest_store import read_latest, scoring_input
+from data.manifest import BronzeManifest
+from data.online_features import OnlineFeatureState
+from jobs import features_latest
+
+def _bars(n, seed):
+    idx = pd.bdate_range('2021-01-01', periods=n, tz='UTC')
+    c = 100 * np.exp(np.cumsum(np.random.default_rng(seed).normal(0, 0.02, n)))
+    return pd.DataFrame({'open': c, 'high': c, 'low': c, 'close': c, 'volume': 1.0}, index=idx)
+
+def _ingest(base, bars):
+    manifest = BronzeManifest(base)
+    for sym, df in bars.items():
+        changed_from, written, wm = bronze.merge_bars(base, sym, df)
+        if written:
+            manifest.record(sym, pd.concat(written.values()), changed_from, rows=wm['rows'], last_ts=pd.Timestamp(wm['last_ts']))
+    manifest.save()
+
+def test_from_history_matches_stepping():
+    bars = _bars(300, 1)
+    st = OnlineFeatureState.from_history(bars['close'].iloc[:250])
+    for c, ts in zip(bars['close'].iloc[250:], bars.index[250:]):
+        got = st.update(c, ts)
+    np.testing.assert_allclose([got[c] for c in FEATURE_COLS], basic_features(bars).iloc[-1].to_numpy(), rtol=1e-9)
+
+def test_snapshot_follows_ingest(tmp_path):
+    raw, out = tmp_path / 'raw', tmp_path / 'latest'
+    full = {'A': _bars(300, 0), 'B': _bars(300, 1), 'C': _bars(40, 2)}  # C is too short for vol60
+    _ingest(raw, {s: df.iloc[:-5] for s, df in full.items()})
+    assert features_latest.run(raw_base=raw, out_base=out)['replayed'] == 3
+    assert sorted(read_latest(out)['symbol'].astype(str)) == ['A', 'B']
+
+    fixed = full['B'].copy()
+    fixed.iloc[-20:, :4] *= 1.01  # B's recent history is corrected, A only grows
+    _ingest(raw, {'A': full['A'], 'B': fixed})
+    stats = features_latest.run(raw_base=raw, out_base=out)
+    assert (stats['appended'], stats['replayed']) == (1, 1)
+    snap = read_latest(out).set_index('symbol')
+    for sym, df in (('A', full['A']), ('B', fixed)):
+        assert snap.loc[sym, 'timestamp'] == df.index[-1]
+        np.testing.assert_allclose(snap.loc[sym, FEATURE_COLS].to_numpy(float), basic_features(df).iloc[-1].to_numpy(), rtol=1e-6)
+
+    X = scoring_input(read_latest(out))
+    assert list(X.columns) == [f'{c}_z' for c in FEATURE_COLS] + [f'{c}_rank' for c in FEATURE_COLS]
+    assert sorted(X.index) == ['A', 'B'] and X['ret20_rank'].sum() == 1.0
+
+def test_untracked_symbols_are_seeded_once(tmp_path):
+    raw, out = tmp_path / 'raw', tmp_path / 'latest'
+    for sym, seed in (('A', 0), ('B', 1)):
+        bronze.merge_bars(raw, sym, _bars(300, seed))  # Bronze from before the manifest
+    assert features_latest.run(raw_base=raw, out_base=out)['replayed'] == 2
+    assert {s: e['version'] for s, e in BronzeManifest(raw).entries.items()} == {'A': 1, 'B': 1}
+    assert features_latest.run(raw_base=raw, out_base=out) == {'rows': 0, 'symbols': 0, 'appended': 0, 'replayed': 0}
@@ -0,0 +1,24 @@
+import pathlib, subprocess, sys
+import pytest
+
+SRC = pathlib.Path('src').resolve()
+HEAVY = ('yfinance', 'torch', 'sklearn', 'lightgbm', 'alpaca', 'dotenv')
+BUDGET_US = 3_000_000  # generous cumulative budget per CLI module; catches regressions, not noise
+
+def _importtime(module: str, path: pathlib.Path):
+    code = f"import sys; sys.path.insert(0, {str(SRC)!r}); sys.path.insert(0, {str(path)!r}); import {module}"
+    err = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True, check=True).stderr
+    rows = {}
+    for line in err.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cum, name = line[len('import time:'):].split('|')
+        rows[name.strip()] = int(cum)
+    return rows
+
+@pytest.mark.parametrize('module', ['delta_ingest', 'feature_update', 'label_maturer', 'build_panel_monthly', 'features_latest', 'run_pipeline'])
+def test_job_imports_stay_light(module):
+    rows = _importtime(module, SRC / 'jobs')
+    loaded = {n.split('.')[0] for n in rows}
+    assert not loaded & set(HEAVY), f"{module} imports {sorted(loaded & set(HEAVY))} at startup"
+    assert rows[module] < BUDGET_US
@@ -0,0 +1,25 @@
+import json, pathlib, sys, types
+sys.path.insert(0, str(pathlib.Path('src').resolve()))
+from data import metrics
+
+def test_stage_writes_per_stage_jsonl_and_prometheus(tmp_path):
+    metrics.reset()
+    out = tmp_path / 'm.jsonl'
+    args = types.SimpleNamespace(metrics=str(out), profile=str(tmp_path / 'prof'))
+    metrics.inc('cache.lookups', status='full')
+    with metrics.stage('features', args):
+        metrics.inc('partitions.written', 3)
+        metrics.inc('cache.lookups', status='full')
+        with metrics.timer('features.compute'):
+            pass
+    rec = json.loads(out.read_text().splitlines()[-1])
+    assert rec['stage'] == 'features'
+    assert rec['counters'] == {'cache.lookups{status=full}': 1, 'partitions.written': 3}
+    assert rec['timers']['features.compute']['count'] == 1 and rec['peak_rss_bytes'] > 0
+    assert (tmp_path / 'prof' / 'features.prof').exists()
+
+    prom = tmp_path / 'm.prom'
+    metrics.write_prometheus(prom)
+    text = prom.read_text()
+    assert 'gsi_cache_lookups_total{status="full"} 2' in text
+    assert 'gsi_stage_seconds_count{stage="features"} 1' in text
@@ -0,0 +1,50 @@
+import pathlib, sys
+import numpy as np
+import pandas as pd
+sys.path.insert(0, str(pathlib.Path('src').resolve()))
+from data import multiscale
+
+AGG = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
+
+def _bars():
+    # two RTH sessions of 15min bars, the second one after a DST change
+    days = [pd.Timestamp('2024-03-08 09:30', tz='America/New_York'), pd.Timestamp('2024-03-11 09:30', tz='America/New_York')]
+    idx = pd.DatetimeIndex([d + pd.Timedelta(minutes=15 * i) for d in days for i in range(26)]).tz_convert('UTC')
+    rng = np.random.default_rng(0)
+    c = 100 + np.cumsum(rng.normal(size=len(idx)))
+    return pd.DataFrame({'open': c - 0.1, 'high': c + 1, 'low': c - 1, 'close': c, 'volume': rng.integers(1, 100, len(idx)).astype(float)}, index=idx)
+
+def test_aggregate_matches_resample():
+    df = _bars()
+    got = multiscale.aggregate_many(df, ['1h', '1d'])
+    ref = df.resample('1h', origin='start').agg(AGG).dropna()
+    pd.testing.assert_frame_equal(got['1h'].bars, ref, check_freq=False, check_index_type=False)
+    daily = got['1d'].bars
+    assert [d.isoformat() for d in daily.index.tz_convert('America/New_York').date] == ['2024-03-08', '2024-03-11']
+    assert daily['volume'].tolist() == [df['volume'].iloc[:26].sum(), df['volume'].iloc[26:].sum()]
+    assert daily['high'].iloc[1] == df['high'].iloc[26:].max() and daily['close'].iloc[0] == df['close'].iloc[25]
+
+def test_asof_join_uses_completed_buckets_only():
+    df = _bars()
+    b = multiscale.aggregate(df, '1h')
+    out = multiscale.asof_join(b.bars[['close']], b.complete_ns, df.index, 15 * 60 * 10**9)
+    # 09:30-10:15 bars: no hour finished yet; the 10:15 bar closes at 10:30 and sees 09:30-10:30
+    assert out['close'].iloc[:3].isna().all()
+    assert out['close'].iloc[3] == df['close'].iloc[3] and out['close'].iloc[4:7].eq(df['close'].iloc[3]).all()
+    # the last (partial) hour completes at the 16:00 close, so the day's last bar already sees it
+    assert out['close'].iloc[25] == df['close'].iloc[25] and out['close'].iloc[26] == df['close'].iloc[25]
+    d = multiscale.aggregate(df, '1d')
+    outd = multiscale.asof_join(d.bars[['close']], d.complete_ns, df.index, 15 * 60 * 10**9)
+    assert outd['close'].iloc[:25].isna().all() and outd['close'].iloc[25:51].eq(df['close'].iloc[25]).all()
+    assert outd['close'].iloc[51] == df['close'].iloc[51]
+
+def test_buckets_anchor_at_session_open():
+    # session starting mid-hour and a half-day: buckets still start at 09:30 and end at the bell
+    idx = pd.DatetimeIndex([pd.Timestamp('2024-11-29 10:00', tz='America/New_York') + pd.Timedelta(minutes=15 * i)
+                            for i in range(12)]).tz_convert('UTC')
+    df = pd.DataFrame({c: np.arange(12.0) for c in multiscale.OHLCV}, index=idx)
+    b = multiscale.aggregate(df, '1h')
+    local = b.bars.index.tz_convert('America/New_York')
+    assert [t.strftime('%H:%M') for t in local] == ['09:30', '10:30', '11:30', '12:30']
+    close = pd.Timestamp('2024-11-29 13:00', tz='America/New_York').value
+    assert b.complete_ns[-1] == close and multiscale.aggregate(df, '1d').complete_ns.tolist() == [close]
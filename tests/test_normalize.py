@@ -0,0 +1,38 @@
+import pathlib, sys
+import numpy as np
+import pandas as pd
+sys.path.insert(0, str(pathlib.Path('src').resolve()))
+from data import normalize
+
+def _panel(seed=0):
+    rng = np.random.default_rng(seed)
+    rows = [(d, s) for d in pd.date_range('2020-01-31', periods=30, freq='ME') for s in 'ABCDEFG' if rng.random() > 0.2]
+    df = pd.DataFrame(rows, columns=['date', 'symbol'])
+    df['a'] = rng.normal(size=len(df)).round(1)  # rounded so ranks have ties
+    df['b'] = np.where(rng.random(len(df)) < 0.1, np.nan, rng.normal(size=len(df)))
+    df['y'] = rng.normal(size=len(df))
+    return df
+
+def test_cross_sectional_matches_groupby():
+    df = _panel()
+    out, cols = normalize.normalize_panel(df, ['zscore', 'rank'])
+    assert cols == ['a_z', 'b_z', 'a_rank', 'b_rank']
+    g = df.groupby('date')[['a', 'b']]
+    z = (df[['a', 'b']] - g.transform('mean')) / g.transform(lambda x: x.std(ddof=0))
+    np.testing.assert_allclose(out[['a_z', 'b_z']].to_numpy(), z.to_numpy(), rtol=1e-5, atol=1e-6)
+    r = (g.rank(method='average') - 1) / (g.transform('count') - 1)
+    np.testing.assert_allclose(out[['a_rank', 'b_rank']].to_numpy(), r.to_numpy(), rtol=1e-6)
+
+def test_expanding_is_point_in_time():
+    df = _panel()
+    out, _ = normalize.normalize_panel(df, ['expanding'], min_periods=3)
+    g = df.groupby('symbol')['b']
+    mean = g.transform(lambda x: x.expanding(3).mean())
+    std = g.transform(lambda x: x.expanding(3).std(ddof=0))
+    np.testing.assert_allclose(out['b_ez'].to_numpy(), ((df['b'] - mean) / std).to_numpy(), rtol=1e-4, atol=1e-5)
+    # appending a later snapshot leaves every existing row unchanged
+    later, _ = normalize.normalize_panel(pd.concat([df, _panel(1).iloc[-5:].assign(date=pd.Timestamp('2030-01-31'))],
+                                                   ignore_index=True), ['expanding', 'zscore'], min_periods=3)
+    np.testing.assert_array_equal(later['b_ez'].to_numpy()[:len(df)], out['b_ez'].to_numpy())
+    # renormalizing with other methods replaces the derived columns
+    assert normalize.normalize_panel(later, [])[1] == ['a', 'b'] and 'a_z' not in normalize.normalize_panel(later, [])[0]
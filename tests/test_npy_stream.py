@@ -0,0 +1,50 @@
+import pathlib, sys
+import numpy as np
+import pandas as pd
+sys.path.insert(0, str(pathlib.Path('src').resolve()))
+from data.npy_stream import NpyAppender
+from data.make_dataset import merge_by_time, stream_dataset
+
+def test_appender_writes_loadable_npy(tmp_path):
+    with NpyAppender(str(tmp_path / 'a.npy'), np.float32, (3,)) as a:
+        a.append(np.ones((2, 3)))
+        a.append(np.arange(6).reshape(2, 3))
+    out = np.load(tmp_path / 'a.npy', mmap_mode='r')
+    assert out.shape == (4, 3) and out.dtype == np.float32 and out.offset % 64 == 0
+    assert out[3].tolist() == [3, 4, 5]
+
+def _rows(times, base):
+    idx = pd.DatetimeIndex(times, tz='UTC')
+    return pd.DataFrame({'ret1@base': base + np.arange(len(idx)), 'y_4': -(base + np.arange(len(idx)))}, index=idx)
+
+def test_stream_dataset_orders(tmp_path):
+    t = pd.date_range('2024-01-02', periods=4, freq='D')
+    results = [('B', _rows(t[1:], 100.0)), ('A', _rows(t, 0.0))]  # completion order != symbol order
+    sym2id = {'A': 0, 'B': 1}
+    outs = {k: str(tmp_path / f'{k}.npy') for k in ('X', 'y', 's', 't')}
+    for order in ('time', 'symbol'):
+        meta = stream_dataset(iter(results), ['A', 'B'], sym2id, outs['X'], outs['y'], outs['s'], outs['t'],
+                              order=order, chunk_rows=3)
+        sids = np.load(outs['s']).tolist()
+        X = np.load(outs['X'])[:, 0].tolist()
+        if order == 'time':
+            assert sids == [0, 0, 1, 0, 1, 0, 1]  # ties keep symbol order
+            assert X == [0, 1, 100, 2, 101, 3, 102]
+        else:
+            assert sids == [0, 0, 0, 0, 1, 1, 1] and X == [0, 1, 2, 3, 100, 101, 102]
+        assert np.load(outs['y']).tolist() == [-x for x in X]
+        assert np.all(np.diff(np.load(outs['t'])) >= 0) or order == 'symbol'
+    assert meta['per_symbol_max_ts'] == {'A': int(t[-1].timestamp()), 'B': int(t[-1].timestamp())}
+    assert meta['feature_cols'] == ['ret1@base'] and meta['rows'] == 7
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['X.npy', 's.npy', 't.npy', 'y.npy']
+
+def test_merge_by_time_matches_a_stable_sort():
+    rng = np.random.default_rng(0)
+    lens = [0, 1, 7, 30, 55, 3]
+    t = np.concatenate([np.sort(rng.choice(80, n, replace=False)) for n in lens]).astype(np.int64)
+    firsts = np.r_[0, np.cumsum(lens)[:-1]]
+    ref = np.argsort(t, kind='stable')  # runs are laid out in run order, so ties keep run order
+    for block in (1, 4, 1000):
+        rows, ranks = map(np.concatenate, zip(*merge_by_time(t, list(zip(firsts, lens)), block)))
+        assert rows.tolist() == ref.tolist()
+        assert (firsts[ranks] <= rows).all() and (rows < firsts[ranks] + np.array(lens)[ranks]).all()
@@ -0,0 +1,23 @@
+import pathlib, sys
+sys.path.insert(0, str(pathlib.Path('src').resolve()))
+import numpy as np
+import pandas as pd
+from data.panel_store import export_panel, load_panel
+
+def test_export_roundtrip_memmaps_panel(tmp_path):
+    panel = pd.DataFrame({
+        'ret1': [0.1, 0.2, 0.3, 0.4, 0.5],
+        'vol20': [1.0, 2.0, np.nan, 4.0, 5.0],
+        'symbol': ['BBB', 'AAA', 'AAA', 'CCC', 'BBB'],
+        'y': [0.01, -0.02, 0.03, 0.0, 0.05],
+        'date': pd.to_datetime(['2020-01-31', '2020-01-31', '2020-02-28', '2020-02-28', '2020-02-28']),
+    })
+    export_panel(panel, tmp_path)
+    t = load_panel(tmp_path)
+    assert isinstance(t.X, np.memmap) and t.X.dtype == np.float32 and t.X.flags.c_contiguous
+    np.testing.assert_array_equal(t.X, panel[['ret1', 'vol20']].to_numpy(np.float32))
+    np.testing.assert_array_equal(t.y, panel['y'].to_numpy(np.float32))
+    assert t.group_offsets.tolist() == [0, 2, 5] and t.group_sizes.tolist() == [2, 3]
+    assert [str(d) for d in t.dates] == ['2020-01-31', '2020-02-28']
+    assert t.symbols.tolist() == panel['symbol'].tolist()
+    assert t.meta['feature_cols'] == ['ret1', 'vol20']
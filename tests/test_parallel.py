@@ -0,0 +1,16 @@
+import pathlib, sys
+sys.path.insert(0, str(pathlib.Path('src').resolve()))
+import numpy as np
+import pandas as pd
+from data.parallel import chunked, from_arrow, map_ordered, to_arrow
+
+def _frame(i):
+    idx = pd.date_range('2020-01-01', periods=5, tz='UTC')
+    return to_arrow(pd.DataFrame({'symbol': f'S{i}', 'x': np.arange(5.0) * i}, index=idx))
+
+def test_process_pool_matches_serial_order_and_content():
+    serial = [from_arrow(t) for t in map_ordered(_frame, range(6), workers=1)]
+    pooled = [from_arrow(t) for t in map_ordered(_frame, range(6), workers=3)]
+    assert all(a.equals(b) for a, b in zip(serial, pooled)) and len(pooled) == 6
+    assert pooled[2].index.tz is not None and pooled[2]['symbol'].iloc[0] == 'S2'
+    assert [list(c) for c in chunked([1, 2, 3, 4, 5], 2)] == [[1, 2], [3, 4], [5]]
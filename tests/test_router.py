@@ -0,0 +1,110 @@
+import pathlib, sys
+sys.path.insert(0, str(pathlib.Path('src').resolve()))
+import pandas as pd
+import pytest
+from data.providers.base import MarketDataProvider
+from data.providers.router import CircuitOpenError, ProviderRouter
+
+class _Clock:
+    def __init__(self): self.t = 0.0
+    def __call__(self): return self.t
+
+class _Good(MarketDataProvider):
+    def get_bars(self, symbol, start, end, interval):
+        return pd.DataFrame({'close': [1.0]}, index=pd.DatetimeIndex(['2024-01-02'], tz='UTC'))
+
+class _Empty(MarketDataProvider):
+    def get_bars(self, symbol, start, end, interval):
+        return pd.DataFrame()
+
+class _Down(MarketDataProvider):
+    def get_bars(self, symbol, start, end, interval):
+        raise ConnectionError('down')
+
+class _NoKeys(_Good):
+    def is_configured(self): return False
+
+def test_router_skips_unconfigured_and_opens_circuit():
+    clock = _Clock()
+    r = ProviderRouter([('nokeys', _NoKeys()), ('down', _Down()), ('good', _Good())],
+                       failure_threshold=2, cooldown=60, retries=1, clock=clock, sleep=lambda s: None)
+    assert [n for n, _ in r.order()] == ['down', 'good']
+    with pytest.raises(ConnectionError):
+        r.fetch_batch('down', r.providers[1][1], ['AAA'], '2024-01-01', '2024-02-01', '1d')
+    assert r.snapshot()['down']['circuit_open']
+    assert [n for n, _ in r.order()] == ['good']
+    clock.t += 61  # half-open: one more trial allowed
+    assert 'down' in [n for n, _ in r.order()]
+
+def test_router_prefers_providers_that_return_data():
+    r = ProviderRouter([('empty', _Empty()), ('good', _Good())], sleep=lambda s: None)
+    for name, p in r.providers:
+        r.fetch_batch(name, p, ['AAA', 'BBB'], '2024-01-01', '2024-02-01', '1d')
+    r.stats['empty'].latency_ewma = r.stats['good'].latency_ewma = 0.01
+    assert [n for n, _ in r.order()] == ['good', 'empty']
+
+def test_half_open_lets_one_trial_through():
+    import threading
+    clock = _Clock()
+    calls, lock = [], threading.Lock()
+    ordered, all_ordered = [], threading.Event()
+    all_ordered.set()
+
+    class _Recovering(MarketDataProvider):
+        def get_bars(self, symbol, start, end, interval):
+            with lock:
+                calls.append(symbol)
+            all_ordered.wait(5)  # every worker has picked its providers while this call is in flight
+            raise ConnectionError('still down')
+
+    r = ProviderRouter([('flaky', _Recovering())], failure_threshold=1, cooldown=60,
+                       retries=0, clock=clock, sleep=lambda s: None)
+    with pytest.raises(ConnectionError):
+        r.fetch_batch('flaky', r.providers[0][1], ['AAA'], '2024-01-01', '2024-02-01', '1d')
+    clock.t += 61
+    calls.clear()
+    all_ordered.clear()
+    barrier = threading.Barrier(8)
+
+    def worker():
+        barrier.wait()
+        order = r.order()
+        with lock:
+            ordered.append(1)
+            if len(ordered) == 8:
+                all_ordered.set()
+        for name, p in order:
+            try:
+                r.fetch_batch(name, p, ['AAA'], '2024-01-01', '2024-02-01', '1d')
+            except (ConnectionError, CircuitOpenError):  # the trial failed / another worker holds it
+                pass
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert r.snapshot()['flaky']['circuit_open']  # the failed trial re-opened it
+
+def test_trial_is_reserved_only_when_dispatched():
+    clock = _Clock()
+    down = {'flag': True}
+
+    class _Recovers(_Good):
+        def get_bars(self, symbol, start, end, interval):
+            if down['flag']:
+                raise ConnectionError('down')
+            return super().get_bars(symbol, start, end, interval)
+
+    r = ProviderRouter([('good', _Good()), ('backup', _Recovers())], failure_threshold=1, cooldown=60,
+                       retries=0, clock=clock, sleep=lambda s: None)
+    with pytest.raises(ConnectionError):
+        r.fetch_batch('backup', r.providers[1][1], ['AAA'], '2024-01-01', '2024-02-01', '1d')
+    down['flag'] = False
+    clock.t += 61
+    for _ in range(5):  # callers served by 'good' first never dispatch to 'backup'
+        assert [n for n, _ in r.order()] == ['good', 'backup']
+        clock.t += 30
+    r.fetch_batch('backup', r.providers[1][1], ['AAA'], '2024-01-01', '2024-02-01', '1d')
+    assert not r.snapshot()['backup']['circuit_open'] and not r.stats['backup'].trial_in_flight
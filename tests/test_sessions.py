@@ -0,0 +1,32 @@
+import pathlib, sys
+from datetime import date
+import numpy as np
+import pandas as pd
+sys.path.insert(0, str(pathlib.Path('src').resolve()))
+from data import sessions
+from data.utils_timeseries import resample_ohlcv, restrict_rth
+
+def test_calendar_2024():
+    assert sessions.holidays(2024) == [date(2024, 1, 1), date(2024, 1, 15), date(2024, 2, 19), date(2024, 3, 29),
+                                       date(2024, 5, 27), date(2024, 6, 19), date(2024, 7, 4), date(2024, 9, 2),
+                                       date(2024, 11, 28), date(2024, 12, 25)]
+    assert sessions.early_closes(2024) == [date(2024, 7, 3), date(2024, 11, 29), date(2024, 12, 24)]
+    t = sessions.nyse_sessions(2024, 2024)
+    assert len(t.dates) == 252 and sessions.nyse_sessions(2024, 2024) is t
+
+def test_rth_mask_applies_holidays_early_closes_and_close():
+    ts = ['2024-07-03 12:45', '2024-07-03 13:00', '2024-07-04 10:00', '2024-07-05 09:29',
+          '2024-07-05 09:30', '2024-07-05 15:59', '2024-07-05 16:00', '2024-07-06 10:00']
+    idx = pd.DatetimeIndex(ts).tz_localize('America/New_York').tz_convert('UTC')
+    assert sessions.rth_mask(idx).tolist() == [True, False, False, False, True, True, False, False]
+    df = pd.DataFrame({'close': np.arange(len(idx), dtype=float)}, index=idx)
+    assert restrict_rth(df)['close'].tolist() == [0.0, 4.0, 5.0]
+
+def test_resample_fast_path_matches_resample():
+    idx = pd.date_range('2024-01-02 14:30', periods=8, freq='15min', tz='UTC')
+    df = pd.DataFrame({'open': 1.0, 'high': 2.0, 'low': 0.5, 'close': np.arange(8.0), 'volume': 10.0, 'vwap': 1.0}, index=idx)
+    ref = df.resample('15min', origin='start').agg({'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'})
+    pd.testing.assert_frame_equal(resample_ohlcv(df, '15min'), ref, check_freq=False)
+    # a gap or an off-grid bar still goes through resample
+    assert len(resample_ohlcv(df.drop(idx[3]), '1h')) == 2
+    assert resample_ohlcv(df.iloc[[0, 1]].set_axis(idx[[0]].append(idx[[0]] + pd.Timedelta('5min'))), '15min')['volume'].tolist() == [20.0]
@@ -0,0 +1,60 @@
+import pathlib, sys
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+sys.path.insert(0, str(pathlib.Path('src').resolve()))
+from data import storage
+from data.partitions import DatePartitionWriter
+from jobs.build_panel_monthly import read_partitions
+
+def _rows(day, syms, **cols):
+    idx = pd.DatetimeIndex([day] * len(syms), tz='UTC', name='timestamp')
+    return pd.DataFrame({'symbol': syms, **cols}, index=idx)
+
+def test_schema_round_trip(tmp_path):
+    df = pd.DataFrame({'x': [1.5, 2.5], 'n': [1, 2], 'symbol': ['B', 'A'],
+                       'date': pd.to_datetime(['2024-01-31', '2024-01-31'])})
+    storage.write_parquet(df, tmp_path / 'p.parquet')
+    schema = pq.read_schema(tmp_path / 'p.parquet')
+    assert str(schema.field('x').type) == 'float' and str(schema.field('date').type) == 'date32[day]'
+    assert schema.field('symbol').type == storage.SYMBOL_TYPE
+    assert pq.ParquetFile(tmp_path / 'p.parquet').metadata.row_group(0).column(0).compression == 'ZSTD'
+    back = storage.read_parquet(tmp_path / 'p.parquet')
+    assert back['x'].dtype == np.float32 and back['n'].dtype == np.int64
+    assert isinstance(back['symbol'].dtype, pd.CategoricalDtype) and list(back['symbol']) == ['B', 'A']
+    assert back['date'].dtype.kind == 'M' and back['date'].iloc[0] == pd.Timestamp('2024-01-31')
+
+def test_partitions_mix_old_and_new_files(tmp_path):
+    # a partition written before the storage schema (float64, plain strings) next to new ones
+    old_dir = tmp_path / 'date=2024-01-02'
+    old_dir.mkdir()
+    _rows('2024-01-02', ['A', 'B'], y_21=[0.1, 0.2]).to_parquet(old_dir / 'part.parquet')
+    w = DatePartitionWriter(tmp_path, update=True)
+    w.add(_rows('2024-01-02', ['B'], y_63=[0.5]))
+    w.add(_rows('2024-01-03', ['A'], y_21=[0.3], y_63=[0.4]))
+    w.flush()
+    merged = storage.read_parquet(old_dir / 'part.parquet').set_index('symbol').sort_index()
+    assert merged['y_21'].tolist() == [np.float32(0.1), np.float32(0.2)]
+    assert np.isnan(merged.loc['A', 'y_63']) and merged.loc['B', 'y_63'] == np.float32(0.5)
+
+    out = read_partitions(tmp_path, ['2024-01-02', '2024-01-03'], columns=['symbol', 'y_21'])
+    assert len(out) == 3 and out['y_21'].dtype == np.float32
+    assert isinstance(out['symbol'].dtype, pd.CategoricalDtype)
+
+def test_interrupted_partition_write_keeps_the_old_file(tmp_path, monkeypatch):
+    from data import partitions
+    w = DatePartitionWriter(tmp_path)
+    w.add(_rows('2024-01-02', ['A', 'B'], x=[1.0, 2.0]))
+    w.flush()
+
+    def crash(df, path, **kw):
+        pathlib.Path(path).write_bytes(b'PAR1 trunc')  # dies halfway through the file
+        raise OSError('disk full')
+
+    monkeypatch.setattr(partitions, 'write_parquet', crash)
+    w.add(_rows('2024-01-02', ['C'], x=[3.0]))
+    with pytest.raises(OSError):
+        w.flush()
+    back = storage.read_parquet(tmp_path / 'date=2024-01-02' / 'part.parquet')
+    assert sorted(back['symbol']) == ['A', 'B']
@@ -0,0 +1,16 @@
+import pathlib, sys
+sys.path.insert(0, str(pathlib.Path('src').resolve()))
+from data.providers.registry import get_provider
+from data.providers.synthetic import SyntheticProvider
+
+def test_synthetic_bars_are_deterministic_and_range_consistent():
+    p = get_provider('synthetic')
+    assert isinstance(p, SyntheticProvider)
+    a = p.get_bars('AAA', '2020-01-01', '2021-01-01', '1d')
+    b = SyntheticProvider().get_bars('AAA', '2019-06-01', '2023-01-01', '1d')
+    assert len(a) == 262 and a.equals(b.loc[a.index])
+    assert (a['high'] >= a[['open', 'close']].max(axis=1)).all() and (a['low'] <= a[['open', 'close']].min(axis=1)).all()
+    assert not a['close'].equals(p.get_bars('BBB', '2020-01-01', '2021-01-01', '1d')['close'])
+
+    h = p.get_bars('AAA', '2020-01-06', '2020-01-07', '15min')
+    assert len(h) == 26 and str(h.index[0]) == '2020-01-06 14:30:00+00:00'